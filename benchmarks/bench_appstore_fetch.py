@@ -0,0 +1,121 @@
+# benchmarks/bench_appstore_fetch.py
+"""
+Throughput/latency of appstore_fetch.bulk_fetch against a local mock RapidAPI server.
+
+    python benchmarks/bench_appstore_fetch.py --apps 500 --latency-ms 50 --workers 1 8 32
+
+Every Nth request (--throttle-every) answers 429 with Retry-After so the backoff
+path is exercised too.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+import appstore_fetch  # noqa: E402
+
+
+def make_handler(latency_s, throttle_every, retry_after):
+    counter = itertools.count(1)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is measurable
+
+        def do_GET(self):
+            time.sleep(latency_s)
+            n = next(counter)
+            if throttle_every and n % throttle_every == 0:
+                self.send_response(429)
+                self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps({"status": "ok", "error": None,
+                               "data": {"id": n, "title": f"App {n}", "score": 4.2}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(n_apps, workers, rate, args):
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 make_handler(args.latency_ms / 1000, args.throttle_every, args.retry_after))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    appstore_fetch.API_URL = f"http://127.0.0.1:{server.server_port}/v1/appstore"
+    appstore_fetch._session = None
+    appstore_fetch._cache = None  # each run starts from its own empty cache
+
+    latencies = []
+    fetch = appstore_fetch.fetch_app_by_id
+
+    def timed_fetch(app_id, limiter=None):
+        t0 = time.perf_counter()
+        try:
+            return fetch(app_id, limiter=limiter)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        appstore_fetch.CACHE_DIR = Path(tmp)
+        appstore_fetch.fetch_app_by_id = timed_fetch
+        limiter = appstore_fetch.TokenBucket(rate, burst=max(1, workers))
+        ids = [str(100000 + i) for i in range(n_apps)]
+        try:
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                out = appstore_fetch.bulk_fetch(ids, max_workers=workers, limiter=limiter)
+            wall = time.perf_counter() - t0
+        finally:
+            appstore_fetch.fetch_app_by_id = fetch
+            server.shutdown()
+
+    lat = np.array(latencies) * 1000
+    return {
+        "workers": workers,
+        "apps": n_apps,
+        "ok": len(out),
+        "wall_s": round(wall, 3),
+        "req_per_s": round(len(out) / wall, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 1),
+        "p99_ms": round(float(np.percentile(lat, 99)), 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apps", type=int, default=300)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--rate", type=float, default=0, help="token bucket rate (req/s); 0 = unlimited")
+    ap.add_argument("--latency-ms", type=float, default=30)
+    ap.add_argument("--throttle-every", type=int, default=100)
+    ap.add_argument("--retry-after", type=float, default=0.2)
+    args = ap.parse_args()
+
+    print(f"{'workers':>8} {'ok':>6} {'wall_s':>8} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for w in args.workers:
+        r = run(args.apps, w, args.rate, args)
+        print(f"{r['workers']:>8} {r['ok']:>6} {r['wall_s']:>8} {r['req_per_s']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_confidence.py
+"""
+Regression check + benchmark for confidence scoring: a Python loop over
+compute_confidence / cohen_d vs one call of compute_confidence_vec / cohen_d_vec
+over --insights synthetic segment x metric insights. Scores must be identical to the
+wrappers and to the original scalar implementations (copied below as legacy_*).
+
+    python benchmarks/bench_confidence.py --insights 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from confidence import cohen_d, cohen_d_vec, compute_confidence, compute_confidence_vec  # noqa: E402
+
+
+def legacy_cohen_d(a, b):
+    a = np.array(a); b = np.array(b)
+    na, nb = len(a), len(b)
+    if na < 2 or nb < 2:
+        return 0.0
+    pooled_sd = np.sqrt(((na-1)*a.std(ddof=1)**2 + (nb-1)*b.std(ddof=1)**2) / (na+nb-2))
+    if pooled_sd == 0:
+        return 0.0
+    return (a.mean() - b.mean()) / pooled_sd
+
+
+def legacy_compute_confidence(n, p_value, effect_size, freshness_days):
+    n_score = 1 - np.exp(-n/100)
+    p_score = 1 - min(1, max(0, -np.log10(p_value+1e-12)/6))
+    e_score = 1 - np.exp(-abs(effect_size)/0.5)
+    freshness_score = np.exp(-freshness_days/365)
+    w = {'n': 0.25, 'p': 0.25, 'e': 0.3, 'f': 0.2}
+    score = w['n']*n_score + w['p']*p_score + w['e']*e_score + w['f']*freshness_score
+    return float(round(score, 3))
+
+
+def synthetic(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return {
+        "n": rng.integers(0, 5000, n),
+        "p_value": np.concatenate([rng.random(n - 3), [0.0, 1.0, np.nan]]),
+        "effect_size": rng.normal(0, 0.6, n),
+        "freshness_days": rng.integers(0, 3000, n),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--insights", type=int, default=1_000_000)
+    ap.add_argument("--scalar-insights", type=int, default=200_000,
+                    help="rows scored by the scalar loop (timed and compared)")
+    args = ap.parse_args()
+    cols = synthetic(args.insights)
+    k = min(args.scalar_insights, args.insights)
+
+    t0 = time.perf_counter()
+    vec = compute_confidence_vec(**cols)
+    t_vec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    loop = np.array([compute_confidence(n, p, e, f) for n, p, e, f in
+                     zip(*(cols[c][-k:] for c in ("n", "p_value", "effect_size", "freshness_days")))])
+    t_loop = time.perf_counter() - t0
+    legacy = np.array([legacy_compute_confidence(n, p, e, f) for n, p, e, f in
+                       zip(*(cols[c][-k:] for c in ("n", "p_value", "effect_size", "freshness_days")))])
+    assert np.array_equal(vec[-k:], loop), "compute_confidence_vec differs from compute_confidence"
+    assert np.array_equal(vec[-k:], legacy), "compute_confidence_vec differs from the original scalar code"
+    print(f"✅ compute_confidence_vec matches the scalar functions on {k} insights")
+    print(f"compute_confidence loop: {t_loop / k * 1e6:8.2f} µs/insight (~{t_loop / k * args.insights:.1f}s for {args.insights})")
+    print(f"compute_confidence_vec : {t_vec / args.insights * 1e6:8.3f} µs/insight ({t_vec:.3f}s total)")
+
+    # cohen_d from group samples vs cohen_d_vec from the same groups' summaries
+    rng = np.random.default_rng(1)
+    groups = [rng.normal(4, 0.5, rng.integers(1, 40)) for _ in range(min(k, 50_000))]
+    ref = rng.normal(4.1, 0.6, 500)
+    t0 = time.perf_counter()
+    loop_d = np.array([cohen_d(g, ref) for g in groups])
+    t_loop = time.perf_counter() - t0
+    mean = np.array([g.mean() for g in groups])
+    std = np.array([g.std(ddof=1) if len(g) > 1 else np.nan for g in groups])
+    size = np.array([len(g) for g in groups])
+    t0 = time.perf_counter()
+    vec_d = cohen_d_vec(mean, std, size, ref.mean(), ref.std(ddof=1), len(ref))
+    t_vec = time.perf_counter() - t0
+    assert np.array_equal(vec_d, loop_d), "cohen_d_vec differs from cohen_d"
+    assert np.array_equal(vec_d, [legacy_cohen_d(g, ref) for g in groups]), "cohen_d_vec differs from the original"
+    print(f"✅ cohen_d_vec matches cohen_d on {len(groups)} groups")
+    print(f"cohen_d loop: {t_loop / len(groups) * 1e6:8.2f} µs/group; cohen_d_vec: {t_vec / len(groups) * 1e6:.3f} µs/group")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/bench_d2c.py
+"""
+Phase 5 D2C analytics (src/d2c_analytics.py) at scale:
+
+  * workbook: the real sheet tiled to --workbook-rows and written as .xlsx; pd.read_excel
+    vs load_workbook's first conversion vs the cached load, and a touch of the workbook
+    must invalidate the cache
+  * engine: --rows synthetic campaign/keyword rows; the legacy path (compute_cac_roas on
+    every row, a groupby per level, seo_opportunities' full sort) vs funnel_metrics + top_keywords. Per-level
+    sums and means are checked against a plain pandas groupby and the top-k scores
+    against the legacy sorted head(k)
+
+    python benchmarks/bench_d2c.py --rows 5000000
+    python benchmarks/bench_d2c.py --rows 50000000      # ~15 GB of RAM for the legacy path
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import d2c_analytics as d2c  # noqa: E402
+
+LEGACY = {"spend_usd": "Spend", "first_purchase": "Conversions", "revenue_usd": "Revenue",
+          "monthly_search_volume": "SearchVolume", "avg_position": "AvgPosition",
+          "conversion_rate": "ConversionRate", "seo_category": "Category"}
+
+
+def timed(fn, *args, **kw):
+    t0 = time.perf_counter()
+    out = fn(*args, **kw)
+    return out, time.perf_counter() - t0
+
+
+def bench_workbook(rows):
+    real = pd.read_excel(ROOT / d2c.WORKBOOK)
+    df = pd.concat([real] * -(-rows // len(real)), ignore_index=True).head(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path, cache = Path(tmp) / "d2c.xlsx", Path(tmp) / "cache"
+        df.to_excel(path, index=False)
+        _, excel = timed(pd.read_excel, path)
+        first, convert = timed(d2c.load_workbook, path, cache_dir=cache)
+        cached, hit = timed(d2c.load_workbook, path, cache_dir=cache)
+        pd.testing.assert_frame_equal(first, cached)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        _, again = timed(d2c.load_workbook, path, cache_dir=cache)
+        assert again > 10 * hit, "touching the workbook did not invalidate the cache"
+    print(f"{'workbook':<10} {len(df):>10,} rows: read_excel {excel:.2f}s, first load {convert:.2f}s, "
+          f"cached {hit:.3f}s ({excel / hit:.0f}x)")
+    print("✅ cached load identical, invalidated by mtime")
+
+
+def synthetic(rows, seed=0, campaigns=5000, categories=40):
+    rng = np.random.default_rng(seed)
+    channels = np.array(["Google Ads", "Meta Ads", "Instagram Influencer", "Organic Search", "YouTube", "TikTok"])
+    impressions = rng.integers(1_000, 60_000, rows, dtype=np.int32)
+    clicks = (impressions * rng.uniform(0.01, 0.2, rows)).astype(np.int32)
+    installs = (clicks * rng.uniform(0.05, 0.5, rows)).astype(np.int32)
+    first = (installs * rng.uniform(0.0, 0.6, rows)).astype(np.int32)
+    campaign = rng.integers(0, campaigns, rows)
+    return pd.DataFrame({
+        "campaign_id": pd.Categorical.from_codes(campaign, [f"CAMP_{i:05d}" for i in range(campaigns)]),
+        "channel": pd.Categorical.from_codes(campaign % len(channels), channels),  # one channel per campaign
+        "spend_usd": rng.uniform(50, 5000, rows).round(2),
+        "impressions": impressions,
+        "clicks": clicks,
+        "installs": installs,
+        "signups": (installs * rng.uniform(0.2, 0.9, rows)).astype(np.int32),
+        "first_purchase": first,
+        "repeat_purchase": (first * rng.uniform(0, 1, rows)).astype(np.int32),
+        "revenue_usd": rng.uniform(0, 20_000, rows).round(2),
+        "seo_category": pd.Categorical.from_codes(rng.integers(0, categories, rows),
+                                                  [f"Category {i}" for i in range(categories)]),
+        "avg_position": rng.uniform(0, 60, rows).round(1),  # some 0.0, which score as 1
+        "monthly_search_volume": rng.integers(100, 100_000, rows, dtype=np.int32),
+        "conversion_rate": rng.uniform(0.5, 6, rows).round(2),
+    })
+
+
+def legacy(df, k):
+    # per-row CAC/ROAS, a groupby per level and seo_opportunities' full sort
+    old = df.rename(columns=LEGACY)
+    d2c.compute_cac_roas(old)
+    for level in ("channel", "campaign_id", "Category"):
+        old.groupby(level, observed=True)[["Spend", "Revenue", "Conversions", "impressions", "clicks",
+                                           "installs", "AvgPosition"]].agg(["sum", "mean"])
+    return d2c.seo_opportunities(old).head(k)
+
+
+def engine(df, k):
+    return d2c.funnel_metrics(df), d2c.top_keywords(df, k)
+
+
+def check(df, metrics, top, ref_top, k):
+    for level, g in metrics.items():
+        ref = df.groupby(level, observed=True).agg(
+            **{c: (c, "sum") for c in d2c.SUMS},
+            avg_position=("avg_position", "mean"), rows=("spend_usd", "size"))
+        ref = ref.set_axis(ref.index.astype(str)).sort_index()
+        assert g.index.tolist() == ref.index.tolist(), level
+        for c in ref.columns:
+            assert np.allclose(g[c].to_numpy(float), ref[c].to_numpy(float), rtol=1e-9), (level, c)
+        assert np.allclose(g["ROAS"], ref["revenue_usd"] / ref["spend_usd"]), level
+        print(f"✅ {level}: {len(g):,} groups match groupby")
+    assert np.array_equal(top["SEO_Score"].to_numpy(), ref_top["SEO_Score"].to_numpy())
+    by = d2c.top_keywords(df, 3, by="seo_category")
+    for cat, part in by.groupby("seo_category", observed=True):
+        ref = np.sort(d2c.seo_scores(df[df["seo_category"] == cat]))[::-1][:3]
+        assert np.array_equal(part["SEO_Score"].to_numpy(), ref), cat
+    print(f"✅ top {k} keywords match the full sort, overall and per category")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--workbook-rows", type=int, default=20_000)
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args()
+
+    bench_workbook(args.workbook_rows)
+
+    df = synthetic(args.rows)
+    ref_top, old = timed(legacy, df, args.top)
+    (metrics, top), new = timed(engine, df, args.top)
+    print(f"{'engine':<10} {len(df):>10,} rows: legacy {old:.2f}s, funnel_metrics + top_keywords {new:.2f}s "
+          f"({old / new:.1f}x)")
+    check(df, metrics, top, ref_top, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_entity_resolution.py
+"""
+Candidate pairs produced by the blocking index vs the naive android x ios cross join,
+plus wall time and precision/recall against the synthetic ground truth.
+
+    python benchmarks/bench_entity_resolution.py --apps 500000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from entity_resolution import resolve_entities  # noqa: E402
+
+WORDS = ("photo video music chat cloud fit pay smart super block word puzzle farm city racing hero "
+         "sky star magic ninja pocket daily budget note scan map radio news sleep yoga dash quest "
+         "pixel craft tower bubble snake cook recipe learn math kids baby pet dog cat zen").split()
+CATS = [("game", "Games"), ("social", "Social Networking"), ("tools", "Utilities"),
+        ("finance", "Finance"), ("health_and_fitness", "Health & Fitness"), ("education", "Education")]
+TAGLINES = ["", "", "", " - Free", ": Offline Edition", " – Best App"]
+SUFFIXES = ["", " Inc.", " LLC", " Ltd", ", Inc"]
+
+
+def synthetic(n_apps: int, ios_share: float = 0.4, seed: int = 0):
+    """Android catalog of n_apps plus an ios catalog where ios_share of them also exist."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    names = [" ".join(w).title() + f" {i % 997}" for i, w in
+             enumerate(zip(words[rng.integers(0, len(words), n_apps)], words[rng.integers(0, len(words), n_apps)]))]
+    pubs = [f"Studio {i // 7}" for i in range(n_apps)]
+    cat = rng.integers(0, len(CATS), n_apps)
+    android = pd.DataFrame({"platform": "android", "app_name": names, "publisher": pubs,
+                            "category": [CATS[c][0] for c in cat], "truth": np.arange(n_apps)})
+
+    both = np.flatnonzero(rng.random(n_apps) < ios_share)
+    tag = rng.integers(0, len(TAGLINES), len(both))
+    suf = rng.integers(0, len(SUFFIXES), len(both))
+    ios = pd.DataFrame({
+        "platform": "ios",
+        "app_name": [names[k] + TAGLINES[t] for k, t in zip(both, tag)],
+        "publisher": [pubs[k] + SUFFIXES[s] for k, s in zip(both, suf)],
+        "category": [CATS[cat[k]][1] for k in both],
+        "truth": both,
+    })
+    extra = int(n_apps * ios_share / 4)  # ios-only apps with lookalike names
+    ios_only = pd.DataFrame({"platform": "ios",
+                             "app_name": [names[k] + " Pro" for k in rng.integers(0, n_apps, extra)],
+                             "publisher": [f"Other {i}" for i in range(extra)],
+                             "category": "Utilities", "truth": n_apps + np.arange(extra)})
+    return pd.concat([android, ios, ios_only], ignore_index=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apps", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = ap.parse_args()
+
+    print(f"{'rows':>9} {'naive_pairs':>15} {'candidates':>11} {'reduction':>10} "
+          f"{'matched':>8} {'precision':>9} {'recall':>7} {'wall_s':>7}")
+    for n in args.apps:
+        df = synthetic(n)
+        t0 = time.perf_counter()
+        out = resolve_entities(df)
+        wall = time.perf_counter() - t0
+        s = out.attrs["entity_resolution"]
+
+        # pairwise truth: android/ios rows that share `truth` should share app_entity_id
+        a = out[out.platform == "android"].set_index("truth")["app_entity_id"]
+        i = out[out.platform == "ios"].set_index("truth")["app_entity_id"]
+        common = i.index.intersection(a.index)
+        linked = i.reset_index().merge(a.reset_index(), on="app_entity_id", suffixes=("_i", "_a"))
+        tp = int((linked.truth_i == linked.truth_a).sum())
+        precision = tp / len(linked) if len(linked) else 1.0
+        recall = tp / len(common) if len(common) else 1.0
+        print(f"{len(df):>9} {s['naive_pairs']:>15,} {s['candidate_pairs']:>11,} "
+              f"{s['naive_pairs'] / max(s['candidate_pairs'], 1):>9.0f}x {s['matched_pairs']:>8} "
+              f"{precision:>9.3f} {recall:>7.3f} {wall:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
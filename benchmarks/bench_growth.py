@@ -0,0 +1,81 @@
+# benchmarks/bench_growth.py
+"""
+Growth over several windows and a weekly history on --rows synthetic apps:
+detect_growth as it was (filter + two groupbys per window / per as-of date) vs one
+GrowthIndex answering everything with searchsorted. Counts are checked against the
+direct computation.
+
+    python benchmarks/bench_growth.py --rows 20000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from growth import GrowthIndex  # noqa: E402
+
+WINDOWS = [30, 90, 180, 365]
+
+
+def legacy_detect_growth(df, as_of, date_col='last_updated', window_days=90):
+    # analytics.detect_growth before the index, anchored at as_of instead of now
+    df = df.copy()
+    cut = as_of - pd.Timedelta(days=window_days)
+    recent = df[(df[date_col] >= cut) & (df[date_col] <= as_of)]
+    recent_counts = recent.groupby('category', observed=True).size().rename('recent_count')
+    overall_counts = df[(df[date_col] <= as_of) | df[date_col].isna()].groupby('category', observed=True).size()
+    stats = pd.concat([recent_counts, overall_counts.rename('total_count')], axis=1).fillna(0)
+    stats['recent_ratio'] = (stats['recent_count'] / (stats['total_count']+1)).round(3)
+    return stats
+
+
+def synthetic(rows: int, categories: int = 60, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = rng.gamma(1.5, 400, rows).astype('int64')  # skewed towards recent updates
+    dates = np.datetime64('2025-06-30', 'ns') - days.astype('timedelta64[D]')
+    dates[rng.random(rows) < 0.01] = np.datetime64('NaT')
+    cats = pd.Categorical.from_codes(rng.integers(0, categories, rows), [f"CAT_{i:02d}" for i in range(categories)])
+    return pd.DataFrame({"category": cats, "last_updated": dates})
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000_000)
+    ap.add_argument("--weeks", type=int, default=52)
+    ap.add_argument("--legacy-weeks", type=int, default=4, help="history points timed with the old function")
+    args = ap.parse_args()
+    df = synthetic(args.rows)
+    print(f"{len(df):,} rows")
+
+    t0 = time.perf_counter()
+    idx = GrowthIndex(df)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    matrix = idx.growth(WINDOWS)
+    history = idx.history(window_days=90, periods=args.weeks)
+    t_query = time.perf_counter() - t0
+    print(f"GrowthIndex: build {t_build:.2f}s, {len(WINDOWS)} windows + {args.weeks}-week history {t_query * 1e3:.1f} ms"
+          f" (as_of {idx.as_of.date()})")
+
+    t0 = time.perf_counter()
+    for w in WINDOWS:
+        legacy = legacy_detect_growth(df, idx.as_of, window_days=w)
+        assert (legacy['recent_ratio'].reindex(matrix.index).fillna(0) == matrix[f'{w}d']).all(), w
+    t_windows = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for as_of in history.index[-args.legacy_weeks:]:
+        legacy = legacy_detect_growth(df, as_of, window_days=90)
+        assert (legacy['recent_ratio'].reindex(history.columns).fillna(0) == history.loc[as_of]).all(), as_of
+    t_week = (time.perf_counter() - t0) / args.legacy_weeks
+    print("✅ matrix and history match the direct computation")
+    print(f"legacy: {len(WINDOWS)} windows {t_windows:.2f}s, {args.weeks}-week history ~{t_week * args.weeks:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
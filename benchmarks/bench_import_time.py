@@ -0,0 +1,112 @@
+# benchmarks/bench_import_time.py
+"""
+Import-time guard for the src/ modules. Each module is imported in a fresh interpreter
+under `python -X importtime`, from an empty working directory and without API keys,
+and must:
+
+  * import at all (no credential checks or file reads at import time)
+  * leave the working directory empty (no directories or outputs created)
+  * not pull in the heavy dependencies listed for it in LAZY (they load on first use)
+
+Cumulative import time is reported per module, best of --repeat, next to `import pandas`
+as the floor most modules share. --budget-ms fails any module slower than that.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --budget-ms 1500 analytics insights_generator
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+# module -> dependencies it must not import at load time
+LAZY = {
+    "analytics": ["scipy.stats", "joblib"],
+    "stats_engine": ["scipy.stats"],
+    "confidence": ["scipy"],
+    "growth": ["scipy"],
+    "entity_resolution": ["scipy"],
+    "merge_normalize": ["scipy"],
+    "kaggle_ingest": ["scipy"],
+    "prepare_clean_dataset": ["scipy"],
+    "storage": ["scipy"],
+    "llm_client": ["openai"],
+    "insights_generator": ["openai", "scipy.stats", "joblib"],
+    "report_generator": ["weasyprint", "markdown", "jinja2"],
+    "appstore_fetch": [],
+    "json_to_csv": [],
+    "dashboard_data": ["scipy", "streamlit", "duckdb"],
+    "lake": ["duckdb", "scipy.stats"],
+    "d2c_analytics": ["openpyxl", "scipy"],
+    "search": ["scipy", "pyarrow.parquet"],
+    "sketches": ["scipy.stats", "joblib"],
+    "snapshots": ["scipy", "pyarrow.parquet"],
+    "instrument": ["pandas"],
+    "pipeline": ["pandas"],
+    "response_cache": ["pandas"],
+}
+SECRETS = ("OPENAI_API_KEY", "RAPIDAPI_KEY")
+
+
+def import_once(module: str, cwd: str) -> tuple[int, float | None, set, str]:
+    """(returncode, cumulative ms of `module`, every module imported, stderr tail)."""
+    env = {k: v for k, v in os.environ.items() if k not in SECRETS}
+    env["PYTHONPATH"] = str(SRC)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    total, imported = None, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue
+        imported.add(name)
+        if name == module:
+            total = int(cumulative) / 1000
+    return proc.returncode, total, imported, "\n".join(proc.stderr.splitlines()[-3:])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("modules", nargs="*", default=list(LAZY))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget-ms", type=float, default=None, help="fail modules slower than this")
+    args = ap.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as cwd:
+        floor = min(import_once("pandas", cwd)[1] for _ in range(args.repeat))
+        print(f"{'module':<24} {'import_ms':>10}  (import pandas: {floor:.0f} ms)")
+        for module in args.modules:
+            runs = [import_once(module, cwd) for _ in range(args.repeat)]
+            code, _, imported, tail = runs[-1]
+            problems = []
+            if code != 0:
+                problems.append(f"import failed:\n{tail}")
+            leaked = [d for d in LAZY.get(module, []) if any(m == d or m.startswith(d + ".") for m in imported)]
+            if leaked:
+                problems.append(f"imports {', '.join(leaked)} at load time")
+            created = sorted(p.name for p in Path(cwd).iterdir())
+            if created:
+                problems.append(f"created {', '.join(created)} in the working directory")
+                for p in Path(cwd).iterdir():
+                    subprocess.run(["rm", "-rf", str(p)], check=True)
+            ms = min((r[1] for r in runs if r[1] is not None), default=float("nan"))
+            if args.budget_ms is not None and ms > args.budget_ms:
+                problems.append(f"{ms:.0f} ms over the {args.budget_ms:.0f} ms budget")
+            print(f"{module:<24} {ms:>10.0f}  {'✅' if not problems else '❌ ' + '; '.join(problems)}")
+            failures += problems
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_instrument.py
+"""
+Per-call overhead of instrument.timed / span / count, disabled and enabled, against
+an undecorated function.
+
+    python benchmarks/bench_instrument.py --calls 1000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import instrument  # noqa: E402
+
+
+def plain(x):
+    return x
+
+
+timed = instrument.timed(rows=False)(plain)
+
+
+def per_call(fn, calls):
+    t0 = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    instrument.disable()
+    base = per_call(plain, args.calls)
+    print(f"undecorated          : {base:7.1f} ns/call")
+    print(f"timed, disabled      : {per_call(timed, args.calls) - base:7.1f} ns/call overhead")
+    print(f"count(), disabled    : {per_call(lambda i: instrument.count(rows=i), args.calls) - base:7.1f} ns/call overhead")
+    with tempfile.TemporaryDirectory() as tmp:
+        instrument.enable(out=Path(tmp) / "events.jsonl")
+        n = max(1, args.calls // 100)
+        print(f"timed, enabled       : {per_call(timed, n) / 1000:7.1f} µs/call (one JSON line each)")
+        instrument.disable()
+
+
+if __name__ == "__main__":
+    main()
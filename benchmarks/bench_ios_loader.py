@@ -0,0 +1,102 @@
+# benchmarks/bench_ios_loader.py
+"""
+Peak RSS and wall time of merge_normalize.load_appstore_cache before (raw response and
+description held in the frame) and after (canonical fields only, payloads in the
+compressed side store), over a synthetic cache of --apps App Store lookups. Each
+loader runs in a fresh subprocess so ru_maxrss is per run.
+
+    python benchmarks/bench_ios_loader.py --apps 100000
+"""
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from response_cache import open_cache  # noqa: E402
+
+RUNNER = """
+import gc, resource, sys
+sys.path.insert(0, {src!r})
+import pandas as pd
+import merge_normalize
+from response_cache import open_cache
+
+def legacy(cache_dir):
+    # the loader as it was: whole response in `raw`, description inline
+    rows = []
+    cache = open_cache(cache_dir)
+    for _, j in cache.iter_range(include_expired=True):
+        info = j.get('results', [])[0]
+        rows.append({{'platform': 'ios', 'app_id': info.get('trackId'), 'app_name': info.get('trackName'),
+                     'publisher': info.get('sellerName'), 'category': info.get('primaryGenreName'),
+                     'rating': info.get('averageUserRating'), 'review_count': info.get('userRatingCount'),
+                     'price_usd': info.get('price'), 'last_updated': info.get('currentVersionReleaseDate'),
+                     'description': info.get('description'), 'raw': info}})
+    cache.close()
+    return pd.DataFrame(rows)
+
+if {mode!r} == 'before':
+    df = legacy({cache_dir!r})
+else:
+    df = merge_normalize.load_appstore_cache({cache_dir!r}, payload_path={payload!r})
+    assert merge_normalize.load_descriptions(df.tail(3), {payload!r}).notna().all()
+frame_mb = df.memory_usage(deep=True).sum() / 1e6
+print(len(df), frame_mb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+WORDS = "photo video fast smart easy daily pro music chat cloud secure editor game puzzle".split()
+
+
+def lookup(i: int, rng: random.Random) -> dict:
+    # shape of an iTunes lookup response, description and screenshot lists included
+    return {"resultCount": 1, "results": [{
+        "trackId": 100000000 + i,
+        "trackName": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+        "sellerName": f"Studio {i // 5} Inc.",
+        "primaryGenreName": rng.choice(["Games", "Utilities", "Finance", "Education"]),
+        "averageUserRating": round(rng.uniform(1, 5), 2),
+        "userRatingCount": rng.randint(0, 10**6),
+        "price": rng.choice([0.0, 0.99, 2.99]),
+        "currentVersionReleaseDate": "2024-05-01T07:00:00Z",
+        "description": " ".join(rng.choices(WORDS, k=400)),
+        "screenshotUrls": [f"https://is1-ssl.mzstatic.com/image/{i}/{k}.png" for k in range(8)],
+        "supportedDevices": ["iPhone5s-iPhone5s", "iPadAir-iPadAir", "iPhone15-iPhone15"] * 10,
+        "languageCodesISO2A": ["EN", "DE", "FR", "ES", "JA"],
+    }]}
+
+
+def build_cache(cache_dir: Path, n: int):
+    rng = random.Random(0)
+    with open_cache(cache_dir) as cache:
+        for start in range(0, n, 5000):
+            cache.put_many((str(100000000 + i), lookup(i, rng)) for i in range(start, min(n, start + 5000)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apps", type=int, default=100_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        build_cache(Path(tmp), args.apps)
+        print(f"built cache of {args.apps} apps in {time.perf_counter() - t0:.1f}s")
+        print(f"{'mode':<8} {'rows':>8} {'wall_s':>7} {'frame_mb':>9} {'peak_rss_mb':>12}")
+        for mode in ("before", "after"):
+            code = RUNNER.format(src=str(ROOT / "src"), cache_dir=tmp, payload=str(Path(tmp) / "payloads.bin"),
+                                 mode=mode)
+            t0 = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            wall = time.perf_counter() - t0
+            rows, frame_mb, rss_kb = out.stdout.split()
+            print(f"{mode:<8} {rows:>8} {wall:>7.1f} {float(frame_mb):>9.1f} {int(rss_kb) / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_kaggle_parsers.py
+"""
+Regression check + microbenchmark for the kaggle_ingest parsers: Series.apply(parse_*)
+vs the vectorized parse_*_vec. Fails loudly if the two paths ever disagree.
+
+    python benchmarks/bench_kaggle_parsers.py --repeat 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from kaggle_ingest import (parse_installs, parse_installs_vec, parse_price, parse_price_vec,  # noqa: E402
+                           parse_size, parse_size_vec)
+
+PAIRS = {
+    "Installs": (parse_installs, parse_installs_vec),
+    "Price": (parse_price, parse_price_vec),
+    "Size": (parse_size, parse_size_vec),
+}
+
+# strings that exercise the fallbacks and odd corners of the scalar parsers
+EDGE_CASES = pd.Series(["Free", "0", "", " 12M ", "1.5k", "2G", "Varies with device", "varies",
+                        "$4.99", "₹1,200", "1,000,000+", "1.2.3", "abc", "1_0M", "٣", None, 3.0])
+
+
+def check(raw: pd.DataFrame):
+    for col, (scalar, vec) in PAIRS.items():
+        for s in (raw[col], EDGE_CASES):
+            pd.testing.assert_series_equal(s.apply(scalar), vec(s), check_names=False)
+    print("✅ vectorized parsers match Series.apply on", len(raw), "rows + edge cases")
+
+
+def bench(raw: pd.DataFrame, repeat: int):
+    big = pd.concat([raw] * repeat, ignore_index=True)
+    n = len(big)
+    print(f"{'column':<10} {'rows':>10} {'apply rows/s':>14} {'vec rows/s':>14} {'speedup':>8}")
+    for col, (scalar, vec) in PAIRS.items():
+        s = big[col]
+        t0 = time.perf_counter(); s.apply(scalar); t_apply = time.perf_counter() - t0
+        t0 = time.perf_counter(); vec(s); t_vec = time.perf_counter() - t0
+        print(f"{col:<10} {n:>10} {n / t_apply:>14,.0f} {n / t_vec:>14,.0f} {t_apply / t_vec:>7.1f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", default=str(ROOT / "data/raw/googleplaystore.csv"))
+    ap.add_argument("--repeat", type=int, default=20, help="tile the CSV this many times for timing")
+    args = ap.parse_args()
+    raw = pd.read_csv(args.csv)
+    check(raw)
+    bench(raw, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_lake.py
+"""
+pandas (read_table + analytics) vs the DuckDB lake (lake.py) on --rows synthetic
+combined rows: results are checked equal for category_summary and detect_growth,
+unfiltered and with platform / category filters, and for the dashboard's top-apps
+index. Each backend then runs in a fresh subprocess so its peak RSS is its own.
+
+    python benchmarks/bench_lake.py --rows 5000000
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from synthetic import play_store_frame  # noqa: E402
+
+import analytics  # noqa: E402
+import dashboard_data as dd  # noqa: E402
+import lake  # noqa: E402
+from kaggle_ingest import standardize  # noqa: E402
+from storage import TableWriter, read_table  # noqa: E402
+
+AS_OF = pd.Timestamp("2018-08-08")
+COLUMNS = ["platform", "app_name", "category", "rating", "review_count", "price_usd", "last_updated"]
+
+RUNNER = """
+import re, sys, time
+sys.path.insert(0, {src!r})
+import pandas as pd
+t0 = time.perf_counter()
+if {backend!r} == 'pandas':
+    import analytics
+    from storage import read_table
+    df = read_table({artifact!r}, columns={columns!r})
+    analytics.category_summary(df)
+    analytics.detect_growth(df, as_of=pd.Timestamp({as_of!r}))
+else:
+    import lake
+    con = lake.connect()
+    lake.category_summary({root!r}, con=con)
+    lake.detect_growth({root!r}, as_of=pd.Timestamp({as_of!r}), con=con)
+# VmHWM rather than ru_maxrss, which a child inherits from the (large) parent across fork
+hwm = re.search(r'VmHWM:\s+(\d+)', open('/proc/self/status').read()).group(1)
+print(time.perf_counter() - t0, hwm)
+"""
+
+
+def synthetic(rows, chunk=1_000_000, seed=0):
+    # standardized Play Store rows, ~30% relabelled as ios so there are two platforms
+    for i, start in enumerate(range(0, rows, chunk)):
+        df = standardize(play_store_frame(min(chunk, rows - start), seed=seed + i, start=start))
+        df["platform"] = np.where(np.random.default_rng(seed + i).random(len(df)) < 0.3, "ios", "android")
+        yield df[COLUMNS]
+
+
+def same(a, b, what):
+    # categories come back as strings from DuckDB and as categoricals from Parquet
+    pd.testing.assert_frame_equal(a.astype({"category": str}), b.astype({"category": str}))
+    print(f"✅ {what}: {len(a)} categories identical")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact, root = Path(tmp) / "combined.parquet", Path(tmp) / "lake"
+        t0 = time.perf_counter()
+        with TableWriter(artifact) as w:
+            for df in synthetic(args.rows):
+                w.write(df)
+        print(f"wrote {w.rows:,} rows in {time.perf_counter() - t0:.1f}s")
+        meta = lake.build(artifact, root)
+        print(f"lake built in {meta['write_s']}s")
+
+        df = read_table(artifact, columns=COLUMNS)
+        cats = df["category"].value_counts().index[[0, 5, -1]].tolist()
+        for filters in (None, {"platform": "ios"}, {"category": cats}, {"platform": "android", "category": cats[:1]}):
+            sub = df
+            for col, v in (filters or {}).items():
+                sub = sub[sub[col].isin(v if isinstance(v, list) else [v])]
+            same(analytics.category_summary(sub), lake.category_summary(root, filters), f"category_summary {filters}")
+            same(analytics.detect_growth(sub, as_of=AS_OF), lake.detect_growth(root, as_of=AS_OF, filters=filters),
+                 f"detect_growth {filters}")
+
+        # ties in review_count may come back in either order, so compare the counts
+        a, b = dd.build_top_index(df), dd.build_top_index(lake.top_candidates(root), dd.TOP_N)
+        assert a.keys() == b.keys()
+        assert all(a[c]["review_count"].tolist() == b[c]["review_count"].tolist() for c in a)
+        print(f"✅ top apps: {len(a)} categories identical")
+        del df, sub
+
+        print(f"{'backend':<8} {'wall_s':>7} {'peak_rss_mb':>12}")
+        for backend in ("pandas", "duckdb"):
+            code = RUNNER.format(src=str(ROOT / "src"), backend=backend, artifact=str(artifact), root=str(root),
+                                 columns=COLUMNS, as_of=str(AS_OF))
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            wall, rss_kb = out.stdout.splitlines()[-1].split()
+            print(f"{backend:<8} {float(wall):>7.2f} {int(rss_kb) / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
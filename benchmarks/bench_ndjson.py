@@ -0,0 +1,134 @@
+# benchmarks/bench_ndjson.py
+"""
+The streaming App Store path (appstore_fetch.fetch_to_ndjson + json_to_csv.convert)
+against the legacy single JSON document:
+
+  * resume: fetching --fetch-apps from a local mock API is interrupted part-way and a
+    torn line is left at the end of the file; the resumed fetch must end with every
+    app exactly once
+  * conversion: --apps synthetic responses (~2 KB each) as all_apps.json and as NDJSON;
+    json.load + flatten + to_csv (as json_to_csv was) vs the streaming converter,
+    each in a fresh subprocess for its own peak RSS. The CSVs must be identical.
+
+    python benchmarks/bench_ndjson.py --apps 200000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+os.environ.setdefault("RAPIDAPI_KEY", "benchmark")
+
+from bench_appstore_fetch import make_handler  # noqa: E402
+from synthetic import IOS_GENRES, WORDS  # noqa: E402
+
+import appstore_fetch  # noqa: E402
+
+RUNNER = """
+import json, re, sys, time
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+import json_to_csv
+if {mode!r} == 'legacy':
+    with open({infile!r}, encoding='utf-8') as f:
+        json_to_csv.flatten(json.load(f)).to_csv({outfile!r}, index=False)
+else:
+    json_to_csv.convert({infile!r}, {outfile!r})
+hwm = re.search(r'VmHWM:\\s+(\\d+)', open('/proc/self/status').read()).group(1)
+print(time.perf_counter() - t0, hwm)
+"""
+
+
+def response(i: int, rng: random.Random) -> dict:
+    # the RapidAPI scraper's shape, as in outputs/all_apps.json
+    return {"status": "ok", "error": None, "data": {
+        "id": 100000000 + i,
+        "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+        "primaryGenre": rng.choice(IOS_GENRES),
+        "score": round(rng.uniform(1, 5), 2),
+        "reviews": int(rng.lognormvariate(6, 3)),
+        "price": rng.choice([0.0, 0.0, 0.99, 2.99]),
+        "updated": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T07:00:00Z",
+        "description": " ".join(rng.choices(WORDS, k=300)),
+    }}
+
+
+def check_resume(n_apps, tmp):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(0.002, 0, 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    appstore_fetch.API_URL = f"http://127.0.0.1:{server.server_port}/v1/appstore"
+    appstore_fetch._session = None
+    appstore_fetch._cache = None
+    appstore_fetch.CACHE_DIR = Path(tmp) / "cache"
+    limiter = appstore_fetch.TokenBucket(0)
+    ids = [str(100000 + i) for i in range(n_apps)]
+    out = Path(tmp) / "apps.ndjson"
+
+    def interrupted():
+        for i, app_id in enumerate(ids):
+            if i == n_apps // 2:
+                raise KeyboardInterrupt
+            yield app_id
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                appstore_fetch.fetch_to_ndjson(interrupted(), out, limiter=limiter)
+            except KeyboardInterrupt:
+                pass
+            first = len(appstore_fetch.written_ids(out))
+            with open(out, "a", encoding="utf-8") as f:
+                f.write('{"app_id":"' + ids[-1] + '","response":{"sta')  # killed mid-write
+            appstore_fetch.fetch_to_ndjson(ids, out, limiter=limiter)
+    finally:
+        server.shutdown()
+    got = [json.loads(line)["app_id"] for line in open(out, encoding="utf-8")]
+    assert sorted(got) == sorted(ids), "resumed fetch lost or duplicated apps"
+    print(f"✅ resume: {first:,} apps written before the interruption, {len(got):,} after resuming, no duplicates")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apps", type=int, default=200_000)
+    ap.add_argument("--fetch-apps", type=int, default=500)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_resume(args.fetch_apps, tmp)
+
+        legacy, ndjson = Path(tmp) / "all_apps.json", Path(tmp) / "all_apps.ndjson"
+        rng = random.Random(0)
+        with open(ndjson, "w", encoding="utf-8") as f:
+            for i in range(args.apps):
+                f.write(json.dumps({"app_id": str(100000000 + i), "response": response(i, rng)},
+                                   separators=(",", ":")) + "\n")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({r["app_id"]: r["response"] for r in map(json.loads, open(ndjson, encoding="utf-8"))},
+                      f, indent=2)
+        print(f"{args.apps:,} apps: all_apps.json {legacy.stat().st_size / 2**20:.0f} MB, "
+              f"NDJSON {ndjson.stat().st_size / 2**20:.0f} MB")
+
+        print(f"{'path':<8} {'wall_s':>7} {'peak_rss_mb':>12}")
+        outputs = {}
+        for mode, infile in (("legacy", legacy), ("ndjson", ndjson)):
+            outputs[mode] = Path(tmp) / f"{mode}.csv"
+            code = RUNNER.format(src=str(ROOT / "src"), mode=mode, infile=str(infile), outfile=str(outputs[mode]))
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            wall, rss_kb = out.stdout.splitlines()[-1].split()
+            print(f"{mode:<8} {float(wall):>7.2f} {int(rss_kb) / 1024:>12.1f}")
+        assert outputs["legacy"].read_bytes() == outputs["ndjson"].read_bytes()
+        print("✅ identical CSV")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_reports.py
+"""
+Per-report cost of the old render path (new jinja2.Template per call) vs the cached
+Environment, and, when weasyprint's native libraries are available, serial vs
+process-pool PDF generation.
+
+    python benchmarks/bench_reports.py --reports 300 --workers 8
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from jinja2 import Template
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import report_generator as rg  # noqa: E402
+
+
+def synthetic_context(i: int) -> dict:
+    insights = [{
+        "category": f"SEGMENT_{i}_{k}", "confidence": round(0.3 + k / 20, 3),
+        "metrics": {"apps": 100 + k, "avg_rating": 4.1, "median_price": 0.0},
+        "llm": {"recommendations": [f"recommendation {j} for client {i}" for j in range(3)]},
+    } for k in range(6)]
+    return {"generated_at": "2025-01-01 00:00:00", "insights": insights}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=rg.PDF_WORKERS)
+    args = ap.parse_args()
+    contexts = [synthetic_context(i) for i in range(args.reports)]
+
+    t0 = time.perf_counter()
+    old = [Template(rg.TEMPLATE_MD).render(**c) for c in contexts]
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = [rg.render_markdown(c) for c in contexts]
+    t_new = time.perf_counter() - t0
+    assert old == new, "cached Environment renders differently from Template()"
+    print(f"✅ markdown identical for {args.reports} reports")
+    print(f"template per call : {t_old / args.reports * 1e3:.3f} ms/report")
+    print(f"cached environment: {t_new / args.reports * 1e3:.3f} ms/report ({t_old / t_new:.1f}x)")
+
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError) as e:
+        print(f"PDF step skipped, weasyprint unavailable: {type(e).__name__}")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = [rg.ReportJob(f"r{i}", c, f"{tmp}/r{i}.md", f"{tmp}/r{i}.pdf") for i, c in enumerate(contexts)]
+        for workers in (1, args.workers):
+            t0 = time.perf_counter()
+            results = rg.render_batch(jobs, max_workers=workers)
+            wall = time.perf_counter() - t0
+            errors = [r for r in results if r.error]
+            pdf = sorted(r.pdf_s for r in results)
+            print(json.dumps({"workers": workers, "reports": len(results), "errors": len(errors),
+                              "wall_s": round(wall, 2), "reports_per_s": round(len(results) / wall, 1),
+                              "pdf_p50_s": round(pdf[len(pdf) // 2], 3)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/bench_search.py
+"""
+The search index (src/search.py) on --rows synthetic apps (names as in the Play Store
+generator, descriptions of --words Zipf-distributed words):
+
+  * correctness: on --check-rows apps, every query's top-k scores equal a brute-force
+    BM25 over Counter()s of each app's tokens, before and after an upsert/remove, and
+    after compact()
+  * build time, size on disk, the cost of opening the index (mmap: no data is read)
+  * query latency p50/p95 over --queries random 1-3 word queries, unfiltered and with
+    platform / category filters, then again after upserting and removing 1,000 apps
+    and after compact()
+
+    python benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import math
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from synthetic import CATEGORIES, WORDS, play_store_frame, zipf_weights  # noqa: E402
+
+import search  # noqa: E402
+from storage import TableWriter  # noqa: E402
+
+VOCAB = np.array(WORDS + [f"{a}{b}" for a in ("al", "be", "co", "du", "ex", "fo", "gi", "ha", "in", "jo")
+                          for b in map(str, range(2000))], dtype=object)
+
+
+def apps(rows, words=30, seed=0, chunk=250_000):
+    for i, start in enumerate(range(0, rows, chunk)):
+        n = min(chunk, rows - start)
+        rng = np.random.default_rng(seed + i)
+        raw = play_store_frame(n, seed=seed + i, start=start, dup_rate=0)
+        text = VOCAB[rng.choice(len(VOCAB), (n, words), p=zipf_weights(len(VOCAB), 1.0))]
+        yield pd.DataFrame({
+            "platform": np.where(rng.random(n) < 0.3, "ios", "android"),
+            "app_id": np.arange(start, start + n).astype(str),
+            "app_name": raw["App"].to_numpy(object),
+            "category": raw["Category"].str.lower().to_numpy(object),
+            "description": [" ".join(r) for r in text],
+        })
+
+
+def queries(n, seed=1):
+    rng = np.random.default_rng(seed)
+    p = zipf_weights(len(VOCAB), 1.0)
+    return [" ".join(VOCAB[rng.choice(len(VOCAB), rng.integers(1, 4), p=p)]) for _ in range(n)]
+
+
+def brute_force(df, query, k, filters=None):
+    # BM25 as documented in search.py, one Counter per app
+    docs = [Counter({t: search.NAME_WEIGHT * c for t, c in Counter(search.tokenize(n)).items()})
+            + Counter(search.tokenize(d)) for n, d in zip(df["app_name"], df["description"])]
+    n, avg = len(docs), sum(sum(d.values()) for d in docs) / len(docs)
+    terms = Counter(search.tokenize(query))
+    idf = {t: math.log1p((n - f + 0.5) / (f + 0.5)) for t in terms for f in [sum(t in d for d in docs)]}
+    mask = np.ones(n, bool)
+    for col, v in (filters or {}).items():
+        mask &= df[col].isin(v if isinstance(v, list) else [v]).to_numpy()
+    scores = []
+    for d, ok in zip(docs, mask):
+        length = sum(d.values())
+        s = sum(q * idf[t] * d[t] * (search.K1 + 1) / (d[t] + search.K1 * (1 - search.B + search.B * length / avg))
+                for t, q in terms.items() if t in d)
+        if ok and s > 0:
+            scores.append(s)
+    return sorted(scores, reverse=True)[:k]
+
+
+def check(root, df, qs, k, what):
+    index = search.open_index(root)
+    for q, filters in zip(qs, [None, {"platform": "ios"}, {"category": df["category"].iloc[0]}] * len(qs)):
+        got = index.search(q, k, filters)["score"].to_numpy()
+        want = brute_force(df, q, k, filters)
+        assert np.allclose(got, want, rtol=1e-5), (q, filters, got, want)
+    print(f"✅ {what}: top-{k} scores match brute-force BM25 for {len(qs)} queries")
+
+
+def latency(root, qs, k, filters=None):
+    index = search.open_index(root)
+    ms = []
+    for q in qs:
+        t0 = time.perf_counter()
+        index.search(q, k, filters)
+        ms.append((time.perf_counter() - t0) * 1000)
+    return np.percentile(ms, 50), np.percentile(ms, 95)
+
+
+def correctness(rows, k):
+    df = next(apps(rows, seed=100))
+    qs = queries(12, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "search"
+        for part in np.array_split(np.arange(len(df)), 3):  # three segments
+            search.add(df.iloc[part], root)
+        check(root, df, qs, k, "3 segments")
+        changed = df.sample(200, random_state=0).assign(description=lambda d: d["description"] + " photo editor")
+        gone = df.drop(changed.index).sample(100, random_state=1)
+        search.add(changed, root)
+        assert search.remove(search.doc_keys(gone), root) == len(gone)
+        df = pd.concat([df.drop(changed.index).drop(gone.index), changed], ignore_index=True)
+        search.compact(root)
+        check(root, df, qs + ["photo editor"], k, "after upsert, remove and compact")
+
+        # a Play Store name (no app_id) listed in two categories is two documents
+        twin = df.iloc[:1].assign(platform="android", app_id="")
+        pair = pd.concat([twin, twin.assign(category="zz other")], ignore_index=True)
+        search.add(pair, Path(tmp) / "twins")
+        assert sum(s["live"] for s in search.metadata(Path(tmp) / "twins")["segments"]) == 2
+        assert search.remove(search.doc_keys(pair.iloc[1:]), Path(tmp) / "twins") == 1
+        print("✅ one app name in two categories: both rows indexed, remove() drops only the one asked for")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--words", type=int, default=30, help="description length")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--check-rows", type=int, default=3000)
+    ap.add_argument("-k", type=int, default=10)
+    args = ap.parse_args()
+
+    correctness(args.check_rows, args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact, root = Path(tmp) / "apps.parquet", Path(tmp) / "search"
+        with TableWriter(artifact) as w:
+            for df in apps(args.rows, args.words):
+                w.write(df)
+        meta = search.build(artifact, root)
+        size = sum(p.stat().st_size for p in root.rglob("*.npy")) / 2**20
+        t0 = time.perf_counter()
+        search.open_index(root)
+        print(f"built {w.rows:,} apps in {meta['build_s']:.1f}s ({len(meta['segments'])} segments, {size:.0f} MB), "
+              f"open {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        qs = queries(args.queries)
+        cats = [c.lower() for c in CATEGORIES[:3]]
+        print(f"{'queries':<34} {'p50_ms':>7} {'p95_ms':>7}")
+
+        def report(what, filters=None):
+            p50, p95 = latency(root, qs, args.k, filters)
+            print(f"{what:<34} {p50:>7.2f} {p95:>7.2f}")
+
+        report("unfiltered")
+        report("platform=ios", {"platform": "ios"})
+        report(f"category in {len(cats)}", {"category": cats})
+
+        last = df.tail(1000)
+        t0 = time.perf_counter()
+        search.add(last.assign(description=last["description"] + " updated"), root)
+        upsert = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        search.remove(search.doc_keys(df.head(1000)), root)
+        removed = time.perf_counter() - t0
+        print(f"upsert 1,000 apps {upsert * 1000:.0f} ms, remove 1,000 apps {removed * 1000:.0f} ms")
+        report("after upsert/remove")
+        t0 = time.perf_counter()
+        search.compact(root)
+        print(f"compact {time.perf_counter() - t0:.1f}s")
+        report("after compact")
+
+
+if __name__ == "__main__":
+    main()
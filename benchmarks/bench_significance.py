@@ -0,0 +1,82 @@
+# benchmarks/bench_significance.py
+"""
+Multi-category rating comparison on --categories synthetic categories:
+  * the old way: significance_of_rating_diff per pair (a filter + groupby each)
+  * compare_categories(mode='all'/'rest'), Welch from moments + Benjamini-Hochberg
+  * permutation / bootstrap p-values for one-vs-reference pairs, n_jobs=1 vs all cores
+Welch results are checked against scipy.stats.ttest_ind on the raw values.
+
+    python benchmarks/bench_significance.py --categories 500 --resamples 2000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from analytics import compare_categories, significance_of_rating_diff  # noqa: E402
+
+
+def synthetic(n_categories: int, mean_size: int = 200, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(mean_size // 4, mean_size * 2, n_categories)
+    cats = np.repeat([f"CAT_{i:04d}" for i in range(n_categories)], sizes)
+    centre = np.repeat(rng.normal(4.1, 0.15, n_categories), sizes)
+    # skewed, capped, one-decimal ratings like the store data
+    ratings = np.clip(np.round(centre + 0.4 - rng.gamma(2.0, 0.2, len(cats)), 1), 1.0, 5.0)
+    return pd.DataFrame({"category": pd.Categorical(cats), "rating": ratings})
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--categories", type=int, default=500)
+    ap.add_argument("--resamples", type=int, default=2000)
+    ap.add_argument("--loop-pairs", type=int, default=300, help="pairs timed with the per-pair function")
+    args = ap.parse_args()
+    df = synthetic(args.categories)
+    print(f"{len(df)} ratings in {args.categories} categories")
+
+    res, t_all = timed(lambda: compare_categories(df, mode="all"))
+    cats = list(df["category"].cat.categories)
+    sample = res.sample(args.loop_pairs, random_state=0)
+    _, t_loop = timed(lambda: [significance_of_rating_diff(df, a, b) for a, b in zip(sample.a, sample.b)])
+    for a, b, t, p in sample[["a", "b", "t", "p"]].head(50).itertuples(index=False):
+        ref = stats.ttest_ind(df.rating[df.category == a], df.rating[df.category == b], equal_var=False)
+        assert np.isclose(ref.statistic, t) and np.isclose(ref.pvalue, p), (a, b)
+    print("✅ Welch from moments matches scipy.stats.ttest_ind on raw ratings")
+    print(f"per-pair function : {t_loop / len(sample) * 1e3:8.3f} ms/pair (~{t_loop / len(sample) * len(res):.1f}s for all)")
+    print(f"all pairs         : {len(res):>8} tests in {t_all:.3f}s, {int(res.significant.sum())} significant after BH")
+    rest, t_rest = timed(lambda: compare_categories(df, mode="rest"))
+    print(f"one vs rest       : {len(rest):>8} tests in {t_rest:.3f}s, {int(rest.significant.sum())} significant after BH")
+
+    pairs = [(c, cats[0]) for c in cats[1:]]
+    for method in ("permutation", "bootstrap"):
+        runs = {}
+        for n_jobs in (1, os.cpu_count() or 1):
+            if n_jobs in runs:
+                continue
+            runs[n_jobs], t = timed(lambda: compare_categories(df, pairs=pairs, method=method,
+                                                               n_resamples=args.resamples, n_jobs=n_jobs))
+            print(f"{method:<12} n_jobs={n_jobs:<3}: {len(pairs)} tests x {args.resamples} resamples in {t:.2f}s")
+        first, *others = runs.values()
+        for other in others:
+            pd.testing.assert_series_equal(first.p, other.p)
+        agree = (first.significant == compare_categories(df, pairs=pairs).significant).mean()
+        print(f"{method:<12} agrees with Welch on {agree:.1%} of significance calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_sketches.py
+"""
+CategorySketch (src/sketches.py) vs analytics.category_summary on --rows synthetic
+combined rows split into --shards shards:
+
+  * one sketch per shard, each saved to .npz and loaded back, merged in a shuffled order
+  * the same shards sketched in --jobs processes (sketch_frames)
+  * an incremental refresh: the sketch of all but the last shard, update()d with it
+
+Exact columns (avg_rating, total_reviews) must match; apps and median_price are
+checked against the documented bounds (4 standard errors for the HyperLogLog, 2 * pi /
+delta of rank for the t-digest). Prices are lognormal (--prices store keeps the Play
+Store's mostly-free prices, where the median is almost always exact).
+
+    python benchmarks/bench_sketches.py --rows 5000000 --shards 16 --jobs 4
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bench_lake import synthetic  # noqa: E402
+
+import analytics  # noqa: E402
+from sketches import COMPRESSION, HLL_P, CategorySketch, sketch_frames  # noqa: E402
+
+
+def shards(args):
+    for i, df in enumerate(synthetic(args.rows, chunk=-(-args.rows // args.shards))):
+        if args.prices == "lognormal":
+            df = df.assign(price_usd=np.random.default_rng(i).lognormal(0, 1.5, len(df)).round(2))
+        yield df
+
+
+def timed(fn, *a):
+    t0 = time.perf_counter()
+    out = fn(*a)
+    return out, time.perf_counter() - t0
+
+
+def check(df, ref, sketch, what):
+    got = sketch.summary().set_index("category").sort_index()
+    assert got.index.tolist() == ref.index.tolist(), what
+    assert np.allclose(got["avg_rating"], ref["avg_rating"], equal_nan=True), what
+    assert (got["total_reviews"].to_numpy() == ref["total_reviews"].to_numpy()).all(), what
+    apps = (got["apps"] / ref["apps"] - 1).abs()
+    assert (apps <= 4 * 1.04 / np.sqrt(2 ** HLL_P)).all(), (what, apps.max())
+    # rank of the estimated median among the category's prices, as a fraction of n
+    prices = df.groupby(df["category"].astype(str), observed=True)["price_usd"]
+    rank = []
+    for cat, est in got["median_price"].items():
+        v = np.sort(prices.get_group(cat).dropna().to_numpy())
+        lo, hi = np.searchsorted(v, est, "left") / len(v), np.searchsorted(v, est, "right") / len(v)
+        rank.append(max(0.0, lo - 0.5, 0.5 - hi))
+    assert max(rank) <= 2 * np.pi / COMPRESSION, (what, max(rank))
+    print(f"✅ {what}: exact columns equal; apps error max {apps.max():.3%}, "
+          f"median rank error max {max(rank):.3%} (bound {2 * np.pi / COMPRESSION:.1%})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--shards", type=int, default=8)
+    ap.add_argument("--jobs", type=int, default=2)
+    ap.add_argument("--prices", choices=["lognormal", "store"], default="lognormal")
+    args = ap.parse_args()
+
+    parts = list(shards(args))
+    df = pd.concat(parts, ignore_index=True)
+    ref, full = timed(analytics.category_summary, df)
+    ref = ref.assign(category=ref["category"].astype(str)).set_index("category").sort_index()
+    print(f"category_summary over {len(df):,} rows: {full:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        paths = [CategorySketch.from_frame(p, "app_name").save(Path(tmp) / f"shard-{i}.npz")
+                 for i, p in enumerate(parts)]
+        build = time.perf_counter() - t0
+        size = sum(p.stat().st_size for p in paths) / len(paths) / 1024
+        random.Random(0).shuffle(paths)
+        merged, merge = timed(lambda: reduce(CategorySketch.merge, map(CategorySketch.load, paths)))
+        print(f"{len(parts)} shard sketches: built in {build:.2f}s ({size:.0f} KB each on disk), "
+              f"loaded + merged in {merge * 1000:.0f} ms, summary in "
+              f"{timed(merged.summary)[1] * 1000:.0f} ms")
+        check(df, ref, merged, "merged shards")
+
+    parallel, t = timed(sketch_frames, iter(parts), args.jobs, "app_name")
+    print(f"sketch_frames with {args.jobs} jobs: {t:.2f}s")
+    check(df, ref, parallel, f"{args.jobs} jobs")
+
+    base = sketch_frames(parts[:-1], 1, "app_name")
+    updated, t = timed(base.update, parts[-1])
+    print(f"update() with the last shard ({len(parts[-1]):,} rows): {t:.2f}s")
+    check(df, ref, updated, "incremental update")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/bench_snapshots.py
+"""
+The snapshot history store (src/snapshots.py) over --days daily snapshots of --apps
+synthetic apps. Each day --change of the apps gain reviews (a fifth of those also move
+their rating, a tenth ship an update), --new apps appear and --removed disappear.
+
+  * correctness: as_of() on the first, middle and last dates equals that day's full
+    catalogue, and history() of --sample apps agrees with their values on every day
+  * storage per day: the delta partition vs a full Parquet copy of the catalogue,
+    plus the index
+  * latency: append, as_of (all columns and two columns), history of one app and of
+    100 apps, review_growth over the whole range
+
+    python benchmarks/bench_snapshots.py --apps 1000000 --days 30
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from bench_lake import synthetic  # noqa: E402
+
+import snapshots  # noqa: E402
+from storage import write_table  # noqa: E402
+
+START = pd.Timestamp("2024-05-01")
+
+
+def catalogue(n):
+    df = pd.concat(synthetic(n), ignore_index=True)
+    return df.assign(app_id=np.arange(len(df)).astype(str))
+
+
+def next_day(df, day, args, rng):
+    n = len(df)
+    moved = np.flatnonzero(rng.random(n) < args.change)
+    df = df.copy()
+    df.loc[moved, "review_count"] += rng.poisson(20, len(moved)) + 1
+    rated = moved[rng.random(len(moved)) < 0.2]
+    df.loc[rated, "rating"] = (df.loc[rated, "rating"] + rng.normal(0, 0.05, len(rated))).clip(1, 5).round(2)
+    updated = moved[rng.random(len(moved)) < 0.1]
+    df.loc[updated, "last_updated"] = day
+    df = df.drop(rng.choice(n, int(n * args.removed), replace=False))
+    start = int(df["app_id"].astype(int).max()) + 1
+    new = catalogue(int(n * args.new)).assign(app_id=lambda d: (d["app_id"].astype(int) + start).astype(str))
+    return pd.concat([df, new], ignore_index=True)
+
+
+def canonical(df):
+    # what as_of() should return for a full catalogue, in key order
+    out = snapshots._frame(df).drop(columns="key_hash").sort_values("key")
+    return out.astype({"category": str, "platform": str}).reset_index(drop=True)
+
+
+def check_as_of(root, day, ref):
+    got = snapshots.as_of(day, root).drop(columns="snapshot_date").sort_values("key")
+    got = got.astype({"category": str, "platform": str}).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[ref.columns], ref, check_dtype=False)
+    print(f"✅ as_of({day:%Y-%m-%d}): {len(got):,} apps identical to that day's catalogue")
+
+
+def check_history(root, seen, days):
+    # seen: key -> {day: (review_count, rating)} for the days the app was in the catalogue
+    h = snapshots.history(list(seen), root)
+    for key, values in seen.items():
+        versions = h[h["key"] == key].set_index("snapshot_date")
+        for day in days:
+            upto = versions[versions.index <= day]
+            if day in values:
+                row = upto.iloc[-1]
+                got = np.array([row["review_count"], row["rating"]], float)
+                assert not row["deleted"] and np.array_equal(got, values[day], equal_nan=True), (key, day)
+            else:
+                assert upto.empty or upto.iloc[-1]["deleted"], (key, day)
+    print(f"✅ history(): {len(seen)} apps agree with their values on all {len(days)} days "
+          f"({len(h):,} versions)")
+
+
+def check_play_store_keys(tmp):
+    # no app_id: one name listed in two categories is two apps; nameless and repeated rows are counted
+    df = pd.DataFrame({"platform": "android", "app_name": ["Chess", "Chess", "Go", None],
+                       "category": ["game", "board", "game", "tools"], "review_count": [10, 20, 30, 40]})
+    root = Path(tmp) / "play"
+    entry = snapshots.append(df, START, root)
+    assert (entry["apps"], entry["skipped"]) == (3, 1), entry
+    got = snapshots.as_of(None, root).set_index("key")["review_count"].sort_index()
+    assert got.to_dict() == {"android:Chess|board": 20, "android:Chess|game": 10, "android:Go|game": 30}, got
+    twice = pd.concat([df, df.iloc[:1].assign(review_count=5)], ignore_index=True)
+    entry = snapshots.append(twice, START, root)
+    assert (entry["apps"], entry["collapsed"]) == (3, 1), entry
+    assert snapshots.as_of(None, root).set_index("key").loc["android:Chess|game", "review_count"] == 10
+    print("✅ Play Store keys: an app name in two categories is stored twice; a repeated key keeps its "
+          "most-reviewed row")
+
+
+def timed(fn, *a, repeat=5, **kw):
+    ms = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*a, **kw)
+        ms.append((time.perf_counter() - t0) * 1000)
+    return out, np.median(ms)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--apps", type=int, default=1_000_000)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--change", type=float, default=0.03, help="fraction of apps whose metrics move each day")
+    ap.add_argument("--new", type=float, default=0.002)
+    ap.add_argument("--removed", type=float, default=0.001)
+    ap.add_argument("--sample", type=int, default=200, help="apps checked through history()")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = catalogue(args.apps)
+    sample = rng.choice(df["app_id"].to_numpy(), args.sample, replace=False)
+    sample_keys = snapshots.doc_keys(df[df["app_id"].isin(sample)]).tolist()
+    checks = {0, args.days // 2, args.days - 1}
+    refs, seen = {}, {k: {} for k in sample_keys}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_play_store_keys(tmp)
+        root = Path(tmp) / "snapshots"
+        days = pd.date_range(START, periods=args.days)
+        entries, full = [], []
+        for i, day in enumerate(days):
+            if i:
+                df = next_day(df, day, args, rng)
+            entries.append(snapshots.append(df, day, root))
+            if i in checks:
+                refs[day] = canonical(df)
+                full.append(write_table(df, Path(tmp) / "full.parquet").stat().st_size)
+            rows = df.assign(key=snapshots.doc_keys(df)).set_index("key").reindex(sample_keys)
+            for key, rc, r in zip(rows.index, rows["review_count"], rows["rating"]):
+                if pd.notna(rc):
+                    seen[key][day] = np.array([rc, r], float)
+
+        for day, ref in refs.items():
+            check_as_of(root, day, ref)
+        check_history(root, seen, days)
+
+        meta = snapshots.metadata(root)
+        index = sum(p.stat().st_size for p in (root / meta["index"]).glob("*.npy"))
+        later = entries[1:]
+        delta_mb = np.mean([e["bytes"] for e in later]) / 2**20
+        print(f"\n{args.days} daily snapshots of ~{args.apps:,} apps, {args.change:.0%} changing a day")
+        print(f"{'':<34} {'MB':>9}")
+        print(f"{'full copy (one day)':<34} {np.mean(full) / 2**20:>9.1f}")
+        print(f"{'first snapshot':<34} {entries[0]['bytes'] / 2**20:>9.1f}")
+        print(f"{'delta per later day':<34} {delta_mb:>9.2f}")
+        print(f"{'index (' + format(meta['versions'], ',') + ' versions)':<34} {index / 2**20:>9.1f}")
+        total = sum(e["bytes"] for e in entries) + index
+        print(f"{'store total':<34} {total / 2**20:>9.1f}   ({total / (np.mean(full) * args.days):.1%} of "
+              f"{args.days} full copies)")
+        print(f"rows per later day {np.mean([e['rows'] for e in later]):,.0f}, "
+              f"append {np.median([e['append_s'] for e in later]):.2f}s (median)")
+
+        print(f"\n{'query':<34} {'ms':>9}")
+        for what, fn in [
+            ("as_of, latest", lambda: snapshots.as_of(None, root)),
+            ("as_of, middle date", lambda: snapshots.as_of(days[args.days // 2], root)),
+            ("as_of, middle, 2 columns", lambda: snapshots.as_of(days[args.days // 2], root,
+                                                                 ["category", "review_count"])),
+            ("history, 1 app", lambda: snapshots.history(sample_keys[0], root)),
+            ("history, 100 apps", lambda: snapshots.history(sample_keys[:100], root)),
+            ("review_growth, first..last", lambda: snapshots.review_growth(days[0], days[-1], root)),
+        ]:
+            print(f"{what:<34} {timed(fn, repeat=3)[1]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_storage.py
+"""
+Load time and file size of the pipeline artifacts as CSV vs Parquet vs Feather,
+for full loads and for a projected read of the columns the dashboard actually uses.
+
+    python benchmarks/bench_storage.py --repeat 20
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from storage import read_table, write_table  # noqa: E402
+
+ARTIFACTS = ["clean_google_play", "clean_combined_apps", "clean_dataset"]
+PROJECTION = ["app_name", "category", "rating", "review_count"]
+
+
+def timed(fn, n=3):
+    best = float("inf")
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=10, help="tile each CSV this many times")
+    args = ap.parse_args()
+
+    print(f"{'artifact':<22} {'format':<8} {'rows':>9} {'size_mb':>8} {'load_s':>8} {'proj_load_s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ARTIFACTS:
+            src = ROOT / "outputs" / f"{name}.csv"
+            if not src.exists():
+                continue
+            df = pd.concat([read_table(src)] * args.repeat, ignore_index=True)
+            cols = [c for c in PROJECTION if c in df.columns]
+            for fmt in ("csv", "parquet", "feather"):
+                path = Path(tmp) / f"{name}.{fmt}"
+                write_table(df, path, export_csv=False)
+                load = timed(lambda: read_table(path))
+                proj = timed(lambda: read_table(path, columns=cols))
+                print(f"{name:<22} {fmt:<8} {len(df):>9} {path.stat().st_size / 1e6:>8.2f} {load:>8.3f} {proj:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
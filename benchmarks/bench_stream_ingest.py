@@ -0,0 +1,71 @@
+# benchmarks/bench_stream_ingest.py
+"""
+Peak RSS and wall time of kaggle_ingest.main in-memory vs streamed (chunksize), on the
+Kaggle CSV tiled --repeat times. Each run is a fresh subprocess so ru_maxrss is per run;
+the two outputs must be byte-identical.
+
+    python benchmarks/bench_stream_ingest.py --repeat 50 --chunksize 100000
+"""
+import argparse
+import hashlib
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+
+RUNNER = """
+import resource, sys
+sys.path.insert(0, {src!r})
+import kaggle_ingest
+kaggle_ingest.main({infile!r}, {outfile!r}, chunksize={chunksize!r})
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def make_input(path: Path, repeat: int):
+    raw = pd.read_csv(ROOT / "data/raw/googleplaystore.csv", dtype=str)
+    for i in range(repeat):
+        part = raw.copy()
+        # suffix the app name on every other copy so the dedupe index has real work to do
+        if i % 2:
+            part["App"] = part["App"] + f" #{i}"
+        part.to_csv(path, mode="a" if i else "w", header=not i, index=False)
+
+
+def run(infile, outfile, chunksize):
+    code = RUNNER.format(src=str(ROOT / "src"), infile=str(infile), outfile=str(outfile), chunksize=chunksize)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    wall = time.perf_counter() - t0
+    rss_mb = int(out.stdout.strip().splitlines()[-1]) / 1024
+    digest = hashlib.md5(Path(outfile).read_bytes()).hexdigest()
+    return wall, rss_mb, digest
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        infile = Path(tmp) / "big.csv"
+        make_input(infile, args.repeat)
+        print(f"input: {infile.stat().st_size / 1e6:.1f} MB")
+        print(f"{'mode':<22} {'wall_s':>8} {'peak_rss_mb':>12}")
+        digests = []
+        for label, cs in (("in-memory", None), (f"stream({args.chunksize})", args.chunksize)):
+            wall, rss, digest = run(infile, Path(tmp) / f"out_{cs}.csv", cs)
+            digests.append(digest)
+            print(f"{label:<22} {wall:>8.2f} {rss:>12.0f}")
+        assert digests[0] == digests[1], "streamed output differs from in-memory output"
+        print("✅ outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# benchmarks/suite.py
+"""
+End-to-end benchmark of the pipeline's hot paths on synthetic data (benchmarks/synthetic.py)
+at one or more scales. Each scale times, best of --repeat:
+
+    read_csv, standardize          kaggle_ingest on a Play Store-shaped CSV
+    load_appstore_cache, unify     merge_normalize on a RapidAPI-shaped cache (--ios-ratio of the rows)
+    category_summary, detect_growth, compare_categories
+    insights_stats                 category_stats + compute_confidence_vec, as generate_insights does
+    generate_insights              the whole step against llm_client.StubClient (no LLM cache)
+
+Results are written as JSON (benchmarks/results/<run_id>.json by default). Against a saved
+baseline, any timing more than --threshold slower is flagged and the exit status is 1:
+
+    python benchmarks/suite.py run --rows 10000 100000 1000000 --save-baseline
+    python benchmarks/suite.py run --rows 10000 100000 1000000 --baseline benchmarks/results/baseline.json
+    python benchmarks/suite.py compare benchmarks/results/baseline.json benchmarks/results/<run_id>.json
+
+Generated inputs are kept in --data-dir and reused by later runs with the same rows/seed.
+Baselines are machine-specific: compare runs made on the same host.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from synthetic import write_appstore_cache, write_play_store_csv  # noqa: E402
+
+import analytics  # noqa: E402
+import insights_generator  # noqa: E402
+import kaggle_ingest  # noqa: E402
+import merge_normalize  # noqa: E402
+from confidence import compute_confidence_vec  # noqa: E402
+from llm_client import LLMClient, StubClient  # noqa: E402
+from stats_engine import category_stats  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+DATA_DIR = ROOT / "benchmarks" / ".data"
+AS_OF = pd.Timestamp("2018-08-08")  # end of the synthetic date range
+
+
+def best_of(fn, repeat):
+    """(best seconds, result of the last call)."""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def prepare(rows, ios_rows, seed, data_dir):
+    csv = data_dir / f"play_{rows}_{seed}.csv"
+    cache = data_dir / f"rapidapi_{ios_rows}_{seed}"  # responses in the shape appstore_fetch caches
+    if not csv.exists():
+        print(f"generating {rows:,} Play Store rows -> {csv}", file=sys.__stdout__)
+        write_play_store_csv(csv.with_suffix(".tmp"), rows, seed=seed).rename(csv)
+    if not (cache / "appstore.sqlite").exists():
+        print(f"generating {ios_rows:,} App Store responses -> {cache}", file=sys.__stdout__)
+        write_appstore_cache(cache, ios_rows, seed=seed)
+    return csv, cache
+
+
+def insights_stats(df):
+    stats = category_stats(df)
+    now = pd.Timestamp.now()
+    freshness_days = (now - stats["last_updated"].fillna(now)).dt.days
+    stats["confidence"] = compute_confidence_vec(stats["n"], stats["p"], stats["cohen_d"], freshness_days)
+    return stats
+
+
+def run_scale(rows, ios_rows, seed, repeat, data_dir):
+    csv, cache = prepare(rows, ios_rows, seed, data_dir)
+    timings = {}
+
+    def step(name, fn, n=rows):
+        seconds, out = best_of(fn, repeat)
+        timings[name] = {"seconds": round(seconds, 6), "rows": int(n),
+                         "rows_per_s": round(n / seconds) if seconds else None}
+        print(f"  {name:<20} {seconds:9.4f}s  {n / seconds if seconds else 0:>13,.0f} rows/s", file=sys.__stdout__)
+        return out
+
+    raw = step("read_csv", lambda: pd.read_csv(csv, low_memory=False))
+    gp = step("standardize", lambda: kaggle_ingest.standardize(raw))
+    ios = step("load_appstore_cache", lambda: merge_normalize.load_appstore_cache(cache, payload_path="payloads.bin"),
+               n=ios_rows)
+    assert len(ios) == ios_rows and ios[["app_id", "app_name", "category"]].notna().all().all(), \
+        "App Store responses loaded without id, name or category"
+    combined = step("unify", lambda: merge_normalize.unify(gp, ios.copy()), n=len(gp) + ios_rows)
+    step("category_summary", lambda: analytics.category_summary(combined), n=len(combined))
+    step("detect_growth", lambda: analytics.detect_growth(combined, as_of=AS_OF), n=len(combined))
+    step("compare_categories", lambda: analytics.compare_categories(gp, mode="rest"), n=len(gp))
+    step("insights_stats", lambda: insights_stats(gp), n=len(gp))
+    step("generate_insights", lambda: insights_generator.generate_insights(
+        gp, llm=LLMClient(client=StubClient(), cache=False)), n=len(gp))
+    return timings
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    data_dir = Path(args.data_dir).resolve()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    result = {
+        "run_id": run_id,
+        "git_rev": git_rev(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "pandas": pd.__version__, "numpy": np.__version__},
+        "params": {"rows": args.rows, "ios_ratio": args.ios_ratio, "seed": args.seed, "repeat": args.repeat},
+        "scales": {},
+    }
+    # unify/generate_insights write their artifacts relative to the working directory
+    work = data_dir / "work"
+    work.mkdir(exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(work)
+    try:
+        for rows in args.rows:
+            ios_rows = max(1, int(rows * args.ios_ratio))
+            print(f"== {rows:,} rows ({ios_rows:,} iOS)")
+            sys.stdout.flush()
+            with contextlib.redirect_stdout(io.StringIO()):  # the stages' own progress output
+                timings = run_scale(rows, ios_rows, args.seed, args.repeat, data_dir)
+            result["scales"][str(rows)] = timings
+    finally:
+        os.chdir(cwd)
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{run_id}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"✅ Results: {out}")
+    if args.save_baseline:
+        (RESULTS_DIR / "baseline.json").write_text(json.dumps(result, indent=2))
+        print(f"✅ Saved as baseline: {RESULTS_DIR / 'baseline.json'}")
+    return result
+
+
+def compare(baseline: dict, current: dict, threshold=0.2, min_seconds=0.005) -> list:
+    """
+    One row per (scale, step) present in both runs: baseline/current seconds, ratio and a
+    verdict. Steps under min_seconds in both runs are too noisy to judge and never flagged.
+    """
+    rows = []
+    for scale, steps in current["scales"].items():
+        for name, cur in steps.items():
+            base = baseline.get("scales", {}).get(scale, {}).get(name)
+            if base is None:
+                continue
+            b, c = base["seconds"], cur["seconds"]
+            ratio = c / b if b else float("inf")
+            if max(b, c) < min_seconds:
+                verdict = "noise"
+            elif ratio > 1 + threshold:
+                verdict = "REGRESSION"
+            elif ratio < 1 / (1 + threshold):
+                verdict = "faster"
+            else:
+                verdict = "ok"
+            rows.append({"scale": int(scale), "step": name, "baseline_s": b, "current_s": c,
+                         "ratio": round(ratio, 3), "verdict": verdict})
+    return rows
+
+
+def print_comparison(rows) -> bool:
+    """Print the comparison table; True when nothing regressed."""
+    print(f"{'rows':>10}  {'step':<20} {'baseline_s':>11} {'current_s':>10} {'ratio':>7}  verdict")
+    for r in rows:
+        print(f"{r['scale']:>10,}  {r['step']:<20} {r['baseline_s']:>11.4f} {r['current_s']:>10.4f} "
+              f"{r['ratio']:>7.2f}  {r['verdict']}")
+    regressions = [r for r in rows if r["verdict"] == "REGRESSION"]
+    print(f"❌ {len(regressions)} regression(s)" if regressions else "✅ no regressions")
+    return not regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run the suite and write a results JSON")
+    r.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    r.add_argument("--ios-ratio", type=float, default=0.1, help="App Store responses per Play Store row")
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--data-dir", default=str(DATA_DIR))
+    r.add_argument("--out", default=None)
+    r.add_argument("--save-baseline", action="store_true")
+    r.add_argument("--baseline", default=None, help="compare against this results JSON afterwards")
+    r.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio counted as a regression")
+    c = sub.add_parser("compare", help="compare two results JSON files")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.2)
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        current = run(args)
+        if not args.baseline:
+            return
+        baseline = json.loads(Path(args.baseline).read_text())
+    else:
+        baseline, current = (json.loads(Path(p).read_text()) for p in (args.baseline, args.current))
+    if not print_comparison(compare(baseline, current, threshold=args.threshold)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
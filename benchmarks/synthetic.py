@@ -0,0 +1,190 @@
+# benchmarks/synthetic.py
+"""
+Synthetic inputs at any scale, shaped like the real ones:
+
+  * play_store_frame / write_play_store_csv: rows of data/raw/googleplaystore.csv,
+    with the raw strings the ingest has to parse ("10,000+", "$4.99", "19M", "512k",
+    "Varies with device", "Free" in the installs column, blank and non-numeric ratings),
+    duplicate app names, and a Zipf-skewed category distribution
+  * appstore_lookup / write_appstore_cache: RapidAPI App Store scraper responses
+    ({"status", "error", "data": {...}}, as in data/cache/<id>.json) in the SQLite
+    response cache, as appstore_fetch leaves them
+
+Everything is seeded, so the same (rows, seed) always gives the same data.
+
+    python benchmarks/synthetic.py play outputs/bench/play_1m.csv --rows 1000000
+    python benchmarks/synthetic.py ios data/bench_cache --rows 100000
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from response_cache import open_cache  # noqa: E402
+
+CATEGORIES = ['FAMILY', 'GAME', 'TOOLS', 'MEDICAL', 'BUSINESS', 'PRODUCTIVITY', 'PERSONALIZATION',
+              'COMMUNICATION', 'SPORTS', 'LIFESTYLE', 'FINANCE', 'HEALTH_AND_FITNESS', 'PHOTOGRAPHY',
+              'SOCIAL', 'NEWS_AND_MAGAZINES', 'SHOPPING', 'TRAVEL_AND_LOCAL', 'DATING',
+              'BOOKS_AND_REFERENCE', 'VIDEO_PLAYERS', 'EDUCATION', 'ENTERTAINMENT',
+              'MAPS_AND_NAVIGATION', 'FOOD_AND_DRINK', 'HOUSE_AND_HOME', 'AUTO_AND_VEHICLES',
+              'LIBRARIES_AND_DEMO', 'WEATHER', 'ART_AND_DESIGN', 'EVENTS', 'PARENTING', 'COMICS', 'BEAUTY']
+IOS_GENRES = ['Games', 'Utilities', 'Finance', 'Education', 'Photo & Video', 'Social Networking',
+              'Health & Fitness', 'Productivity', 'Entertainment', 'Lifestyle', 'Shopping', 'Travel']
+WORDS = ("photo video music chat cloud fit pay smart super block word puzzle farm city racing hero "
+         "scan note draw paint launcher keyboard weather news shop travel map food home car "
+         "editor camera daily pro lite free").split()
+INSTALLS = ['0+', '1+', '5+', '10+', '50+', '100+', '500+', '1,000+', '5,000+', '10,000+', '50,000+',
+            '100,000+', '500,000+', '1,000,000+', '5,000,000+', '10,000,000+', '50,000,000+',
+            '100,000,000+', '500,000,000+', '1,000,000,000+']
+CONTENT = ['Everyone', 'Teen', 'Everyone 10+', 'Mature 17+', 'Adults only 18+', 'Unrated']
+COLUMNS = ['App', 'Category', 'Rating', 'Reviews', 'Size', 'Installs', 'Type', 'Price', 'Content Rating',
+           'Genres', 'Last Updated', 'Current Ver', 'Android Ver']
+
+
+def zipf_weights(k: int, s: float = 1.1) -> np.ndarray:
+    w = 1.0 / np.arange(1, k + 1) ** s
+    return w / w.sum()
+
+
+def play_store_frame(rows: int, seed: int = 0, skew: float = 1.1, dup_rate: float = 0.1,
+                     dirty_rate: float = 0.02, start: int = 0) -> pd.DataFrame:
+    """
+    `rows` raw Play Store rows. About dup_rate of them repeat an earlier app name in the
+    same category (with a different review count); about dirty_rate of each parsed
+    column holds a value the parsers must turn into NaN. `start` offsets app ids, so
+    consecutive chunks written with different seeds don't collide.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start, start + rows)
+    dup = rng.random(rows) < dup_rate
+    ids[dup] = start + rng.integers(0, max(1, rows), dup.sum())
+    w = np.array(WORDS, dtype=object)
+    names = (pd.Series(w[ids % len(WORDS)]).str.title() + ' ' + pd.Series(w[(ids // 7) % len(WORDS)])
+             + ' ' + pd.Series(ids).astype(str))
+
+    cat_codes = rng.choice(len(CATEGORIES), rows, p=zipf_weights(len(CATEGORIES), skew))
+    cat_codes[dup] = cat_codes[ids[dup] - start]  # a duplicate shares its original's category
+    categories = np.array(CATEGORIES, dtype=object)[cat_codes]
+
+    rating = np.clip(rng.normal(4.1, 0.5, rows), 1, 5).round(1).astype(str).astype(object)
+    rating[rng.random(rows) < 0.13] = ''   # unrated apps
+    rating[rng.random(rows) < dirty_rate / 10] = '19'  # the famous shifted row
+
+    reviews = rng.lognormal(6, 3, rows).astype(np.int64).astype(str).astype(object)
+    reviews[rng.random(rows) < dirty_rate / 10] = '3.0M'
+
+    size_mb = rng.lognormal(2.5, 1.0, rows)
+    size = np.where(size_mb >= 1, pd.Series(size_mb.round(1)).astype(str).str.removesuffix('.0') + 'M',
+                    pd.Series((size_mb * 1024).astype(int)).astype(str) + 'k').astype(object)
+    size[rng.random(rows) < 0.15] = 'Varies with device'
+    size[rng.random(rows) < dirty_rate / 10] = '1,000+'
+
+    installs = np.array(INSTALLS, dtype=object)[np.clip(rng.poisson(9, rows), 0, len(INSTALLS) - 1)]
+    installs[rng.random(rows) < dirty_rate / 10] = 'Free'
+
+    paid = rng.random(rows) < 0.08
+    price = np.full(rows, '0', dtype=object)
+    price[paid] = '$' + pd.Series(rng.choice([0.99, 1.49, 1.99, 2.99, 3.99, 4.99, 9.99, 29.99], paid.sum())
+                                  ).map('{:.2f}'.format).to_numpy(object)
+    price[rng.random(rows) < dirty_rate / 10] = 'Everyone'
+
+    days = rng.gamma(1.5, 300, rows).astype('int64')  # skewed towards recent updates
+    updated = (pd.Timestamp('2018-08-08') - pd.to_timedelta(days, unit='D')).strftime('%B %-d, %Y').to_numpy(object)
+    updated[rng.random(rows) < dirty_rate / 10] = '1.0.19'
+
+    return pd.DataFrame({
+        'App': names.to_numpy(object),
+        'Category': categories,
+        'Rating': rating,
+        'Reviews': reviews,
+        'Size': size,
+        'Installs': installs,
+        'Type': np.where(paid, 'Paid', 'Free'),
+        'Price': price,
+        'Content Rating': np.array(CONTENT, dtype=object)[rng.choice(len(CONTENT), rows, p=[.8, .1, .05, .04, .005, .005])],
+        'Genres': pd.Series(categories).str.replace('_', ' ').str.title().to_numpy(object),
+        'Last Updated': updated,
+        'Current Ver': np.where(rng.random(rows) < 0.1, 'Varies with device', '1.0.' + pd.Series(ids % 50).astype(str)),
+        'Android Ver': '4.1 and up',
+    }, columns=COLUMNS)
+
+
+def write_play_store_csv(path, rows: int, seed: int = 0, chunk: int = 1_000_000, **kwargs) -> Path:
+    """Write `rows` synthetic rows to a CSV, chunk by chunk so 10M rows fit in memory."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, start in enumerate(range(0, rows, chunk)):
+            play_store_frame(min(chunk, rows - start), seed=seed + i, start=start, **kwargs
+                             ).to_csv(f, index=False, header=(i == 0))
+    return path
+
+
+def appstore_lookup(i: int, rng: random.Random) -> dict:
+    # a RapidAPI App Store scraper response as appstore_fetch caches it (data/cache/<id>.json)
+    genre = IOS_GENRES[min(int(rng.paretovariate(1.2)) - 1, len(IOS_GENRES) - 1)]
+    score = round(rng.uniform(1, 5), 5) if rng.random() > 0.05 else None
+    reviews = int(rng.lognormvariate(6, 3))
+    price = rng.choice([0.0, 0.0, 0.0, 0.99, 2.99])
+    updated = f"20{rng.randint(18, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T07:00:00Z"
+    return {"status": "ok", "error": None, "data": {
+        "id": 100000000 + i,
+        "appId": f"com.studio{i // 5}.app{i}",
+        "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+        "url": f"https://apps.apple.com/us/app/id{100000000 + i}",
+        "description": " ".join(rng.choices(WORDS, k=150)),
+        "genres": [genre, rng.choice(IOS_GENRES)],
+        "primaryGenre": genre,
+        "contentRating": "4+",
+        "size": str(rng.randint(10, 500) * 2**20),
+        "released": "2016-01-01T08:00:00Z",
+        "updated": updated,
+        "version": f"{rng.randint(1, 9)}.{rng.randint(0, 20)}",
+        "price": price,
+        "currency": "USD",
+        "free": price == 0,
+        "developerId": 200000000 + i // 5,
+        "developer": f"Studio {i // 5} Inc.",
+        "score": score,
+        "reviews": reviews,
+        "currentVersionScore": score,
+        "currentVersionReviews": reviews,
+        "screenshots": [f"https://is1-ssl.mzstatic.com/image/{i}/{k}.png" for k in range(5)],
+    }}
+
+
+def write_appstore_cache(cache_dir, rows: int, seed: int = 0, batch: int = 5000) -> Path:
+    """Fill <cache_dir>/appstore.sqlite with `rows` lookup responses."""
+    rng = random.Random(seed)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open_cache(cache_dir) as cache:
+        for start in range(0, rows, batch):
+            cache.put_many((str(100000000 + i), appstore_lookup(i, rng))
+                           for i in range(start, min(rows, start + batch)))
+    return cache_dir
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("kind", choices=["play", "ios"])
+    ap.add_argument("out", help="CSV path (play) or cache directory (ios)")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the category distribution")
+    args = ap.parse_args()
+    if args.kind == "play":
+        out = write_play_store_csv(args.out, args.rows, seed=args.seed, skew=args.skew)
+    else:
+        out = write_appstore_cache(args.out, args.rows, seed=args.seed)
+    print(f"✅ {args.rows:,} {args.kind} rows -> {out}")
+
+
+if __name__ == "__main__":
+    main()
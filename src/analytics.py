@@ -1,35 +1,94 @@
 # src/analytics.py
 import pandas as pd
 import numpy as np
-from scipy import stats
-from joblib import Parallel, delayed
+
+from growth import GrowthIndex
+from stats_engine import bh_adjust, pairwise_welch, rating_moments, resample_pvalues, welch_test
 
 def category_summary(df):
-    g = df.groupby('category').agg(
-        apps=('app_name','nunique'),
+    # count resolved apps once across platforms when entity resolution has run
+    key = 'app_entity_id' if 'app_entity_id' in df.columns else 'app_name'
+    g = df.groupby('category', observed=True).agg(
+        apps=(key,'nunique'),
         avg_rating=('rating','mean'),
         median_price=('price_usd','median'),
         total_reviews=('review_count','sum'),
     ).reset_index()
+    return finish_category_summary(g)
+
+def finish_category_summary(g):
+    # rounding + ordering shared with lake.category_summary, which aggregates in DuckDB:
+    # g has one row per category, sorted by category
     g['avg_rating'] = g['avg_rating'].round(2)
     return g.sort_values('apps', ascending=False)
 
-def detect_growth(df, date_col='last_updated', window_days=90):
-    df = df.copy()
-    cut = pd.Timestamp.now() - pd.Timedelta(days=window_days)
-    recent = df[df[date_col] >= cut]
-    recent_counts = recent.groupby('category').size().rename('recent_count')
-    overall_counts = df.groupby('category').size().rename('total_count')
-    stats = pd.concat([recent_counts, overall_counts], axis=1).fillna(0)
+def detect_growth(df, date_col='last_updated', window_days=90, as_of=None):
+    # one window ending at as_of (default: now); growth.GrowthIndex answers many windows
+    # and as-of dates from a single sort
+    idx = GrowthIndex(df, date_col=date_col, as_of=as_of if as_of is not None else pd.Timestamp.now())
+    recent = idx.growth([window_days], metric='count').iloc[:, 0]
+    stats = pd.DataFrame({'recent_count': recent, 'total_count': idx.totals()[:, 0]}, index=recent.index)
+    return finish_growth(stats)
+
+def finish_growth(stats):
+    # stats: recent_count/total_count indexed by category, sorted (shared with lake.detect_growth)
     stats['recent_ratio'] = (stats['recent_count'] / (stats['total_count']+1)).round(3)
     return stats.sort_values('recent_ratio', ascending=False).reset_index()
 
 def significance_of_rating_diff(df, cat_a, cat_b):
-    a = df[df['category']==cat_a]['rating'].dropna()
-    b = df[df['category']==cat_b]['rating'].dropna()
-    # parametric t-test
-    t, p = stats.ttest_ind(a, b, equal_var=False, nan_policy='omit')
-    return {'t': float(t), 'p': float(p), 'n_a': len(a), 'n_b': len(b)}
+    # parametric (Welch) t-test from the two categories' moments; see stats_engine
+    m = rating_moments(df[df['category'].isin([cat_a, cat_b])])
+    a = m.loc[cat_a] if cat_a in m.index else pd.Series({'n': 0, 'mean': np.nan, 'var': np.nan})
+    b = m.loc[cat_b] if cat_b in m.index else pd.Series({'n': 0, 'mean': np.nan, 'var': np.nan})
+    t, p = welch_test(a['mean'], a['var'], a['n'], b['mean'], b['var'], b['n'])
+    return {'t': float(t), 'p': float(p), 'n_a': int(a['n']), 'n_b': int(b['n'])}
+
+def _rating_groups(df, m):
+    # non-null ratings sorted by category (in m's order) + bounds: group i is vals[bounds[i]:bounds[i+1]]
+    r = pd.to_numeric(df['rating'], errors='coerce')
+    keep = r.notna().to_numpy()
+    codes = pd.Categorical(df['category'][keep], categories=m.index).codes
+    order = np.argsort(codes, kind='stable')
+    return r.to_numpy(float)[keep][order], np.searchsorted(codes[order], np.arange(len(m) + 1))
+
+def _resample_chunk(vals, bounds, ia, ib, method, n_resamples, seed):
+    # ib == -1 is "every other category"
+    xs, ys = [], []
+    for a, b in zip(ia, ib):
+        xs.append(vals[bounds[a]:bounds[a + 1]])
+        ys.append(vals[bounds[b]:bounds[b + 1]] if b >= 0
+                  else np.concatenate([vals[:bounds[a]], vals[bounds[a + 1]:]]))
+    return resample_pvalues(xs, ys, method=method, n_resamples=n_resamples, seed=seed)
+
+def compare_categories(df, mode='all', pairs=None, method='welch', alpha=0.05,
+                       n_resamples=9999, n_jobs=-1, seed=0, chunk_size=32):
+    # rating comparison across many categories at once; one row per test with
+    # a, b, n_a, n_b, mean_diff, cohen_d, t, p, p_adj (Benjamini-Hochberg) and significant.
+    #   mode='all'  every pair of categories, mode='rest' each category vs all others,
+    #   pairs=[(a, b), ...] just those.
+    #   method='welch' takes p from Welch tests on the per-category moments (no pass over
+    #   the rows per pair); 'permutation' / 'bootstrap' replace p with resampled p-values,
+    #   computed in chunks of pairs across n_jobs processes. Chunks get their own seeds,
+    #   so results don't depend on n_jobs
+    m = rating_moments(df)
+    res = pairwise_welch(m, mode=mode, pairs=pairs)
+    if method != 'welch':
+        from joblib import Parallel, delayed
+
+        vals, bounds = _rating_groups(df, m)
+        pos = pd.Series(np.arange(len(m)), index=m.index)
+        ia = pos.loc[res['a']].to_numpy()
+        ib = pos.reindex(res['b']).fillna(-1).astype(int).to_numpy()
+        chunks = [slice(i, i + chunk_size) for i in range(0, len(res), chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        parts = Parallel(n_jobs=n_jobs)(
+            delayed(_resample_chunk)(vals, bounds, ia[c], ib[c], method, n_resamples, s)
+            for c, s in zip(chunks, seeds))
+        res['p'] = np.concatenate(parts) if parts else np.array([])
+        res['p_adj'] = bh_adjust(res['p'])
+    res['significant'] = res['p_adj'] < alpha
+    res.attrs['method'] = method
+    return res
 
 # Example usage:
 # df = pd.read_csv('outputs/clean_combined_apps.csv')
@@ -1,91 +1,334 @@
 # src/appstore_fetch.py
+import argparse
+import re
 import requests
+import threading
 import time
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from requests.adapters import HTTPAdapter
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type
 import os
 
+from response_cache import ResponseCache, open_cache
+
 # Load environment variables
 load_dotenv()
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 RAPIDAPI_HOST = "apple-app-store-scraper.p.rapidapi.com"
+API_URL = f"https://{RAPIDAPI_HOST}/v1/appstore"
 
-if not RAPIDAPI_KEY:
-    raise EnvironmentError("RAPIDAPI_KEY not found in environment variables. Set it in your .env file.")
+CACHE_DIR = Path("data/cache")  # created by the cache when it is first opened
+CACHE_TTL_DAYS = float(os.getenv("APPSTORE_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_MB = float(os.getenv("APPSTORE_CACHE_MAX_MB", "0"))  # 0 = unbounded
 
-HEADERS = {
-    "x-rapidapi-host": RAPIDAPI_HOST,
-    "x-rapidapi-key": RAPIDAPI_KEY,
-}
+# Concurrency / pacing (override via env to match the RapidAPI plan)
+MAX_WORKERS = int(os.getenv("APPSTORE_MAX_WORKERS", "8"))
+RATE_PER_SEC = float(os.getenv("APPSTORE_RATE_PER_SEC", "4"))
+RATE_BURST = int(os.getenv("APPSTORE_RATE_BURST", "8"))
 
-CACHE_DIR = Path("data/cache")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+class RateLimited(Exception):
+    """Raised on HTTP 429; carries the server's Retry-After delay in seconds."""
 
-# Retry on exceptions like HTTPError or network failures
-@retry(
-    wait=wait_exponential(multiplier=1, min=1, max=20),
-    stop=stop_after_attempt(6),
-    retry=retry_if_exception_type(Exception),
-)
-def fetch_app_by_id(app_id: str) -> dict:
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MissingApiKey(EnvironmentError):
+    """RAPIDAPI_KEY is not set; retrying cannot fix it."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills `rate` tokens per second up to `burst` (rate <= 0 = unlimited).
+    `pause()` blocks every caller until the given delay has passed (used for Retry-After).
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:  # unlimited
+                    return
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # the bucket refills from the end of the pause, not through it
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+LIMITER = TokenBucket(RATE_PER_SEC, RATE_BURST)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def api_headers() -> dict:
+    """RapidAPI headers; the key is checked here, on first request, not at import."""
+    key = os.getenv("RAPIDAPI_KEY")
+    if not key:
+        raise MissingApiKey("RAPIDAPI_KEY not found in environment variables. Set it in your .env file.")
+    return {"x-rapidapi-host": RAPIDAPI_HOST, "x-rapidapi-key": key}
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session; the pool is sized for MAX_WORKERS concurrent requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            headers = api_headers()
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(MAX_WORKERS, 1))
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update(headers)
+            _session = s
+    return _session
+
+
+def parse_retry_after(value) -> float | None:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_backoff = wait_exponential(multiplier=1, min=1, max=20)
+
+
+def _wait_retry_after(retry_state) -> float:
+    # Sleep exactly what the server asked for on 429s; exponential backoff otherwise.
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimited) and exc.retry_after is not None:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+
+def fetch_app_by_id(app_id: str, limiter: TokenBucket | None = None) -> dict:
     """
     Fetch app details from the RapidAPI Apple App Store Scraper.
-    Raises Exception on HTTP errors.
+    Raises Exception on HTTP errors, MissingApiKey (at once, not retried) without a key.
     """
-    url = f"https://{RAPIDAPI_HOST}/v1/appstore"
+    return _fetch_with_retry(get_session(), app_id, limiter or LIMITER)
+
+
+# Retry on 429s and network failures; a 403 (not subscribed) or a missing key will not fix itself
+@retry(
+    wait=_wait_retry_after,
+    stop=stop_after_attempt(6),
+    retry=retry_if_not_exception_type((PermissionError, MissingApiKey)),
+    reraise=True,
+)
+def _fetch_with_retry(session: requests.Session, app_id: str, limiter: TokenBucket) -> dict:
     params = {"appid": app_id, "country": "us"}
 
-    resp = requests.get(url, headers=HEADERS, params=params, timeout=15)
+    limiter.acquire()
+    resp = session.get(API_URL, params=params, timeout=15)
 
     if resp.status_code == 403:
         raise PermissionError(f"API key not subscribed for this API. Got 403 for app {app_id}")
     if resp.status_code == 429:
-        raise Exception(f"Rate limited (429) for app {app_id}")
+        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        if retry_after is not None:
+            limiter.pause(retry_after)
+        raise RateLimited(f"Rate limited (429) for app {app_id}", retry_after)
     resp.raise_for_status()
 
     return resp.json()
 
 
-def cached_fetch(app_id: str) -> dict:
+_cache = None
+
+
+def get_cache() -> ResponseCache:
+    """Shared SQLite cache under CACHE_DIR; legacy <id>.json files are imported on first open."""
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = open_cache(
+                CACHE_DIR,
+                ttl=CACHE_TTL_DAYS * 86400 if CACHE_TTL_DAYS > 0 else None,
+                max_bytes=int(CACHE_MAX_MB * 1024 * 1024) or None,
+            )
+    return _cache
+
+
+def cached_fetch(app_id: str, limiter: TokenBucket | None = None) -> dict:
     """
-    Fetch app data, using cache if available.
+    Fetch app data, using cache if available and not older than the TTL.
+    Pacing is handled by the token bucket, so cache hits cost nothing.
     """
-    cache_file = CACHE_DIR / f"{app_id}.json"
-    if cache_file.exists() and cache_file.stat().st_size > 0:
-        return json.loads(cache_file.read_text())
+    cache = get_cache()
+    data = cache.get(app_id)
+    if data is not None:
+        return data
 
-    data = fetch_app_by_id(app_id)
-    cache_file.write_text(json.dumps(data))
-    time.sleep(0.25)  # polite pacing
+    data = fetch_app_by_id(app_id, limiter=limiter)
+    cache.put(app_id, data)
     return data
 
 
-def bulk_fetch(app_ids: list[str]) -> dict:
+def iter_fetch(app_ids, max_workers: int = MAX_WORKERS, limiter: TokenBucket | None = None,
+               window: int | None = None):
     """
-    Fetch multiple apps and return a dictionary of {app_id: data}.
+    Yield (app_id, data) for every app fetched, in input order, as results arrive.
+    `app_ids` may be any iterable (e.g. lines of a file): at most `window` requests
+    (default 4 x max_workers) are in flight, so memory does not grow with the catalogue.
+    Failed apps are reported and skipped.
     """
-    results = {}
-    for app_id in app_ids:
+    limiter = limiter or LIMITER
+    window = window or 4 * max(1, max_workers)
+
+    def _one(app_id):
         try:
-            data = cached_fetch(app_id)
-            results[app_id] = data
+            data = cached_fetch(app_id, limiter=limiter)
             print(f"✅ Fetched app {app_id}")
+            return app_id, data
         except Exception as e:
             print(f"❌ Failed to fetch {app_id}: {e}")
-    return results
+            return app_id, None
 
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = deque()
+        try:
+            for app_id in app_ids:
+                pending.append(pool.submit(_one, app_id))
+                while len(pending) >= window or (pending and pending[0].done()):
+                    app_id, data = pending.popleft().result()
+                    if data is not None:
+                        yield app_id, data
+            while pending:
+                app_id, data = pending.popleft().result()
+                if data is not None:
+                    yield app_id, data
+        finally:
+            for f in pending:  # consumer stopped early: don't fetch the rest
+                f.cancel()
+
+
+def bulk_fetch(app_ids: list[str], max_workers: int = MAX_WORKERS,
+               limiter: TokenBucket | None = None) -> dict:
+    """
+    Fetch multiple apps concurrently and return a dictionary of {app_id: data}.
+    All workers share one connection pool and one rate limiter; results keep input order.
+    """
+    return dict(iter_fetch(app_ids, max_workers=max_workers, limiter=limiter))
+
+
+_NDJSON_ID = re.compile(r'^\{"app_id":\s*("(?:[^"\\]|\\.)*")')
+
+
+def written_ids(path) -> set:
+    """
+    IDs already in an NDJSON output. A last line cut off by an interrupted run is
+    truncated away, so appending continues on a clean line boundary.
+    """
+    path = Path(path)
+    if not path.exists():
+        return set()
+    done, end = set(), 0
+    with open(path, "rb+") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            m = _NDJSON_ID.match(line.decode("utf-8"))
+            if m:
+                done.add(json.loads(m.group(1)))
+        f.truncate(end)
+    return done
+
+
+def fetch_to_ndjson(app_ids, outfile="outputs/all_apps.ndjson", resume: bool = True,
+                    max_workers: int = MAX_WORKERS, limiter: TokenBucket | None = None) -> int:
+    """
+    Append one {"app_id": ..., "response": ...} line per fetched app to `outfile` as
+    results arrive. With resume, apps already in the file are skipped, so an
+    interrupted run picks up after the last one written. Returns the lines written.
+    """
+    outfile = Path(outfile)
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    done = written_ids(outfile) if resume else set()
+    if done:
+        print(f"Resuming: {len(done):,} apps already in {outfile}")
+    todo = (app_id for app_id in app_ids if str(app_id) not in done)
+    written = 0
+    with open(outfile, "a" if resume else "w", encoding="utf-8") as f:
+        for app_id, data in iter_fetch(todo, max_workers=max_workers, limiter=limiter):
+            f.write(json.dumps({"app_id": str(app_id), "response": data}, separators=(",", ":")) + "\n")
+            f.flush()  # a crash loses at most the line being written
+            written += 1
+    print(f"✅ {written:,} apps appended to {outfile}")
+    return written
+
+
+# Example usage: Netflix & Spotify app IDs
+EXAMPLE_IDS = ["284910350", "544007664"]
 
-if __name__ == "__main__":
-    # Example usage: Netflix & Spotify app IDs
-    example_ids = ["284910350", "544007664"]  
-    data = bulk_fetch(example_ids)
+
+def read_ids(path):
+    # one app ID per line, read lazily
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+def main(app_ids=None, outfile="outputs/all_apps.json", resume: bool = True, ids_file=None):
+    # .ndjson/.jsonl outputs are streamed (and resumable); .json is the legacy single document
+    if ids_file:
+        app_ids = read_ids(ids_file)
+    if Path(outfile).suffix in (".ndjson", ".jsonl"):
+        return fetch_to_ndjson(app_ids or EXAMPLE_IDS, outfile, resume=resume)
+
+    data = bulk_fetch(list(app_ids or EXAMPLE_IDS))
 
     # Save all results to a combined JSON for later CSV conversion
-    OUTPUT_FILE = Path("outputs/all_apps.json")
+    OUTPUT_FILE = Path(outfile)
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
     print(f"✅ All app data saved to {OUTPUT_FILE}")
+    return data
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("app_ids", nargs="*")
+    ap.add_argument("--ids-file", help="one app ID per line")
+    ap.add_argument("--out", default="outputs/all_apps.json", help="a .ndjson path streams results")
+    ap.add_argument("--no-resume", action="store_true", help="overwrite an existing .ndjson output")
+    args = ap.parse_args()
+    main(args.app_ids, args.out, resume=not args.no_resume, ids_file=args.ids_file)
@@ -1,27 +1,44 @@
 # src/confidence.py
 import numpy as np
-from scipy import stats
+
+# weights of the n / p-value / effect size / freshness components of compute_confidence
+WEIGHTS = { 'n':0.25, 'p':0.25, 'e':0.3, 'f':0.2 }
+
+def cohen_d_vec(mean_a, std_a, n_a, mean_b, std_b, n_b):
+    # Cohen's d for arrays of group summaries (mean, sample std with ddof=1, size);
+    # same arithmetic as cohen_d, so results are bit-identical. 0.0 where n<2 or sd==0
+    mean_a, std_a, n_a, mean_b, std_b, n_b = (np.asarray(x, dtype=float) for x in (mean_a, std_a, n_a, mean_b, std_b, n_b))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled_sd = np.sqrt(((n_a-1)*std_a**2 + (n_b-1)*std_b**2) / (n_a+n_b-2))
+        d = (mean_a - mean_b) / pooled_sd
+    return np.where((n_a >= 2) & (n_b >= 2) & (pooled_sd != 0), d, 0.0)
 
 def cohen_d(a, b):
-    a = np.array(a); b = np.array(b)
+    a = np.asarray(a); b = np.asarray(b)
     na, nb = len(a), len(b)
     if na<2 or nb<2:
         return 0.0
-    pooled_sd = np.sqrt(((na-1)*a.std(ddof=1)**2 + (nb-1)*b.std(ddof=1)**2) / (na+nb-2))
-    if pooled_sd == 0: return 0.0
-    return (a.mean() - b.mean()) / pooled_sd
+    d = cohen_d_vec(a.mean(), a.std(ddof=1), na, b.mean(), b.std(ddof=1), nb)
+    return d[()]
 
-def compute_confidence(n, p_value, effect_size, freshness_days):
+def compute_confidence_vec(n, p_value, effect_size, freshness_days, weights=None):
+    # arrays (or scalars, broadcast) in -> array of 0..1 scores, rounded to 3 places
     # n: sample size contributing to insight
     # p_value: statistical p-value (smaller => stronger)
     # effect_size: absolute effect (Cohen's d)
     # freshness_days: recency (smaller => fresher)
-    # produce 0..1 score
+    n, p_value, effect_size, freshness_days = (np.asarray(x, dtype=float) for x in (n, p_value, effect_size, freshness_days))
+    w = WEIGHTS if weights is None else {**WEIGHTS, **weights}
     n_score = 1 - np.exp(-n/100)      # saturates ~1 for n>400
-    p_score = 1 - min(1, max(0, -np.log10(p_value+1e-12)/6))  # p=1e-6 => high score
-    e_score = 1 - np.exp(-abs(effect_size)/0.5)  # 0.5 is meaningful
+    p_raw = -np.log10(p_value+1e-12)/6  # p=1e-6 => high score
+    p_raw = np.where(p_raw > 0, p_raw, 0)     # max(0, .) / min(1, .) as written for scalars,
+    p_score = 1 - np.where(p_raw < 1, p_raw, 1)  # so a NaN p-value scores like the scalar path
+    e_score = 1 - np.exp(-np.abs(effect_size)/0.5)  # 0.5 is meaningful
     freshness_score = np.exp(-freshness_days/365)  # 1 year halves ~0.37
     # weighted
-    w = { 'n':0.25, 'p':0.25, 'e':0.3, 'f':0.2 }
     score = w['n']*n_score + w['p']*p_score + w['e']*e_score + w['f']*freshness_score
-    return float(round(score,3))
+    return np.round(score, 3)
+
+def compute_confidence(n, p_value, effect_size, freshness_days, weights=None):
+    # scalar version of compute_confidence_vec; produces a 0..1 score
+    return float(compute_confidence_vec(n, p_value, effect_size, freshness_days, weights))
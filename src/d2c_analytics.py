@@ -1,5 +1,36 @@
+# src/d2c_analytics.py
+"""
+Phase 5 D2C funnel and SEO analytics.
+
+The workbook is parsed once and cached as a columnar file under data/cache/d2c/; the
+cache is reused until the workbook's mtime or size changes (openpyxl is the slow
+part at real campaign/keyword volumes). funnel_metrics() computes spend, revenue and
+funnel counts with CAC, ROAS and SEO scores for every level (channel, campaign,
+category) from one factorization of the rows, and top_keywords() picks the best
+SEO rows with a partial selection instead of sorting everything.
+
+    df = load_workbook()
+    m = funnel_metrics(df)           # {'channel': ..., 'campaign_id': ..., 'seo_category': ...}
+    top_keywords(df, k=20, by='seo_category')
+
+    python src/d2c_analytics.py --top 10
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
+from storage import artifact, coerce, read_table, write_table
+
+WORKBOOK = Path('data/raw/Kasparro_Phase5_D2C_Synthetic_Dataset.xlsx')
+CACHE_DIR = Path('data/cache/d2c')
+LEVELS = ('channel', 'campaign_id', 'seo_category')
+COUNTS = ['impressions', 'clicks', 'installs', 'signups', 'first_purchase', 'repeat_purchase']
+SUMS = ['spend_usd', 'revenue_usd', *COUNTS]
+
 def compute_cac_roas(df):
     """
     Compute CAC (Cost per Acquisition) and ROAS (Return on Ad Spend)
@@ -10,13 +41,181 @@ def compute_cac_roas(df):
     df['ROAS'] = df['Revenue'] / df['Spend'].replace(0, 1)
     return df
 
-def seo_opportunities(df):
+def seo_opportunities(df, top=None):
     """
     Identify SEO categories with high potential
     Assumes df has columns: Category, SearchVolume, AvgPosition, ConversionRate
+    top=k returns only the k best rows, found with top_k() rather than a full sort
     """
+    scores = df['SearchVolume'] * df['ConversionRate'] / df['AvgPosition'].replace(0, 1)
+    if top is not None:
+        idx = top_k(scores.to_numpy(float), top)
+        return df.iloc[idx].assign(SEO_Score=scores.to_numpy(float)[idx])
     df = df.copy()
     # Score: higher search volume + higher conversion + lower average position
-    df['SEO_Score'] = df['SearchVolume'] * df['ConversionRate'] / df['AvgPosition'].replace(0, 1)
+    df['SEO_Score'] = scores
     df = df.sort_values(by='SEO_Score', ascending=False)
     return df
+
+
+def _typed(df):
+    # labels as categoricals (grouped on their codes), counts in the smallest int type
+    for c in df.columns:
+        if df[c].dtype == object:
+            df[c] = df[c].astype('category')
+        elif pd.api.types.is_integer_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], downcast='integer')
+    return df
+
+
+def load_workbook(path=WORKBOOK, sheet=0, cache_dir=CACHE_DIR, refresh=False) -> pd.DataFrame:
+    """
+    The workbook sheet as a DataFrame, from the columnar cache when it was converted
+    from this exact file (same mtime and size); otherwise parsed and cached again.
+    """
+    path = Path(path)
+    st = path.stat()
+    stem = Path(cache_dir) / f'{path.stem}.{sheet}'
+    source_path = Path(f'{stem}.source.json')
+    source = {'workbook': str(path.resolve()), 'sheet': sheet, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+    if not refresh and source_path.exists() and json.loads(source_path.read_text()) == source:
+        try:
+            return _typed(read_table(stem))
+        except FileNotFoundError:
+            pass
+    t0 = time.perf_counter()
+    df = coerce(pd.read_excel(path, sheet_name=sheet))  # the dtypes a cached load comes back with
+    out = write_table(df, artifact(stem))
+    source_path.write_text(json.dumps(source))  # written last: a partial conversion is never reused
+    print(f"✅ Converted {path.name} ({len(df):,} rows) to {out} in {time.perf_counter() - t0:.1f}s")
+    return _typed(df)
+
+
+def _nonzero(x):
+    # as in compute_cac_roas: a zero denominator counts as 1
+    return np.where(x == 0, 1, x)
+
+
+def seo_scores(df) -> np.ndarray:
+    """search volume x conversion rate / average position (0 counts as 1), per row."""
+    return (df['monthly_search_volume'].to_numpy(float) * df['conversion_rate'].to_numpy(float)
+            / _nonzero(df['avg_position'].to_numpy(float)))
+
+
+def _codes(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(np.int64), s.cat.categories
+    codes, uniques = pd.factorize(s)
+    return codes.astype(np.int64), uniques
+
+
+def funnel_metrics(df, levels=LEVELS) -> dict:
+    """
+    {level: one row per value of that level} with summed spend, revenue and funnel
+    counts, the SEO score sum, search volume and mean position/conversion rate, and
+    CAC, ROAS, CTR and step conversion rates from those sums.
+
+    The rows are coded once into (channel, campaign, category) cells and every column
+    is summed per cell with np.bincount; each level is then a bincount over the (much
+    smaller) cell table. Missing values are skipped and missing labels dropped, as in
+    groupby.
+    """
+    keys = [c for c in levels if c in df.columns]
+    codes, labels = [], []
+    for k in keys:
+        c, l = _codes(df[k])
+        codes.append(np.where(c < 0, len(l), c))  # missing label: one extra slot, dropped below
+        labels.append(np.asarray(l, dtype=object))
+    dims = [len(l) + 1 for l in labels]
+    cell = np.ravel_multi_index(codes, dims)
+    if np.prod(dims, dtype=float) > max(len(df), 1 << 20):
+        cell, cells = pd.factorize(cell)  # sparse grid: number the cells that occur
+    else:
+        cells = np.arange(np.prod(dims))
+
+    def total(values, at=cell, n=len(cells)):
+        values = np.asarray(values, float)
+        return np.bincount(at, weights=np.nan_to_num(values, nan=0.0), minlength=n)
+
+    def present(values):
+        return np.bincount(cell, weights=~np.isnan(np.asarray(values, float)), minlength=len(cells))
+
+    sums = {c: total(df[c]) for c in SUMS if c in df.columns}
+    sums['seo_score'] = total(seo_scores(df))
+    sums['monthly_search_volume'] = total(df['monthly_search_volume'])
+    for c in ('avg_position', 'conversion_rate'):
+        sums[f'{c}_sum'], sums[f'{c}_n'] = total(df[c]), present(df[c])
+    sums['rows'] = np.bincount(cell, minlength=len(cells))
+    used = sums['rows'] > 0
+
+    out = {}
+    for k, at, l in zip(keys, np.unravel_index(cells[used], dims), labels):
+        g = pd.DataFrame({c: total(v[used], at, len(l) + 1)[:-1] for c, v in sums.items()},
+                         index=pd.Index(l, name=k))
+        g = g[g['rows'] > 0].sort_index()
+        for c in COUNTS + ['monthly_search_volume', 'rows']:
+            if c in g:
+                g[c] = g[c].round().astype(np.int64)
+        out[k] = _ratios(g)
+    return out
+
+
+def _ratios(g):
+    g['CAC'] = g['spend_usd'] / _nonzero(g['first_purchase'])
+    g['ROAS'] = g['revenue_usd'] / _nonzero(g['spend_usd'])
+    g['CTR'] = g['clicks'] / _nonzero(g['impressions'])
+    g['install_rate'] = g['installs'] / _nonzero(g['clicks'])
+    g['purchase_rate'] = g['first_purchase'] / _nonzero(g['installs'])
+    g['repeat_rate'] = g['repeat_purchase'] / _nonzero(g['first_purchase'])
+    for c in ('avg_position', 'conversion_rate'):
+        g[c] = g.pop(f'{c}_sum') / g.pop(f'{c}_n')
+    return g
+
+
+def top_k(scores, k) -> np.ndarray:
+    """
+    Positions of the k largest scores, largest first (ties by position), via
+    np.argpartition: O(n) plus a sort of the k chosen. NaN scores are never chosen.
+    Which of several rows tied at the k-th score gets in is unspecified.
+    """
+    scores = np.asarray(scores, float)
+    nan = np.isnan(scores)
+    pool = np.flatnonzero(~nan) if nan.any() else np.arange(len(scores))
+    if 0 < k < len(pool):
+        pool = np.sort(pool[np.argpartition(-scores[pool], k - 1)[:k]])
+    elif k <= 0:
+        pool = pool[:0]
+    return pool[np.argsort(-scores[pool], kind='stable')]
+
+
+def top_keywords(df, k=20, by=None) -> pd.DataFrame:
+    """
+    The k rows with the highest SEO score (column SEO_Score), overall or per value of
+    `by` (e.g. 'seo_category' or 'channel').
+    """
+    scores = seo_scores(df)
+    if by is None:
+        idx = top_k(scores, k)
+    else:
+        codes, uniques = _codes(df[by])
+        # stable argsort of 16-bit ints is a radix sort: rows grouped by label in O(n)
+        order = np.argsort(codes.astype(np.int16 if len(uniques) < 2**15 else np.int64), kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))  # missing labels (-1) sort first
+        idx = np.concatenate([order[lo:hi][top_k(scores[order[lo:hi]], k)]
+                              for lo, hi in zip(bounds[:-1], bounds[1:])] or [np.array([], int)])
+    return df.iloc[idx].assign(SEO_Score=scores[idx])
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--workbook', default=str(WORKBOOK))
+    ap.add_argument('--top', type=int, default=10)
+    ap.add_argument('--refresh', action='store_true', help='re-parse the workbook even if cached')
+    args = ap.parse_args()
+    df = load_workbook(args.workbook, refresh=args.refresh)
+    for level, g in funnel_metrics(df).items():
+        print(f"\n{level}:\n", g[['spend_usd', 'revenue_usd', 'first_purchase', 'CAC', 'ROAS', 'seo_score']]
+              .sort_values('ROAS', ascending=False).head(args.top).round(2).to_string())
+    print(f"\nTop {args.top} SEO opportunities:\n", top_keywords(df, args.top)[
+        ['campaign_id', 'seo_category', 'monthly_search_volume', 'avg_position', 'conversion_rate', 'SEO_Score']
+    ].to_string(index=False))
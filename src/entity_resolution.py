@@ -0,0 +1,193 @@
+# src/entity_resolution.py
+"""
+Cross-platform entity resolution: links the Android and iOS rows of the same app and
+assigns every row a canonical `app_entity_id`.
+
+  1. normalize names (lowercase, punctuation and store taglines stripped) and
+     publishers (legal suffixes such as Inc/LLC/Ltd dropped)
+  2. blocking: android and ios rows are only compared when they share a block key,
+     a prefix of the first name token. Blocks whose android x ios product exceeds
+     MAX_BLOCK_PAIRS are split further by prefixes of the following tokens, so the
+     number of candidate pairs stays near-linear in the row count instead of
+     n_android x n_ios
+  3. scoring: weighted name / publisher / category similarity; pairs over the
+     threshold are matched one-to-one, best score first
+  4. rows with the same normalized name+publisher, plus every matched pair, are joined
+     into connected components; a component's id is a hash of its smallest key, so ids
+     are stable across runs as long as the apps don't change. Rows whose name normalizes
+     to nothing (e.g. all non-Latin) are keyed by their raw platform/app_id/name/
+     publisher/category instead, so their ids don't depend on row order either
+
+The frame returned by resolve_entities() carries the counts in .attrs['entity_resolution'].
+"""
+import hashlib
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+PREFIX_LEN = 4
+MAX_KEY_TOKENS = 4
+MAX_BLOCK_PAIRS = 256
+THRESHOLD = 0.75
+WEIGHTS = {'name': 0.6, 'publisher': 0.3, 'category': 0.1}
+
+LEGAL_SUFFIXES = r'\b(?:inc|llc|ltd|limited|corp|corporation|co|company|gmbh|sa|ag|plc|pty|srl|bv|oy|ab)\b'
+TAGLINE = r'(?:\s+[-–—|]|\s*:)\s+.*$'  # "Netflix - Watch TV Shows" / "Netflix: Watch TV" -> "Netflix"
+
+
+def _ascii_lower(s: pd.Series) -> pd.Series:
+    s = s.fillna('').astype(str)
+    # decompose accents on the unique values only (names repeat a lot across rows)
+    codes, uniques = pd.factorize(s)
+    folded = pd.Index(uniques).map(
+        lambda v: unicodedata.normalize('NFKD', v).encode('ascii', 'ignore').decode() if not v.isascii() else v)
+    return pd.Series(np.asarray(folded, dtype=object)[codes], index=s.index).str.lower()
+
+
+def normalize_name(s: pd.Series) -> pd.Series:
+    # taglines go before accent folding, which would drop the en/em dashes
+    s = _ascii_lower(s.fillna('').astype(str).str.replace(TAGLINE, '', regex=True))
+    s = s.str.replace(r'&', ' and ', regex=False).str.replace(r'[^a-z0-9]+', ' ', regex=True)
+    return s.str.strip()
+
+
+def normalize_publisher(s: pd.Series) -> pd.Series:
+    s = _ascii_lower(s).str.replace(r'[^a-z0-9]+', ' ', regex=True)
+    s = s.str.replace(LEGAL_SUFFIXES, ' ', regex=True).str.replace(r'\s+', ' ', regex=True)
+    return s.str.strip()
+
+
+def normalize_category(s: pd.Series) -> pd.Series:
+    # the two stores use different taxonomies ("game" / "Games", "social" / "Social
+    # Networking"); comparing the singular first word catches the common overlaps
+    first = _ascii_lower(s).str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip().str.split(' ').str[0]
+    return first.fillna('').str.replace(r's$', '', regex=True)
+
+
+def block_keys(names: pd.Series, platform: pd.Series, max_block_pairs: int = MAX_BLOCK_PAIRS) -> pd.Series:
+    """
+    Token-prefix block key per row ('' for rows that can't be blocked). Rows in blocks
+    whose android x ios product is over max_block_pairs get the next token's prefix
+    appended, up to MAX_KEY_TOKENS tokens.
+    """
+    tokens = names.str.split(' ', n=MAX_KEY_TOKENS)
+    keys = tokens.str[0].fillna('').str[:PREFIX_LEN]
+    blockable = keys != ''
+    is_ios = (platform == 'ios').to_numpy()
+    for level in range(1, MAX_KEY_TOKENS):
+        sizes = pd.DataFrame({'k': keys, 'ios': is_ios}).groupby('k')['ios'].agg(['sum', 'size'])
+        product = sizes['sum'] * (sizes['size'] - sizes['sum'])
+        oversized = keys.isin(product.index[product > max_block_pairs])
+        if not oversized.any():
+            break
+        keys = keys.where(~oversized, keys + ' ' + tokens.str[level].fillna('').str[:PREFIX_LEN])
+    return keys.where(blockable, '')
+
+
+def candidate_pairs(keys: pd.Series, platform: pd.Series) -> pd.DataFrame:
+    """(android row, ios row) positions that share a block key."""
+    pos = pd.DataFrame({'key': keys.to_numpy(), 'pos': np.arange(len(keys))})
+    pos = pos[pos['key'] != '']
+    is_ios = (platform.to_numpy() == 'ios')[pos['pos'].to_numpy()]
+    pairs = pos[~is_ios].merge(pos[is_ios], on='key', suffixes=('_a', '_i'))
+    return pairs[['pos_a', 'pos_i']].reset_index(drop=True)
+
+
+def _jaccard(left, right) -> np.ndarray:
+    # token sets are built once per distinct string, then looked up per pair
+    sets = {v: frozenset(v.split()) for v in set(left) | set(right)}
+    out = np.empty(len(left))
+    for i, (a, b) in enumerate(zip(left, right)):
+        sa, sb = sets[a], sets[b]
+        union = len(sa | sb)
+        out[i] = len(sa & sb) / union if union else 0.0
+    return out
+
+
+def score_pairs(pairs, name, publisher, category, weights=WEIGHTS) -> np.ndarray:
+    a, i = pairs['pos_a'].to_numpy(), pairs['pos_i'].to_numpy()
+    name, publisher, category = (np.asarray(x, dtype=object) for x in (name, publisher, category))
+    name_sim = np.where(name[a] == name[i], 1.0, _jaccard(name[a], name[i]))
+    pa, pi = publisher[a], publisher[i]
+    # a missing publisher is neither evidence for nor against a match
+    pub_sim = np.where((pa == '') | (pi == ''), 0.5,
+                       np.where(pa == pi, 1.0, _jaccard(pa, pi)))
+    cat_sim = (category[a] == category[i]) & (category[a] != '')
+    score = weights['name'] * name_sim + weights['publisher'] * pub_sim + weights['category'] * cat_sim
+    return np.where(name_sim >= 0.5, score, 0.0)
+
+
+def _one_to_one(pairs: pd.DataFrame) -> pd.DataFrame:
+    """Greedy best-first matching: each row keeps at most one partner on the other store."""
+    ranked = pairs.sort_values('score', ascending=False, kind='stable')
+    # a pair is taken only if neither side was taken by a better one; dropping
+    # duplicates per column instead would let a pair lost on the android side still
+    # block the ios row's next-best partner
+    used_a, used_i = set(), set()
+    keep = np.zeros(len(ranked), dtype=bool)
+    for k, (a, i) in enumerate(zip(ranked['pos_a'].tolist(), ranked['pos_i'].tolist())):
+        if a not in used_a and i not in used_i:
+            used_a.add(a)
+            used_i.add(i)
+            keep[k] = True
+    return ranked[keep].reset_index(drop=True)
+
+
+def _content_keys(df: pd.DataFrame, rows: np.ndarray) -> pd.Series:
+    """Exact key for rows with no usable name, from their raw values only."""
+    parts = [df[c].iloc[rows].astype(object).fillna('').astype(str).to_numpy(dtype=object)
+             for c in ('platform', 'app_id', 'app_name', 'publisher', 'category') if c in df]
+    return pd.Series(['#' + '|'.join(v) for v in zip(*parts)], index=rows, dtype=object)
+
+
+def resolve_entities(df: pd.DataFrame, threshold: float = THRESHOLD,
+                     max_block_pairs: int = MAX_BLOCK_PAIRS) -> pd.DataFrame:
+    """
+    Return a copy of `df` (needs platform/app_name; publisher/category optional) with
+    an `app_entity_id` column shared by the rows that describe the same app.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    df = df.copy()
+    n = len(df)
+    platform = df['platform'].astype(str).reset_index(drop=True)
+    name = normalize_name(df['app_name']).reset_index(drop=True)
+    publisher = normalize_publisher(df['publisher'] if 'publisher' in df else pd.Series('', index=df.index))
+    publisher = publisher.reset_index(drop=True)
+    category = normalize_category(df['category'] if 'category' in df else pd.Series('', index=df.index))
+    category = category.reset_index(drop=True)
+
+    keys = block_keys(name, platform, max_block_pairs)
+    pairs = candidate_pairs(keys, platform)
+    pairs['score'] = score_pairs(pairs, name, publisher, category)
+    matched = _one_to_one(pairs[pairs['score'] >= threshold])
+
+    # edges: every row to the first row with the same exact key, plus the matched pairs
+    exact = name + '|' + publisher
+    blank = np.flatnonzero((name == '').to_numpy())
+    exact.iloc[blank] = _content_keys(df, blank)
+    codes, _ = pd.factorize(exact)
+    _, first_pos = np.unique(codes, return_index=True)
+    rows = np.concatenate([np.arange(n), matched['pos_a'].to_numpy()])
+    cols = np.concatenate([first_pos[codes], matched['pos_i'].to_numpy()])
+    graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    # smallest key per component, via the sorted factorization (a string min is slow)
+    ranks, keys_sorted = pd.factorize(exact, sort=True)
+    first_rank = pd.Series(ranks).groupby(labels).transform('min').to_numpy()
+    codes, uniques = pd.factorize(keys_sorted.to_numpy()[first_rank])
+    ids = np.array([hashlib.blake2b(k.encode('utf-8'), digest_size=8).hexdigest() for k in uniques], dtype=object)
+    df['app_entity_id'] = ids[codes]
+
+    n_ios = int((platform == 'ios').sum())
+    df.attrs['entity_resolution'] = {
+        'rows': n,
+        'entities': int(len(uniques)),
+        'naive_pairs': (n - n_ios) * n_ios,
+        'candidate_pairs': len(pairs),
+        'matched_pairs': len(matched),
+    }
+    return df
@@ -0,0 +1,85 @@
+# src/growth.py
+"""
+Time-window growth analytics from a one-off date index.
+
+GrowthIndex sorts the rows once by (category, last_updated). Every later question
+("apps updated in the last 30/90/180/365 days", "the same ratio every week for a year")
+is a batch of searchsorted lookups against that array, with no pass over the rows.
+
+    idx = GrowthIndex(df)
+    idx.growth([30, 90, 180, 365])          # category x window matrix of recent ratios
+    idx.history(window_days=90)             # as-of date x category, one row per week
+
+The as-of date defaults to the newest last_updated in the data, not the wall clock,
+so a rerun on the same data gives the same answer. It is stored on the index as
+`as_of`.
+"""
+import numpy as np
+import pandas as pd
+
+
+class GrowthIndex:
+    def __init__(self, df: pd.DataFrame, by: str = 'category', date_col: str = 'last_updated',
+                 as_of=None):
+        codes, self.categories = pd.factorize(df[by], sort=True)
+        dates = pd.to_datetime(df[date_col], errors='coerce').to_numpy('datetime64[ns]')
+        valid = (codes >= 0) & ~np.isnat(dates)
+        k = len(self.categories)
+
+        # rows without a date still count towards a category's total, as in detect_growth
+        self.undated = np.bincount(codes[(codes >= 0) & np.isnat(dates)], minlength=k)
+
+        # composite key category * (D + 1) + rank of the date among the D distinct dates:
+        # one sorted int64 array answers "rows of category c dated <= x" for any (c, x)
+        self.dates, rank = np.unique(dates[valid].view('int64'), return_inverse=True)
+        self._stride = len(self.dates) + 1
+        self._keys = np.sort(codes[valid].astype(np.int64) * self._stride + rank)
+        self.rows = len(df)
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else (
+            pd.Timestamp(self.dates[-1]) if len(self.dates) else pd.Timestamp.now().normalize())
+
+    def _count_before(self, ts, inclusive: bool) -> np.ndarray:
+        """categories x len(ts) matrix of rows dated < ts (<= ts if inclusive)."""
+        ts = pd.DatetimeIndex(np.atleast_1d(ts)).as_unit('ns').asi8
+        rank = np.searchsorted(self.dates, ts, side='right' if inclusive else 'left')
+        base = np.arange(len(self.categories), dtype=np.int64)[:, None] * self._stride
+        pos = np.searchsorted(self._keys, base + rank[None, :], side='left')
+        return pos - np.searchsorted(self._keys, base, side='left')
+
+    def counts(self, start, end) -> np.ndarray:
+        """categories x windows: rows with start[j] <= last_updated <= end[j]."""
+        return self._count_before(end, inclusive=True) - self._count_before(start, inclusive=False)
+
+    def totals(self, as_of=None) -> np.ndarray:
+        """categories x as-of dates: rows dated <= as_of, plus rows with no date."""
+        as_of = self.as_of if as_of is None else as_of
+        return self._count_before(as_of, inclusive=True) + self.undated[:, None]
+
+    def growth(self, windows=(30, 90, 180, 365), as_of=None, metric: str = 'ratio') -> pd.DataFrame:
+        """
+        Category x window matrix for windows ending at `as_of` (default self.as_of):
+        metric='count' gives rows updated within the window, 'ratio' (the default) gives
+        recent / (total + 1) rounded to 3 places, as detect_growth.
+        """
+        as_of = pd.Timestamp(self.as_of if as_of is None else as_of)
+        windows = list(windows)
+        starts = [as_of - pd.Timedelta(days=w) for w in windows]
+        recent = self.counts(starts, [as_of] * len(windows))
+        values = recent if metric == 'count' else (recent / (self.totals(as_of) + 1)).round(3)
+        out = pd.DataFrame(values, index=pd.Index(self.categories, name='category'),
+                           columns=pd.Index([f'{w}d' for w in windows], name='window'))
+        out.attrs['as_of'] = as_of
+        return out
+
+    def history(self, window_days: int = 90, periods: int = 52, freq: str = '7D',
+                as_of=None, metric: str = 'ratio') -> pd.DataFrame:
+        """
+        One row per as-of date, one column per category: `periods` dates `freq` apart
+        ending at as_of (an anchored freq such as 'W-SUN' ends at the last anchor instead).
+        """
+        end = pd.Timestamp(self.as_of if as_of is None else as_of)
+        as_ofs = pd.date_range(end=end, periods=periods, freq=freq)
+        recent = self.counts(as_ofs - pd.Timedelta(days=window_days), as_ofs)
+        values = recent if metric == 'count' else (recent / (self.totals(as_ofs) + 1)).round(3)
+        return pd.DataFrame(values.T, index=pd.Index(as_ofs, name='as_of'),
+                            columns=pd.Index(self.categories, name='category'))
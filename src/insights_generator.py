@@ -1,47 +1,68 @@
 
+import argparse
+import hashlib
 import json
-import os
 from pathlib import Path
 import pandas as pd
 
-# Third-party imports first
-import openai
+import instrument
+from confidence import compute_confidence_vec
+from analytics import category_summary
+from llm_client import SYSTEM_PROMPT, LLMClient, StubClient
+from stats_engine import category_fingerprints, category_stats
+from storage import read_table
 
-from confidence import compute_confidence, cohen_d
-from analytics import category_summary, detect_growth, significance_of_rating_diff
-
-# Load API key from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise EnvironmentError("OPENAI_API_KEY not found in environment variables.")
+OUTPUT = Path("outputs/insights_debug.json")
 
-# Set API key
-openai.api_key = OPENAI_API_KEY
+PROMPT_TEMPLATE = """
+        Summarize top actionables for category "{cat}" based on stats:
+        apps={apps}, avg_rating={avg_rating}, 
+        median_price={median_price}, total_reviews={total_reviews}.
+        Return JSON keys: recommendations, hypothesis, product_idea.\
+        """
+# stored with each insight: a changed prompt invalidates the insights it produced
+PROMPT_HASH = hashlib.sha256((SYSTEM_PROMPT + PROMPT_TEMPLATE).encode("utf-8")).hexdigest()[:16]
 
-OUTPUT = Path("outputs/insights_debug.json")
+_llm = None
 
 
-def llm_summarize(prompt: str, model: str = "gpt-4o-mini") -> dict:
-    try:
-        response = openai.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an AI market analyst."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=800,
-            temperature=0.2
-        )
-        text = response.choices[0].message.content
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            return {"raw": text}
-    except Exception as e:
-        return {"error": str(e)}
+def default_llm() -> LLMClient:
+    # created on first use; the OpenAI key is only required once a request is actually sent
+    global _llm
+    if _llm is None:
+        _llm = LLMClient()
+    return _llm
 
 
-def generate_insights(df: pd.DataFrame):
+@instrument.timed(rows=False)
+def llm_summarize(prompt: str, model: str = "gpt-4o-mini") -> dict:
+    return default_llm().with_model(model).summarize(prompt)
+
+
+def load_previous_insights(path=OUTPUT) -> dict:
+    """{category: insight} from an earlier run, for insights that carry a fingerprint."""
+    if not Path(path).exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        previous = json.load(f).get("insights", [])
+    return {ins["category"]: ins for ins in previous if ins.get("fingerprint")}
+
+
+@instrument.timed(rows=False)
+def generate_insights(df: pd.DataFrame, llm: LLMClient | None = None, batch_size: int = 1,
+                      incremental: bool = False):
+    """
+    Category profiles for the top 10 categories. LLM summaries for all of them are
+    requested together through `llm` (cached, concurrent; batch_size > 1 packs that many
+    categories into one request).
+
+    incremental=True reuses the insight stored in OUTPUT for every category whose rows
+    hash to the same fingerprint as last time and whose answer came from the same LLM
+    backend, model, temperature and prompt template; only the other categories get new
+    stats, confidence and LLM output, and the result is merged back into OUTPUT.
+    """
+    llm = llm or default_llm()
+    instrument.count(rows=len(df))
     print("✅ Loaded dataset with columns:", df.columns.tolist())
     print("Categories count:\n", df["category"].value_counts())
 
@@ -49,39 +70,49 @@ def generate_insights(df: pd.DataFrame):
     cat_summary = category_summary(df).head(10)
     print("Category summary (top 10):\n", cat_summary)
 
+    fingerprints = category_fingerprints(df)
+    llm_meta = {**llm.identity(), "prompt": PROMPT_HASH}
+    previous = load_previous_insights() if incremental else {}
+    # an insight whose LLM call failed, or that another backend/model/prompt wrote
+    # (e.g. a --stub-llm run), is asked again even if its rows did not change
+    reused = {cat: ins for cat, ins in previous.items()
+              if cat in set(cat_summary["category"]) and ins["fingerprint"] == fingerprints.get(cat)
+              and ins.get("llm_meta") == llm_meta
+              and not (isinstance(ins.get("llm"), dict) and "error" in ins["llm"])}
+    if incremental:
+        print(f"Incremental run: reusing {len(reused)} unchanged categories")
+
+    # per-category moments, effect sizes and Welch p-values vs the mode category, in one pass
+    cat_stats = category_stats(df) if len(reused) < len(cat_summary) else None
+    now = pd.Timestamp.now()
+    if cat_stats is not None:
+        freshness_days = (now - cat_stats["last_updated"].fillna(now)).dt.days
+        cat_stats["confidence"] = compute_confidence_vec(
+            n=cat_stats["n"],
+            p_value=cat_stats["p"],
+            effect_size=cat_stats["cohen_d"],
+            freshness_days=freshness_days,
+        )
+
     for _, row in cat_summary.iterrows():
         cat = row["category"]
-        cat_ratings = df[df["category"] == cat]["rating"].dropna()
-        global_ratings = df["rating"].dropna()
+        if cat in reused:
+            insights.append(reused[cat])
+            continue
+        s = cat_stats.loc[cat]
 
         print(f"\nProcessing category: {cat}")
-        print(f"Number of apps in category: {len(cat_ratings)}")
+        print(f"Number of apps in category: {s['n']}")
 
-        if len(cat_ratings) < 2:
+        if s["n"] < 2:
             print(f"Skipping category {cat} due to too few ratings.")
             continue
 
-        d = cohen_d(cat_ratings.values, global_ratings.values)
-        sig = significance_of_rating_diff(df, cat, df["category"].mode()[0])
-
-        last_update = pd.to_datetime(df[df["category"] == cat]["last_updated"].dropna().max()) \
-            if df[df["category"] == cat]["last_updated"].notna().any() else pd.Timestamp.now()
-        freshness_days = (pd.Timestamp.now() - last_update).days
-
-        conf = compute_confidence(
-            n=len(cat_ratings),
-            p_value=sig.get("p", 0.05),
-            effect_size=d,
-            freshness_days=freshness_days,
-        )
+        conf = float(s["confidence"])
 
-        prompt = f"""
-        Summarize top actionables for category "{cat}" based on stats:
-        apps={int(row.get('apps',0))}, avg_rating={row.get('avg_rating',0)}, 
-        median_price={row.get('median_price',0)}, total_reviews={row.get('total_reviews',0)}.
-        Return JSON keys: recommendations, hypothesis, product_idea.\
-        """
-        llm_json = llm_summarize(prompt)
+        prompt = PROMPT_TEMPLATE.format(cat=cat, apps=int(row.get('apps',0)), avg_rating=row.get('avg_rating',0),
+                                        median_price=row.get('median_price',0),
+                                        total_reviews=row.get('total_reviews',0))
 
          # Then append to insights
         insights.append({
@@ -89,23 +120,41 @@ def generate_insights(df: pd.DataFrame):
         "type": "category_profile",
         "category": cat,
         "metrics": row.to_dict(),
-        "llm": llm_json,
+        "llm": prompt,  # replaced by the LLM answer below
         "confidence": conf,
+        "fingerprint": fingerprints[cat],
+        "llm_meta": llm_meta,
     })
 
+    fresh = [ins for ins in insights if ins["category"] not in reused]
+    answers = llm.summarize_many({ins["insight_id"]: ins["llm"] for ins in fresh}, batch_size=batch_size)
+    for ins in fresh:
+        ins["llm"] = answers[ins["insight_id"]]
+    llm_stats = llm.stats.as_dict()
+    print("LLM stats:", llm_stats)
+
     OUTPUT.parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT, "w", encoding="utf-8") as f:
-        json.dump({"generated_at": str(pd.Timestamp.now()), "insights": insights}, f, indent=2)
+        json.dump({"generated_at": str(pd.Timestamp.now()), "llm_stats": llm_stats,
+                   "reused": sorted(reused), "insights": insights}, f, indent=2)
 
     print(f"\n✅ Saved debug insights to {OUTPUT}")
     print(f"Total insights generated: {len(insights)}")
     return insights
 
 
-if __name__ == "__main__":
-    csv_path = "outputs/clean_dataset.csv"
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"{csv_path} not found!")
+def main(batch_size=1, stub_llm=False, incremental=False, dataset="outputs/clean_dataset"):
+    # outputs/clean_dataset.parquet (or .feather/.csv); raises FileNotFoundError if missing
+    df = read_table(dataset)
+    # stub answers stay out of the shared response cache
+    return generate_insights(df, llm=LLMClient(client=StubClient(), cache=False) if stub_llm else None,
+                             batch_size=batch_size, incremental=incremental)
+
 
-    df = pd.read_csv(csv_path)
-    generate_insights(df)
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch-size", type=int, default=1, help="categories per LLM request")
+    ap.add_argument("--stub-llm", action="store_true", help="offline run against llm_client.StubClient")
+    ap.add_argument("--incremental", action="store_true", help="only recompute categories whose rows changed")
+    args = ap.parse_args()
+    main(batch_size=args.batch_size, stub_llm=args.stub_llm, incremental=args.incremental)
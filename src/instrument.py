@@ -0,0 +1,245 @@
+# src/instrument.py
+"""
+Opt-in timing and counters for the pipeline's hot paths.
+
+Enable with MARKET_INTEL_PROFILE=1 (or enable(), or `pipeline.py --profile`). Each
+instrumented call then appends one JSON line to MARKET_INTEL_PROFILE_OUT (default
+outputs/.profile/events.jsonl) with wall/CPU time and whatever it counted: rows,
+bytes_read/bytes_written, tokens, cache_hits/cache_misses. Counts from nested calls
+roll up into the enclosing span, so a stage's line includes what its helpers did.
+
+    @instrument.timed()                       # rows = len(result) when it has one
+    def standardize(df): ...
+
+    with instrument.span("load") as sp:       # or an explicit block
+        sp.add(rows=len(df))
+    instrument.count(bytes_read=n)            # onto the innermost open span
+
+MARKET_INTEL_PROFILE_STAGE=<span name> additionally records cProfile stats and a
+tracemalloc snapshot for that span (first call per process), written next to the
+events file. Disabled, a decorated call costs one flag check.
+
+    python src/instrument.py summary [outputs/.profile/events.jsonl]
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+ENV_ENABLED = "MARKET_INTEL_PROFILE"
+ENV_OUT = "MARKET_INTEL_PROFILE_OUT"
+ENV_STAGE = "MARKET_INTEL_PROFILE_STAGE"
+DEFAULT_OUT = "outputs/.profile/events.jsonl"
+COUNTERS = ("rows", "bytes_read", "bytes_written", "tokens", "cache_hits", "cache_misses")
+
+_enabled = os.getenv(ENV_ENABLED, "0") == "1"
+_out = Path(os.getenv(ENV_OUT, DEFAULT_OUT))
+_profile_stage = os.getenv(ENV_STAGE) or None
+_profiled = False
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def enable(out=None, profile_stage=None):
+    """Turn recording on for this process and, through the environment, for its children."""
+    global _enabled, _out, _profile_stage
+    _enabled = True
+    _out = Path(out or os.getenv(ENV_OUT, DEFAULT_OUT))
+    _profile_stage = profile_stage or _profile_stage
+    os.environ[ENV_ENABLED] = "1"
+    os.environ[ENV_OUT] = str(_out)
+    if _profile_stage:
+        os.environ[ENV_STAGE] = _profile_stage
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    os.environ[ENV_ENABLED] = "0"
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _Span:
+    __slots__ = ("name", "counts", "fields", "_t0", "_c0", "_profiler")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._profiler = None
+
+    def add(self, **counts):
+        for k, v in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + (v or 0)
+
+    def __enter__(self):
+        global _profiled
+        _stack().append(self)
+        if _profile_stage == self.name and not _profiled:
+            import cProfile
+            import tracemalloc
+            _profiled = True
+            tracemalloc.start(25)
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall, cpu = time.perf_counter() - self._t0, time.process_time() - self._c0
+        stack = _stack()
+        stack.pop()
+        if stack:  # roll counts up into the caller's span
+            stack[-1].add(**self.counts)
+        event = {
+            "name": self.name, "pid": os.getpid(), "ts": round(time.time(), 3),
+            "wall_s": round(wall, 6), "cpu_s": round(cpu, 6),
+            "parent": stack[-1].name if stack else None,
+            **{k: v for k, v in self.counts.items() if v},
+            **self.fields,
+        }
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        if self._profiler is not None:
+            event.update(_dump_profile(self.name, self._profiler))
+        _write(event)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def span(name: str, **fields):
+    """Context manager recording one event named `name` (extra fields go into the event)."""
+    return _Span(name, fields) if _enabled else _NULL
+
+
+def count(**counts):
+    """Add counters to the innermost open span of this thread (no-op when disabled or outside a span)."""
+    if _enabled:
+        stack = _stack()
+        if stack:
+            stack[-1].add(**counts)
+
+
+def _auto_rows(result):
+    shape = getattr(result, "shape", None)
+    if shape:
+        return shape[0]
+    if isinstance(result, (list, dict, tuple)):
+        return len(result)
+    return 0
+
+
+def timed(name=None, rows=None):
+    """
+    Decorator form of span(). rows=None counts len(result) when the result has one,
+    a callable computes it from the result, rows=False records none.
+    """
+    def wrap(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, {}) as sp:
+                result = fn(*args, **kwargs)
+                if rows is not False:
+                    sp.add(rows=rows(result) if callable(rows) else _auto_rows(result))
+                return result
+        return wrapper
+    return wrap
+
+
+def _write(event):
+    line = json.dumps(event, default=str) + "\n"
+    with _write_lock:
+        _out.parent.mkdir(parents=True, exist_ok=True)
+        with open(_out, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _dump_profile(name, profiler) -> dict:
+    import pstats
+    import tracemalloc
+
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stem = _out.parent / f"{name.replace(':', '_').replace('/', '_')}-{os.getpid()}"
+    _out.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(f"{stem}.prof")
+    with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        f.write(f"\ntracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB; top allocations:\n")
+        for stat in snapshot.statistics("lineno")[:25]:
+            f.write(f"{stat}\n")
+    return {"profile": f"{stem}.prof", "profile_report": f"{stem}.txt", "traced_peak_mb": round(peak / 1e6, 1)}
+
+
+def load_events(path=None) -> list:
+    path = Path(path or _out)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summary(events) -> list:
+    """Per-name totals: calls, wall/cpu seconds and every counter, slowest first."""
+    agg = {}
+    for e in events:
+        a = agg.setdefault(e["name"], {"name": e["name"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                       **dict.fromkeys(COUNTERS, 0)})
+        a["calls"] += 1
+        a["wall_s"] += e.get("wall_s", 0.0)
+        a["cpu_s"] += e.get("cpu_s", 0.0)
+        for k in COUNTERS:
+            a[k] += e.get(k, 0)
+    return sorted(agg.values(), key=lambda a: -a["wall_s"])
+
+
+def format_summary(rows) -> str:
+    cols = ["name", "calls", "wall_s", "cpu_s", *COUNTERS]
+    cells = [[r["name"], str(r["calls"]), f"{r['wall_s']:.3f}", f"{r['cpu_s']:.3f}",
+              *(f"{r[k]:,}" for k in COUNTERS)] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) if cells else len(c) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(cols, widths)))]
+    lines += ["  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths)))
+              for row in cells]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "summary":
+        print("usage: instrument.py summary [events.jsonl]")
+        sys.exit(1)
+    print(format_summary(summary(load_events(sys.argv[2] if len(sys.argv) > 2 else None))))
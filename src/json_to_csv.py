@@ -1,36 +1,112 @@
 # src/json_to_csv.py
+import argparse
 import json
 import pandas as pd
 from pathlib import Path
 
+from merge_normalize import _app_info, app_fields
+from storage import TableWriter, artifact
+
 INPUT_FILE = Path("outputs/all_apps.json")
-OUTPUT_FILE = Path("outputs/clean_dataset.csv")
-
-if not INPUT_FILE.exists():
-    raise FileNotFoundError(f"{INPUT_FILE} not found. Run appstore_fetch.py first.")
-
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    all_apps = json.load(f)
-
-# Flatten JSON into a list of dictionaries
-rows = []
-for app_id, data in all_apps.items():
-    app_data = data.get("data", {})  # adjust if the JSON structure differs
-    row = {
-    "app_id": app_id,
-    "app_name": app_data.get("trackName") or app_data.get("name"),
-    "category": app_data.get("primaryGenreName"),
-    "rating": app_data.get("averageUserRating"),
-    "review_count": app_data.get("userRatingCount"),
-    "price_usd": app_data.get("price"),
-    "last_updated": app_data.get("currentVersionReleaseDate"),
-}
-
-    rows.append(row)
-
-df = pd.DataFrame(rows)
-
-# Save CSV
-OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"✅ Saved clean dataset to {OUTPUT_FILE}")
+NDJSON_FILE = Path("outputs/all_apps.ndjson")
+OUTPUT_FILE = artifact("outputs/clean_dataset")  # .parquet by default, as prepare_clean_dataset
+BATCH_ROWS = 50_000
+COLUMNS = ["app_id", "app_name", "category", "rating", "review_count", "price_usd", "last_updated"]
+
+
+def app_row(app_id, data: dict) -> dict:
+    # same field mapping as the App Store loader in merge_normalize (RapidAPI or iTunes shape)
+    fields = app_fields(_app_info(data) or {})
+    return {"app_id": app_id, **{c: fields[c] for c in COLUMNS[1:]}}
+
+
+def flatten(all_apps: dict) -> pd.DataFrame:
+    # Flatten JSON into a list of dictionaries
+    return pd.DataFrame([app_row(app_id, data) for app_id, data in all_apps.items()])
+
+
+def iter_records(infile):
+    """
+    (app_id, response) pairs from appstore_fetch output: NDJSON (.ndjson/.jsonl) is read
+    line by line; the legacy all_apps.json document has to be loaded whole.
+    """
+    infile = Path(infile)
+    if infile.suffix not in (".ndjson", ".jsonl"):
+        with open(infile, "r", encoding="utf-8") as f:
+            yield from json.load(f).items()
+        return
+    with open(infile, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # cut off by an interrupted fetch; the resumed fetch rewrites it
+            if line.strip():
+                record = json.loads(line)
+                yield record["app_id"], record["response"]
+
+
+def _frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    # nullable, so a batch with a missing count doesn't print the others as floats
+    df["review_count"] = pd.to_numeric(df["review_count"], errors="coerce").astype("Int64")
+    return df
+
+
+def iter_frames(infile, batch_rows=BATCH_ROWS):
+    """Flattened rows in DataFrames of batch_rows, so only one batch is in memory."""
+    rows = []
+    for app_id, data in iter_records(infile):
+        rows.append(app_row(app_id, data))
+        if len(rows) >= batch_rows:
+            yield _frame(rows)
+            rows = []
+    if rows:
+        yield _frame(rows)
+
+
+def convert(infile, outfile, batch_rows=BATCH_ROWS) -> int:
+    """
+    Stream `infile` into `outfile` batch by batch: a .csv is appended to directly,
+    .parquet/.feather go through storage.TableWriter. Returns the rows written.
+    """
+    outfile = Path(outfile)
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    if outfile.suffix == ".csv":
+        with open(outfile, "w", encoding="utf-8", newline="") as f:
+            for df in iter_frames(infile, batch_rows):
+                df.to_csv(f, index=False, header=rows == 0)
+                rows += len(df)
+            if rows == 0:
+                f.write("\n")  # as pd.DataFrame([]).to_csv()
+        return rows
+    with TableWriter(outfile) as w:
+        for df in iter_frames(infile, batch_rows):
+            w.write(df)
+    return w.rows
+
+
+def default_input() -> Path:
+    # whichever of the NDJSON and the legacy document a fetch wrote last
+    found = [p for p in (NDJSON_FILE, INPUT_FILE) if p.exists()]
+    return max(found, key=lambda p: p.stat().st_mtime_ns) if found else INPUT_FILE
+
+
+def main(infile=None, outfile=OUTPUT_FILE, batch_rows=BATCH_ROWS):
+    infile = Path(infile) if infile else default_input()
+    outfile = Path(outfile)
+    if not infile.exists():
+        raise FileNotFoundError(f"{infile} not found. Run appstore_fetch.py first.")
+    print(f"Reading {infile}")
+
+    rows = convert(infile, outfile, batch_rows)
+    print(f"✅ Saved clean dataset to {outfile} ({rows:,} rows)")
+    return rows
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("infile", nargs="?", help=f"default: the newer of {NDJSON_FILE} and {INPUT_FILE}")
+    ap.add_argument("outfile", nargs="?", default=str(OUTPUT_FILE), help=f".csv, .parquet or .feather (default: {OUTPUT_FILE})")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = ap.parse_args()
+    main(args.infile, args.outfile, args.batch_rows)
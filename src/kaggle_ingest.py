@@ -2,8 +2,13 @@
 import pandas as pd
 import numpy as np
 import re
+import argparse
+import tempfile
 from pathlib import Path
 
+import instrument
+from storage import TableWriter, artifact, write_table
+
 def parse_installs(x):
     if pd.isna(x): return np.nan
     x = str(x).strip().lower()
@@ -39,48 +44,197 @@ def parse_size(x):
     except:
         return np.nan
 
-def standardize(df):
-    df = df.copy()
-    # common column renames — adapt to actual CSV columns
-    col_map = {
-        'App':'app_name',
-        'Category':'category',
-        'Rating':'rating',
-        'Reviews':'review_count',
-        'Size':'size_bytes',
-        'Installs':'installs',
-        'Type':'type',
-        'Price':'price',
-        'Last Updated':'last_updated',
-        'Content Rating':'content_rating',
-        'Genres':'genres'
-    }
-    df.rename(columns={c:v for c,v in col_map.items() if c in df.columns}, inplace=True)
+# Vectorized equivalents of the parsers above. Raw columns have few distinct values
+# (Installs ~20, Price ~100, Size ~500 in the Kaggle dump), so each column is factorized,
+# the distinct strings are parsed with pandas .str ops + NumPy unit multipliers, and the
+# results are broadcast back with take(). Values the fast path cannot parse go through
+# the scalar parser, so output is identical to Series.apply(parse_*).
+SIZE_UNITS = {'k': 1024.0, 'M': 1024.0*1024, 'G': 1024.0*1024*1024}
+
+def _by_unique(s, parse_uniques, na_value):
+    codes, uniques = pd.factorize(s)
+    vals = parse_uniques(pd.Series(uniques, dtype=object)).to_numpy()
+    if (codes < 0).any():
+        vals = np.append(vals.astype(float), na_value)  # code -1 -> last slot
+    return pd.Series(vals.take(codes), index=s.index, name=s.name)
+
+def _fallback(u, out, todo, func):
+    if todo.any():
+        out = out.copy()
+        out[todo] = u[todo].map(func)
+    return out
+
+def _installs_uniques(u):
+    digits = u.astype(str).str.replace(r'[^\d]', '', regex=True)
+    out = pd.to_numeric(digits.where(digits != ''), errors='coerce')
+    return _fallback(u, out, out.isna() & (digits != ''), parse_installs)
+
+def _price_uniques(u):
+    cleaned = u.astype(str).str.replace(r'[^\d.]', '', regex=True)
+    out = pd.to_numeric(cleaned, errors='coerce').astype(float)
+    return _fallback(u, out, out.isna() & (cleaned != ''), parse_price).fillna(0.0)
+
+def _size_uniques(u):
+    txt = u.astype(str).str.strip()
+    varies = txt.str.lower().str.startswith('varies')
+    mult = txt.str[-1].map(SIZE_UNITS)
+    body = txt.str[:-1].where(mult.notna(), txt.str.replace(r'[^\d.]', '', regex=True))
+    out = pd.to_numeric(body.where(~varies), errors='coerce').astype(float) * mult.fillna(1.0).to_numpy()
+    return _fallback(u, out, out.isna() & ~varies, parse_size)
+
+def parse_installs_vec(s):
+    return _by_unique(s, _installs_uniques, np.nan)
+
+def parse_price_vec(s):
+    return _by_unique(s, _price_uniques, 0.0)
+
+def parse_size_vec(s):
+    return _by_unique(s, _size_uniques, np.nan)
+
+# common column renames — adapt to actual CSV columns
+COL_MAP = {
+    'App':'app_name',
+    'Category':'category',
+    'Rating':'rating',
+    'Reviews':'review_count',
+    'Size':'size_bytes',
+    'Installs':'installs',
+    'Type':'type',
+    'Price':'price',
+    'Last Updated':'last_updated',
+    'Content Rating':'content_rating',
+    'Genres':'genres'
+}
+
+def _parse_columns(df):
+    # numeric columns are always float so every chunk of a streamed file serializes alike
+    df.rename(columns={c:v for c,v in COL_MAP.items() if c in df.columns}, inplace=True)
+    if 'rating' in df.columns:
+        df['rating'] = pd.to_numeric(df['rating'], errors='coerce').astype(float)
     if 'installs' in df.columns:
-        df['installs'] = df['installs'].apply(parse_installs)
+        df['installs'] = parse_installs_vec(df['installs']).astype(float)
     if 'price' in df.columns:
-        df['price_usd'] = df['price'].apply(parse_price)
+        df['price_usd'] = parse_price_vec(df['price'])
     if 'size_bytes' in df.columns:
-        df['size_bytes'] = df['size_bytes'].apply(parse_size)
+        df['size_bytes'] = parse_size_vec(df['size_bytes'])
     if 'last_updated' in df.columns:
         df['last_updated'] = pd.to_datetime(df['last_updated'], errors='coerce')
-    # dedupe by (app_name, category) keeping highest reviews
     if 'app_name' in df.columns and 'review_count' in df.columns:
         df['review_count'] = pd.to_numeric(df['review_count'], errors='coerce').fillna(0).astype(int)
-        df.sort_values('review_count', ascending=False, inplace=True)
-        df = df.drop_duplicates(subset=['app_name','category'], keep='first')
-    # basic normalization
+    return df
+
+def _normalize(df):
     df['app_name'] = df['app_name'].astype(str).str.strip()
     df['category'] = df['category'].astype(str).str.lower()
     return df
 
-def main(infile='data/raw/googleplaystore.csv', outfile='outputs/clean_google_play.csv'):
+@instrument.timed()
+def standardize(df):
+    df = _parse_columns(df.copy())
+    # dedupe by (app_name, category) keeping highest reviews (earliest row on ties)
+    if 'app_name' in df.columns and 'review_count' in df.columns:
+        df.sort_values('review_count', ascending=False, inplace=True, kind='stable')
+        df = df.drop_duplicates(subset=['app_name','category'], keep='first')
+    # basic normalization
+    return _normalize(df)
+
+def _keep_max(idx):
+    # one row per key hash: highest review_count, earliest row on ties
+    return idx.sort_values(['rc', 'row'], ascending=[False, True], kind='stable').drop_duplicates('key')
+
+@instrument.timed(rows=False)
+def standardize_stream(infile, outfile, chunksize=250_000):
+    """
+    Bounded-memory equivalent of standardize() for CSVs too large to load at once;
+    writes the same file main() would. Memory is O(chunksize + distinct apps).
+
+    pass 1: read only the key columns and build a compact index
+            hash(app_name, category) -> (max review_count, row number); chunk winners
+            are buffered and folded into the index only once the buffer is as large
+            as the index, so the work stays linear in the number of rows
+    pass 2: re-read in chunks, keep the winning rows, standardize them and spill them
+            to bucket files by their final (review_count desc) position
+    pass 3: concatenate the buckets in order into outfile
+    """
+    header = pd.read_csv(infile, nrows=0).columns
+    renamed = {COL_MAP.get(c, c): c for c in header}
+    chunks = lambda **kw: pd.read_csv(infile, dtype=str, chunksize=chunksize, **kw)
+
+    if not {'app_name', 'review_count'} <= set(renamed):  # nothing to dedupe: single pass
+        with TableWriter(outfile) as out:
+            for chunk in chunks():
+                out.write(_normalize(_parse_columns(chunk)))
+        return
+
+    # pass 1
+    key_cols = [renamed[c] for c in ('app_name', 'category', 'review_count')]
+    idx = pd.DataFrame({'key': np.array([], np.uint64), 'rc': np.array([], np.int64), 'row': np.array([], np.int64)})
+    pending, n_pending, offset = [], 0, 0
+    for chunk in chunks(usecols=key_cols):
+        chunk = chunk.rename(columns=COL_MAP)
+        part = pd.DataFrame({
+            'key': pd.util.hash_pandas_object(chunk[['app_name', 'category']], index=False).to_numpy(),
+            'rc': pd.to_numeric(chunk['review_count'], errors='coerce').fillna(0).astype(int).to_numpy(),
+            'row': np.arange(offset, offset + len(chunk)),
+        })
+        offset += len(chunk)
+        pending.append(_keep_max(part))
+        n_pending += len(pending[-1])
+        if n_pending >= max(len(idx), chunksize):
+            idx, pending, n_pending = _keep_max(pd.concat([idx, *pending], ignore_index=True)), [], 0
+    idx = _keep_max(pd.concat([idx, *pending], ignore_index=True))
+
+    # idx is in output order; invert it to row number -> output position
+    win_rows = idx['row'].to_numpy()
+    by_row = np.argsort(win_rows)
+    win_rows, win_pos = win_rows[by_row], by_row
+    del idx
+
+    with tempfile.TemporaryDirectory(dir=Path(outfile).parent) as tmp:
+        # pass 2
+        offset, template = 0, None
+        for chunk in chunks():
+            rows = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+            at = np.minimum(np.searchsorted(win_rows, rows), len(win_rows) - 1)
+            hit = win_rows[at] == rows
+            part = _normalize(_parse_columns(chunk[hit].copy()))
+            if template is None:
+                template = part.iloc[:0]
+            part['_pos'] = win_pos[at[hit]]
+            for b, g in part.groupby(part['_pos'] // chunksize):
+                fn = Path(tmp) / f'{b}.csv'
+                g.to_csv(fn, mode='a', header=not fn.exists(), index=False)
+
+        # pass 3 ('' is the only NA marker in the spill files, so literal 'nan'/'NA' text survives)
+        n_buckets = -(-len(win_rows) // chunksize)
+        with TableWriter(outfile) as out:
+            if not n_buckets:
+                out.write(template)
+            for b in range(n_buckets):
+                g = pd.read_csv(Path(tmp) / f'{b}.csv', dtype=str, keep_default_na=False, na_values=[''])
+                g = g.iloc[np.argsort(g['_pos'].astype(np.int64).to_numpy())].drop(columns='_pos')
+                out.write(g)
+
+def main(infile='data/raw/googleplaystore.csv', outfile=None, chunksize=None):
+    """chunksize=None loads the whole file; an int switches to standardize_stream()."""
     Path('outputs').mkdir(exist_ok=True)
-    df = pd.read_csv(infile)
+    outfile = outfile or artifact('outputs/clean_google_play')
+    instrument.count(bytes_read=Path(infile).stat().st_size)
+    if chunksize:
+        standardize_stream(infile, outfile, chunksize=chunksize)
+        print("Saved:", outfile)
+        return None
+    df = pd.read_csv(infile, dtype=str)
     df_clean = standardize(df)
-    df_clean.to_csv(outfile, index=False)
+    write_table(df_clean, outfile)
     print("Saved:", outfile)
     return df_clean
 
 if __name__=='__main__':
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--infile', default='data/raw/googleplaystore.csv')
+    ap.add_argument('--outfile', default=None, help='.parquet/.feather/.csv (default: outputs/clean_google_play.<format>)')
+    ap.add_argument('--chunksize', type=int, default=None, help='stream the CSV in chunks of this many rows')
+    args = ap.parse_args()
+    main(args.infile, args.outfile, args.chunksize)
@@ -0,0 +1,240 @@
+# src/lake.py
+"""
+Out-of-core backend for the category aggregations: the combined dataset is kept as
+hive-partitioned Parquet (outputs/lake/platform=ios/category=games/part-0.parquet) and
+queried with DuckDB, which streams the files instead of loading them into pandas.
+
+  * partition pruning: filters on partition columns (platform, category, or a snapshot
+    date if the lake is partitioned by one) skip whole directories
+  * predicate and column pushdown: only the referenced columns are read, and Parquet
+    row-group statistics skip data outside a date range
+
+category_summary / detect_growth return the same frames as their analytics.py
+counterparts, which remain the reference: the grouping happens in SQL and the final
+rounding and ordering go through the same pandas code. top_candidates feeds
+dashboard_data.build_top_index.
+
+    python src/lake.py build outputs/clean_combined_apps          # -> outputs/lake
+    python src/lake.py summary --platform ios
+    python src/lake.py growth --window-days 90 --as-of 2018-08-08
+
+MARKET_INTEL_LAKE sets the default location, MARKET_INTEL_DUCKDB_MEMORY the DuckDB
+memory limit (beyond it, DuckDB spills to disk) and MARKET_INTEL_DUCKDB_THREADS its threads.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from analytics import finish_category_summary, finish_growth
+from storage import arrow_schema, coerce, iter_table
+
+LAKE_DIR = Path(os.getenv("MARKET_INTEL_LAKE", "outputs/lake"))
+PARTITION_BY = ("platform", "category")
+META = "_lake.json"
+MEMORY_LIMIT = os.getenv("MARKET_INTEL_DUCKDB_MEMORY", "2GB")
+THREADS = int(os.getenv("MARKET_INTEL_DUCKDB_THREADS", "0"))  # 0 = DuckDB's default
+DUCKDB_TYPES = {"string": "VARCHAR", "large_string": "VARCHAR", "date32[day]": "DATE",
+                "int64": "BIGINT", "int32": "INTEGER"}
+
+
+def write_partitioned(frames, root=LAKE_DIR, partition_by=PARTITION_BY, max_rows_per_file=2_000_000) -> dict:
+    """
+    Write a DataFrame, or an iterable of them (streamed, one chunk in memory at a time),
+    as a hive-partitioned Parquet dataset under `root`, replacing what was there.
+    Partition columns missing from the data are left out. Returns the lake metadata.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    frames = iter([frames] if isinstance(frames, pd.DataFrame) else frames)
+    first = coerce(next(frames))
+    schema = arrow_schema(first, dictionary=False)
+    partition_by = [c for c in partition_by if c in first.columns]
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        for df in _chain(first, frames):
+            rows += len(df)
+            yield from pa.Table.from_pandas(df, schema=schema, preserve_index=False).to_batches()
+
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    t0 = time.perf_counter()
+    ds.write_dataset(
+        batches(), root, schema=schema, format="parquet",
+        partitioning=ds.partitioning(pa.schema([schema.field(c) for c in partition_by]), flavor="hive"),
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        basename_template="part-{i}.parquet", max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=min(max_rows_per_file, 256_000), existing_data_behavior="overwrite_or_ignore",
+    )
+    meta = {
+        "rows": rows,
+        "partition_by": partition_by,
+        "hive_types": {c: DUCKDB_TYPES.get(str(schema.field(c).type), "VARCHAR") for c in partition_by},
+        "columns": schema.names,
+        "written_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "write_s": round(time.perf_counter() - t0, 3),
+    }
+    (root / META).write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+def _chain(first, rest):
+    yield first
+    for df in rest:
+        yield coerce(df)
+
+
+def build(artifact="outputs/clean_combined_apps", root=LAKE_DIR, partition_by=PARTITION_BY,
+          batch_rows=500_000) -> dict:
+    """Convert a storage artifact (any format) into a lake, streaming batch_rows at a time."""
+    return write_partitioned(iter_table(artifact, batch_rows=batch_rows), root, partition_by)
+
+
+def metadata(root=LAKE_DIR) -> dict:
+    path = Path(root) / META
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found; build the lake first (python src/lake.py build)")
+    return json.loads(path.read_text())
+
+
+def signature(root=LAKE_DIR) -> tuple:
+    """Changes whenever the lake is rewritten (the metadata file is written last)."""
+    st = os.stat(Path(root) / META)
+    return st.st_mtime_ns, st.st_size
+
+
+def connect():
+    import duckdb
+
+    con = duckdb.connect()
+    con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+    con.execute("SET enable_progress_bar = false")
+    if THREADS:
+        con.execute(f"SET threads = {THREADS}")
+    return con
+
+
+def _source(root) -> str:
+    meta = metadata(root)
+    glob = str(Path(root) / "**" / "*.parquet").replace("'", "''")
+    types = ", ".join(f"'{c}': '{t}'" for c, t in meta["hive_types"].items())
+    hive = f", hive_partitioning = true, hive_types = {{{types}}}" if types else ""
+    return f"read_parquet('{glob}'{hive})"
+
+
+def _where(filters, columns) -> tuple[list, list]:
+    """{'platform': 'ios', 'category': ['games', 'finance']} -> SQL clauses + parameters."""
+    clauses, params = [], []
+    for col, value in (filters or {}).items():
+        if col not in columns:
+            raise KeyError(f"Unknown column {col!r}; lake has {columns}")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        clauses.append(f'"{col}" IN ({", ".join("?" * len(values))})')
+        params += values
+    return clauses, params
+
+
+def query(sql: str, params=(), con=None) -> pd.DataFrame:
+    con = con or connect()
+    return con.execute(sql, list(params)).df()
+
+
+def _select(root, select, filters=None, where=(), params=(), group_by=None, tail="", con=None):
+    columns = metadata(root)["columns"]
+    clauses, fparams = _where(filters, columns)
+    clauses = list(where) + clauses
+    sql = (f"SELECT {select} FROM {_source(root)}"
+           + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+           + (f" GROUP BY {group_by}" if group_by else "") + tail)
+    return query(sql, list(params) + fparams, con)
+
+
+def count_rows(root=LAKE_DIR, filters=None, con=None) -> int:
+    return int(_select(root, "count(*) AS n", filters, con=con)["n"].iloc[0])
+
+
+def category_summary(root=LAKE_DIR, filters=None, con=None) -> pd.DataFrame:
+    """analytics.category_summary over the lake, optionally restricted by `filters`."""
+    con = con or connect()
+    columns = metadata(root)["columns"]
+    key = "app_entity_id" if "app_entity_id" in columns else "app_name"
+    # SUM over BIGINT is int128 in DuckDB; pandas keeps the column's own type
+    total = "CAST(coalesce(sum(review_count), 0) AS {})".format(
+        "BIGINT" if _is_integer(root, "review_count", con) else "DOUBLE")
+    g = _select(root, f"""category,
+                count(DISTINCT "{key}") AS apps,
+                avg(rating) AS avg_rating,
+                median(price_usd) AS median_price,
+                {total} AS total_reviews""",
+                filters, where=["category IS NOT NULL"], group_by="category", tail=" ORDER BY category", con=con)
+    return finish_category_summary(g)
+
+
+def _is_integer(root, column, con=None) -> bool:
+    kind = query(f'DESCRIBE SELECT "{column}" FROM {_source(root)}', con=con)["column_type"].iloc[0]
+    return kind in ("BIGINT", "INTEGER", "SMALLINT", "TINYINT")
+
+
+def detect_growth(root=LAKE_DIR, date_col="last_updated", window_days=90, as_of=None, filters=None,
+                  con=None) -> pd.DataFrame:
+    """analytics.detect_growth over the lake (one window ending at as_of, default now)."""
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now()
+    cut = as_of - pd.Timedelta(days=window_days)
+    d = f'"{date_col}"'
+    stats = _select(root, f"""category,
+                    count(*) FILTER (WHERE {d} >= ? AND {d} <= ?) AS recent_count,
+                    count(*) FILTER (WHERE {d} <= ? OR {d} IS NULL) AS total_count""",
+                    filters, where=["category IS NOT NULL"],
+                    params=[cut.to_pydatetime(), as_of.to_pydatetime(), as_of.to_pydatetime()],
+                    group_by="category", tail=" ORDER BY category", con=con)
+    return finish_growth(stats.set_index("category"))
+
+
+def top_candidates(root=LAKE_DIR, n=10, filters=None, con=None) -> pd.DataFrame:
+    """The n most-reviewed apps of each category (input for dashboard_data.build_top_index)."""
+    return _select(root, "category, app_name, rating, review_count, price_usd", filters,
+                   where=["category IS NOT NULL"],
+                   tail=f" QUALIFY row_number() OVER (PARTITION BY category ORDER BY review_count DESC NULLS LAST) <= {int(n)}"
+                        " ORDER BY category, review_count DESC NULLS LAST", con=con)
+
+
+def _filters(args) -> dict:
+    return {k: v for k, v in (("platform", args.platform), ("category", args.category)) if v}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="write an artifact as a partitioned lake")
+    b.add_argument("artifact", nargs="?", default="outputs/clean_combined_apps")
+    b.add_argument("--partition-by", nargs="+", default=list(PARTITION_BY))
+    b.add_argument("--batch-rows", type=int, default=500_000)
+    for name in ("summary", "growth"):
+        q = sub.add_parser(name)
+        q.add_argument("--platform", nargs="*")
+        q.add_argument("--category", nargs="*")
+        if name == "growth":
+            q.add_argument("--window-days", type=int, default=90)
+            q.add_argument("--as-of", default=None)
+    for p in sub.choices.values():
+        p.add_argument("--root", default=str(LAKE_DIR))
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        meta = build(args.artifact, args.root, args.partition_by, args.batch_rows)
+        print(f"✅ {meta['rows']:,} rows -> {args.root} (partitioned by {', '.join(meta['partition_by'])})")
+    elif args.cmd == "summary":
+        print(category_summary(args.root, _filters(args)).to_string(index=False))
+    else:
+        print(detect_growth(args.root, window_days=args.window_days, as_of=args.as_of,
+                            filters=_filters(args)).to_string(index=False))
+    print(f"({time.perf_counter() - t0:.2f}s)")
@@ -0,0 +1,301 @@
+# src/llm_client.py
+"""
+LLM access for the insights stage: bounded-concurrency calls with per-request timeouts,
+a persistent response cache keyed by (model, prompt hash, temperature), optional
+batching of several prompts into one structured-JSON request, and per-run stats
+(cache hit rate, tokens, wall time).
+
+Pass `client=StubClient()` to run everything offline.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import instrument
+from response_cache import ResponseCache
+
+SYSTEM_PROMPT = "You are an AI market analyst."
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/cache/llm.sqlite")
+CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "7"))
+CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+
+class MissingCredentials(EnvironmentError):
+    """No API key configured; raised on first use rather than at import."""
+
+
+@dataclass
+class RunStats:
+    requests: int = 0        # API round trips
+    cache_hits: int = 0
+    cache_misses: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    wall_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.hit_rate, 3),
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "wall_s": round(self.wall_s, 3),
+        }
+
+
+def _parse(text: str) -> dict:
+    # always a dict: valid JSON that isn't an object (123, "text", [...]) is kept as raw text
+    try:
+        result = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return {"raw": text}
+    return result if isinstance(result, dict) else {"raw": text}
+
+
+class LLMClient:
+    def __init__(self, client=None, model: str = DEFAULT_MODEL, temperature: float = 0.2,
+                 max_tokens: int = 800, timeout: float = TIMEOUT_S, max_workers: int = MAX_WORKERS,
+                 cache: ResponseCache | None | bool = True):
+        self._client = client
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        if cache is True:
+            cache = ResponseCache(CACHE_PATH, ttl=CACHE_TTL_DAYS * 86400 or None,
+                                  max_bytes=int(CACHE_MAX_MB * 1024 * 1024) or None)
+        self.cache = None if cache is None or cache is False else cache
+        self.stats = RunStats()
+
+    @property
+    def client(self):
+        # the OpenAI SDK is imported and the key checked only when a real call is made
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise MissingCredentials("OPENAI_API_KEY not found in environment variables.")
+            import openai
+            self._client = openai.OpenAI(api_key=api_key)
+        return self._client
+
+    @property
+    def backend(self) -> str:
+        """'openai' for the OpenAI SDK (also before it is created), else the client's class."""
+        kind = type(self._client)
+        if self._client is None or kind.__module__.startswith("openai"):
+            return "openai"
+        return f"{kind.__module__}.{kind.__qualname__}"
+
+    def with_model(self, model: str) -> "LLMClient":
+        """A client for `model` sharing this one's backend, settings and response cache."""
+        if model == self.model:
+            return self
+        return LLMClient(client=self._client, model=model, temperature=self.temperature,
+                         max_tokens=self.max_tokens, timeout=self.timeout, max_workers=self.max_workers,
+                         cache=self.cache)
+
+    def identity(self) -> dict:
+        """Everything besides the prompt that decides an answer."""
+        return {"backend": self.backend, "model": self.model, "temperature": self.temperature}
+
+    def cache_key(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        key = f"{self.model}:{self.temperature}:{digest}"
+        # answers from anything but the OpenAI SDK (StubClient, test doubles) never share its entries
+        if self.backend != "openai":
+            key = f"{self.backend}:{key}"
+        return key
+
+    def _complete(self, prompt: str, max_tokens: int, json_mode: bool = False) -> str:
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+            timeout=self.timeout,
+            **kwargs,
+        )
+        usage = getattr(response, "usage", None)
+        self.stats.add(requests=1,
+                       prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                       completion_tokens=getattr(usage, "completion_tokens", 0) or 0)
+        return response.choices[0].message.content
+
+    def _cached(self, prompt: str):
+        if self.cache is None:
+            return None
+        hit = self.cache.get(self.cache_key(prompt))
+        self.stats.add(cache_hits=hit is not None, cache_misses=hit is None)
+        return hit
+
+    def _store(self, prompt: str, result: dict):
+        # errors are never cached, so the next run retries them
+        if self.cache is not None and isinstance(result, dict) and "error" not in result:
+            self.cache.put(self.cache_key(prompt), result)
+
+    def _counters(self):
+        s = self.stats
+        return s.prompt_tokens + s.completion_tokens, s.cache_hits, s.cache_misses
+
+    def _count_since(self, before):
+        # worker threads have no open span, so usage is reported from the calling thread
+        tokens, hits, misses = (now - then for now, then in zip(self._counters(), before))
+        instrument.count(tokens=tokens, cache_hits=hits, cache_misses=misses)
+
+    def summarize(self, prompt: str) -> dict:
+        """One prompt -> parsed JSON dict ({"raw": text} if not a JSON object, {"error": ...} on failure)."""
+        t0 = time.perf_counter()
+        before = self._counters()
+        try:
+            hit = self._cached(prompt)
+            if hit is not None:
+                return hit
+            try:
+                result = _parse(self._complete(prompt, self.max_tokens))
+            except MissingCredentials:
+                raise
+            except Exception as e:
+                self.stats.add(errors=1)
+                return {"error": str(e)}
+            self._store(prompt, result)
+            return result
+        finally:
+            self.stats.add(wall_s=time.perf_counter() - t0)
+            self._count_since(before)
+
+    @instrument.timed("llm_summarize_many")
+    def summarize_many(self, prompts: dict, batch_size: int = 1) -> dict:
+        """
+        {key: prompt} -> {key: result}. Cache hits are served first; misses go out on
+        max_workers threads, either one request per prompt or, with batch_size > 1,
+        `batch_size` prompts per request answered as one JSON object keyed by `key`.
+        """
+        t0 = time.perf_counter()
+        before = self._counters()
+        results, todo = {}, {}
+        for key, prompt in prompts.items():
+            hit = self._cached(prompt)
+            if hit is not None:
+                results[key] = hit
+            else:
+                todo[key] = prompt
+
+        if batch_size <= 1:
+            jobs = [{k: p} for k, p in todo.items()]
+        else:
+            items = list(todo.items())
+            jobs = [dict(items[i:i + batch_size]) for i in range(0, len(items), batch_size)]
+
+        def run(job):
+            if len(job) == 1 and batch_size <= 1:
+                (key, prompt), = job.items()
+                try:
+                    out = {key: _parse(self._complete(prompt, self.max_tokens))}
+                except MissingCredentials:
+                    raise  # missing credentials: fail the run instead of recording N errors
+                except Exception as e:
+                    self.stats.add(errors=1)
+                    return {key: {"error": str(e)}}
+            else:
+                out = self._complete_batch(job)
+            for key, result in out.items():
+                self._store(job[key], result)
+            return out
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for out in pool.map(run, jobs):
+                results.update(out)
+        self.stats.add(wall_s=time.perf_counter() - t0)
+        self._count_since(before)
+        return {key: results[key] for key in prompts}
+
+    def _complete_batch(self, job: dict) -> dict:
+        keys = list(job)
+        prompt = (
+            "Answer each of the following requests independently. Return a single JSON object "
+            "whose keys are exactly the request ids below and whose values are the JSON answer "
+            "for that request.\n"
+            f"{BATCH_KEYS_MARKER}{json.dumps(keys)}\n\n"
+            + "\n\n".join(f"### {key}\n{prompt.strip()}" for key, prompt in job.items())
+        )
+        try:
+            parsed = _parse(self._complete(prompt, self.max_tokens * len(keys), json_mode=True))
+        except MissingCredentials:
+            raise
+        except Exception as e:
+            self.stats.add(errors=len(keys))
+            return {key: {"error": str(e)} for key in keys}
+        out = {}
+        for key in keys:
+            value = parsed.get(key) if isinstance(parsed, dict) else None
+            out[key] = value if isinstance(value, dict) else {"error": f"missing '{key}' in batched response"}
+        return out
+
+
+BATCH_KEYS_MARKER = "Request ids: "
+
+
+class StubClient:
+    """
+    Offline stand-in for openai.OpenAI(): answers with deterministic JSON (batched
+    prompts get one object per request id) and reports token counts by word count.
+    """
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def _answer(text: str) -> dict:
+        tag = hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+        return {"recommendations": [f"stub recommendation {tag}"],
+                "hypothesis": f"stub hypothesis {tag}",
+                "product_idea": f"stub product idea {tag}"}
+
+    def _create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        prompt = messages[-1]["content"]
+        keys = None
+        for line in prompt.splitlines():
+            if line.startswith(BATCH_KEYS_MARKER):
+                keys = json.loads(line[len(BATCH_KEYS_MARKER):])
+        if keys is None:
+            body = self._answer(prompt)
+        else:
+            body = {k: self._answer(f"{k}|{prompt}") for k in keys}
+        content = json.dumps(body)
+        usage = SimpleNamespace(prompt_tokens=len(prompt.split()), completion_tokens=len(content.split()))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
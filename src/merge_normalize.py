@@ -1,45 +1,95 @@
 # src/merge_normalize.py
 import pandas as pd
 import json
-from pathlib import Path
-
-def load_google_play(path='outputs/clean_google_play.csv'):
-    return pd.read_csv(path)
-
-def load_appstore_cache(cache_dir='data/cache'):
-    import os, json
-    rows = []
-    for fn in Path(cache_dir).glob('*.json'):
-        j = json.loads(fn.read_text())
-        # transform according to actual RapidAPI response shape
-        # example mapping below:
-        try:
-            info = j.get('results', [])[0]
-        except:
-            info = j
+import os
+import zlib
+
+import instrument
+from entity_resolution import resolve_entities
+from response_cache import PayloadStore, open_cache
+from storage import artifact, read_table, write_table
+
+def load_google_play(path='outputs/clean_google_play', columns=None):
+    # .parquet/.feather/.csv are all accepted; a bare stem picks whichever exists
+    return read_table(path, columns=columns)
+
+IOS_COLUMNS = ['platform','app_id','app_name','publisher','category','rating','review_count',
+               'price_usd','last_updated','payload_offset','payload_length']
+PAYLOAD_PATH = 'data/cache/appstore_payloads.bin'
+
+# canonical column -> response fields, RapidAPI scraper names (as in data/cache/<id>.json:
+# {"status", "error", "data": {"id", "title", ...}}) first, then iTunes lookup names
+IOS_FIELDS = {
+    'app_id': ('id', 'trackId'),
+    'app_name': ('title', 'trackName', 'name'),
+    'publisher': ('developer', 'sellerName', 'artistName', 'seller'),
+    'category': ('primaryGenre', 'primaryGenreName', 'genre'),
+    'rating': ('score', 'averageUserRating'),
+    'review_count': ('reviews', 'userRatingCount'),
+    'price_usd': ('price',),
+    'last_updated': ('updated', 'currentVersionReleaseDate'),
+}
+
+def _app_info(j):
+    # the app object of a cached response; None for an error response or an empty lookup
+    if not isinstance(j, dict):
+        return None
+    if 'data' in j or 'status' in j:  # RapidAPI envelope
+        return j.get('data') or None
+    if 'results' in j:  # iTunes lookup
+        return (j['results'] or [None])[0]
+    return j
+
+def app_fields(info):
+    # {canonical column: value}, first present field of IOS_FIELDS (0 and '' are values)
+    out = {}
+    for col, names in IOS_FIELDS.items():
+        out[col] = next((info[n] for n in names if info.get(n) is not None), None)
+    return out
+
+def iter_appstore_rows(cache, include_expired=True, payloads=None):
+    # one tuple of canonical fields per cache entry (IOS_COLUMNS order). The raw response
+    # (description included) never enters the frame: with a PayloadStore its compressed
+    # cache bytes are copied there as-is and the row carries their offset/length
+    for _, blob in cache.iter_range(include_expired=include_expired, encoded=True):
+        info = _app_info(json.loads(zlib.decompress(blob)))
         if not info: continue
-        row = {
-            'platform':'ios',
-            'app_id': info.get('trackId') or info.get('id'),
-            'app_name': info.get('trackName') or info.get('name'),
-            'publisher': info.get('sellerName') or info.get('seller'),
-            'category': info.get('primaryGenreName') or info.get('genre'),
-            'rating': info.get('averageUserRating'),
-            'review_count': info.get('userRatingCount'),
-            'price_usd': info.get('price'),
-            'last_updated': info.get('currentVersionReleaseDate'),
-            'description': info.get('description'),
-            'raw': info
-        }
-        rows.append(row)
-    return pd.DataFrame(rows)
+        offset, length = payloads.append_encoded(blob) if payloads is not None else (-1, 0)
+        yield ('ios', *app_fields(info).values(), offset, length)
 
+def load_appstore_cache(cache_dir='data/cache', include_expired=True, payload_path=None):
+    # entries come from the SQLite cache (legacy <id>.json files are migrated on first open);
+    # stale entries are still real data, so they are kept unless include_expired=False.
+    # payload_path rewrites that side store from scratch; None (the default) leaves the
+    # live PAYLOAD_PATH alone and skips it (payload_offset = -1)
+    cache = open_cache(cache_dir)
+    payloads = PayloadStore(payload_path, 'w') if payload_path else None
+    try:
+        df = pd.DataFrame.from_records(iter_appstore_rows(cache, include_expired, payloads), columns=IOS_COLUMNS)
+    finally:
+        cache.close()
+        if payloads is not None:
+            payloads.close()
+    for c in ('rating', 'review_count', 'price_usd'):
+        df[c] = pd.to_numeric(df[c], errors='coerce')
+    return df
+
+def load_payloads(df, payload_path=PAYLOAD_PATH):
+    # on-demand raw responses for the given rows (None where a row has no payload)
+    with PayloadStore(payload_path) as store:
+        raw = store.read_many(df['payload_offset'], df['payload_length'])
+    return pd.Series([_app_info(j) if j is not None else None for j in raw], index=df.index, dtype=object)
+
+def load_descriptions(df, payload_path=PAYLOAD_PATH):
+    return load_payloads(df, payload_path).map(lambda p: (p or {}).get('description'))
+
+@instrument.timed()
 def unify(gp_df, ios_df):
     gp_df = gp_df.copy()
     gp_df['platform'] = 'android'
 
-    # List of canonical columns
-    cols = ['platform','app_name','publisher','category','rating','review_count','price_usd','last_updated','description']
+    # List of canonical columns (app_id: the App Store trackId; Play Store rows have none)
+    cols = ['platform','app_id','app_name','publisher','category','rating','review_count','price_usd','last_updated','description']
 
     # Ensure both DataFrames have all columns
     for df in [gp_df, ios_df]:
@@ -47,25 +97,46 @@ def unify(gp_df, ios_df):
             if c not in df.columns:
                 df[c] = ''
 
-    # Concatenate
-    combined = pd.concat([gp_df[cols].fillna(''), ios_df[cols].fillna('')], ignore_index=True, sort=False)
+    # ios descriptions/raw payloads live in the side store; rows without one get offset -1
+    refs = ['payload_offset', 'payload_length']
+    for df in [gp_df, ios_df]:
+        for c, missing in zip(refs, (-1, 0)):
+            df[c] = df[c].fillna(missing).astype('int64') if c in df.columns else missing
+
+    # Concatenate (categoricals from the parquet artifact can't take the '' fill value)
+    frames = [df[cols].astype({c: object for c in cols if isinstance(df[c].dtype, pd.CategoricalDtype)})
+              .fillna('').join(df[refs]) for df in (gp_df, ios_df)]
+    combined = pd.concat(frames, ignore_index=True, sort=False)
 
     # Normalize
     combined['category'] = combined['category'].astype(str).str.lower().str.strip()
     combined['rating'] = pd.to_numeric(combined['rating'], errors='coerce')
     combined['review_count'] = pd.to_numeric(combined['review_count'], errors='coerce').fillna(0).astype(int)
     combined['price_usd'] = pd.to_numeric(combined['price_usd'], errors='coerce').fillna(0.0)
-    combined['last_updated'] = pd.to_datetime(combined['last_updated'], errors='coerce')
+    # App Store dates carry a 'Z' suffix, Play Store ones are naive: read both as UTC, store naive
+    combined['last_updated'] = pd.to_datetime(combined['last_updated'], errors='coerce', utc=True).dt.tz_localize(None)
+
+    # link the android and ios rows of the same app (adds app_entity_id)
+    combined = resolve_entities(combined)
 
-    combined.to_csv('outputs/clean_combined_apps.csv', index=False)
+    write_table(combined, artifact('outputs/clean_combined_apps'))
     return combined
 
 
 def main():
     gp = load_google_play()
-    ios = load_appstore_cache()
-    combined = unify(gp, ios)
+    # the payload store is rebuilt beside the live one and swapped in only once the
+    # combined artifact that points into it has been written
+    staged = PAYLOAD_PATH + '.tmp'
+    try:
+        ios = load_appstore_cache(payload_path=staged)
+        combined = unify(gp, ios)
+        os.replace(staged, PAYLOAD_PATH)
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
     print("Combined shape", combined.shape)
+    print("Entity resolution", combined.attrs.get('entity_resolution'))
     return combined
 
 if __name__=='__main__':
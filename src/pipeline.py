@@ -0,0 +1,311 @@
+# src/pipeline.py
+"""
+Single entry point for the whole pipeline. Stages declare their input and output
+artifacts; the dependency DAG follows from those (a stage depends on whichever stage
+writes one of its inputs).
+
+  * a stage is skipped when the content hashes of its inputs, its parameters, the
+    source of its module and its outputs match the last successful run; a stage with
+    a max_age_s (the iOS fetch, whose responses expire) also reruns once its last
+    successful run is older than that
+  * ready stages run concurrently (the Android ingest and the iOS fetch overlap), each
+    in a fresh worker process so its peak RSS is its own
+  * every run writes a manifest with per-stage status, wall/CPU time, peak memory and
+    the input hashes that decided it
+
+    python src/pipeline.py                       # run what is out of date
+    python src/pipeline.py --force insights      # rerun one stage (and what depends on it)
+    python src/pipeline.py --exclude ios_fetch --stub-llm --no-pdf
+    python src/pipeline.py --ids-file ids.txt        # App Store ids for ios_fetch
+    python src/pipeline.py --dry-run
+
+Table artifacts are given as stems ('outputs/clean_dataset'), resolved to whichever
+format exists as in storage.resolve().
+"""
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import resource
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import instrument
+
+STATE_DIR = Path(os.getenv("PIPELINE_STATE_DIR", "outputs/.pipeline"))
+MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "2"))
+# refetching before the App Store cache entries expire would only read the cache back
+IOS_MAX_AGE_DAYS = float(os.getenv("APPSTORE_CACHE_TTL_DAYS", "30"))
+APPSTORE_CACHE = "data/cache/appstore.sqlite"
+APPSTORE_PAYLOADS = "data/cache/appstore_payloads.bin"
+
+
+@dataclass
+class Stage:
+    name: str
+    func: str                 # "module:function", imported inside the worker process
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+    max_age_s: float | None = None  # rerun once the last successful run is older than this
+
+
+STAGES = [
+    Stage("android_ingest", "kaggle_ingest:main",
+          inputs=["data/raw/googleplaystore.csv"], outputs=["outputs/clean_google_play"]),
+    Stage("clean_dataset", "prepare_clean_dataset:main",
+          inputs=["data/raw/googleplaystore.csv"], outputs=["outputs/clean_dataset"]),
+    Stage("ios_fetch", "appstore_fetch:main", outputs=["outputs/all_apps.json", APPSTORE_CACHE],
+          max_age_s=IOS_MAX_AGE_DAYS * 86400 if IOS_MAX_AGE_DAYS > 0 else None),
+    # merge reads the App Store rows from the response cache, not from all_apps.json, and
+    # creates the cache from legacy <id>.json files when no fetch has run yet
+    Stage("merge", "merge_normalize:main", inputs=["outputs/clean_google_play", APPSTORE_CACHE],
+          outputs=["outputs/clean_combined_apps", APPSTORE_PAYLOADS, APPSTORE_CACHE]),
+    Stage("snapshot", "snapshots:main",
+          inputs=["outputs/clean_combined_apps"], outputs=["outputs/snapshots/_snapshots.json"]),
+    Stage("insights", "insights_generator:main",
+          inputs=["outputs/clean_dataset"], outputs=["outputs/insights_debug.json"]),
+    Stage("report", "report_generator:render_report",
+          inputs=["outputs/insights_debug.json"], outputs=["outputs/report.md", "outputs/report.pdf"]),
+]
+
+
+def _locate(path) -> Path | None:
+    """Existing file for an artifact path or table stem, else None."""
+    from storage import SUFFIXES, resolve  # pulls in pandas, which the orchestrator itself doesn't need
+
+    p = Path(path)
+    if p.suffix in SUFFIXES or p.suffix == "":
+        try:
+            return resolve(p)
+        except FileNotFoundError:
+            return None
+    return p if p.exists() else None
+
+
+class HashCache:
+    """File content hashes, recomputed only when (mtime_ns, size) changes."""
+
+    def __init__(self, entries: dict | None = None):
+        self.entries = entries or {}
+
+    def digest(self, path) -> str | None:
+        found = _locate(path)
+        if found is None:
+            return None
+        st = found.stat()
+        key = str(found)
+        cached = self.entries.get(key)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["digest"]
+        h = hashlib.blake2b(digest_size=16)
+        with open(found, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.entries[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "digest": h.hexdigest()}
+        return h.hexdigest()
+
+
+def dependencies(stages) -> dict:
+    """{stage name: set of upstream stage names}, from outputs feeding inputs."""
+    producers = {}
+    for s in stages:
+        for out in s.outputs:
+            producers.setdefault(out, []).append(s.name)
+    # an artifact a stage both reads and writes still ties it to the artifact's other writers
+    return {s.name: {p for i in s.inputs for p in producers.get(i, []) if p != s.name} for s in stages}
+
+
+def downstream(stages, names) -> set:
+    deps = dependencies(stages)
+    out, grew = set(names), True
+    while grew:
+        grew = False
+        for name, ups in deps.items():
+            if name not in out and ups & out:
+                out.add(name)
+                grew = True
+    return out
+
+
+def source_file(func: str) -> str | None:
+    """Path of the module defining a "module:function", found without importing it."""
+    spec = importlib.util.find_spec(func.split(":")[0])
+    return spec.origin if spec is not None else None
+
+
+def stage_key(stage: Stage, hashes: HashCache) -> tuple[str, dict]:
+    """
+    Hash of the stage definition, its module's source (so an edit to the function or a
+    helper next to it reruns the stage) and its inputs' contents; also returns the
+    input digests.
+    """
+    inputs = {i: hashes.digest(i) for i in stage.inputs}
+    source = source_file(stage.func)
+    blob = json.dumps({"func": stage.func, "source": source and hashes.digest(source), "kwargs": stage.kwargs,
+                       "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest(), inputs
+
+
+def _run(stage: str, func: str, kwargs: dict) -> dict:
+    """Stage body, executed in a fresh worker process."""
+    t0, c0 = time.perf_counter(), time.process_time()
+    module, name = func.split(":")
+    error = None
+    try:
+        with instrument.span(f"stage:{stage}"):
+            getattr(importlib.import_module(module), name)(**kwargs)
+    except BaseException as e:  # SystemExit from a stage counts as a failure too
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "cpu_s": round(time.process_time() - c0, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "error": error,
+    }
+
+
+def run(stages=STAGES, force=(), exclude=(), max_workers=MAX_WORKERS, dry_run=False) -> dict:
+    """
+    Run out-of-date stages in dependency order and return the run manifest. `force`
+    reruns those stages and everything downstream; `exclude`d stages never run and
+    their existing outputs are used as they are.
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    state_path = STATE_DIR / "state.json"
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    hashes = HashCache(state.get("hashes"))
+    done_keys = state.get("stages", {})
+
+    by_name = {s.name: s for s in stages}
+    unknown = (set(force) | set(exclude)) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    deps = dependencies(stages)
+    forced = downstream(stages, force)
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    manifest = {"run_id": run_id, "started_at": datetime.now().isoformat(timespec="seconds"), "stages": {}}
+    status = {}
+    t_run = time.perf_counter()
+
+    def record(name, st, **info):
+        status[name] = st
+        manifest["stages"][name] = {"status": st, **info}
+        mark = {'ran': '✅', 'skipped': '✅', 'excluded': '⏭️ ', 'would_run': '▶️ '}.get(st, '❌')
+        print(f"{mark} {name}: {st}"
+              + (f" ({info['wall_s']}s, {info['peak_rss_mb']} MB)" if st == "ran" else "")
+              + (f" — {info['error']}" if info.get("error") else ""))
+
+    def up_to_date(stage, key):
+        prev = done_keys.get(stage.name)
+        return (prev is not None and prev["key"] == key and stage.name not in forced
+                and (stage.max_age_s is None or time.time() - prev.get("finished_at", 0) < stage.max_age_s)
+                and all(hashes.digest(o) == prev["outputs"].get(o) for o in stage.outputs))
+
+    with ProcessPoolExecutor(max_workers=max(1, max_workers), max_tasks_per_child=1) as pool:
+        running = {}
+        while len(status) < len(stages):
+            progressed = False
+            for stage in stages:
+                if stage.name in status or stage.name in running.values():
+                    continue
+                ups = [status.get(u) for u in deps[stage.name]]
+                if any(u is None for u in ups):
+                    continue
+                progressed = True
+                if any(u in ("failed", "blocked") for u in ups):
+                    record(stage.name, "blocked")
+                elif stage.name in exclude:
+                    record(stage.name, "excluded")
+                else:
+                    key, inputs = stage_key(stage, hashes)
+                    if up_to_date(stage, key):
+                        record(stage.name, "skipped", key=key, inputs=inputs)
+                    elif dry_run:
+                        record(stage.name, "would_run", key=key, inputs=inputs)
+                    else:
+                        fut = pool.submit(_run, stage.name, stage.func, stage.kwargs)
+                        running[fut] = stage.name
+                        manifest["stages"][stage.name] = {"key": key, "inputs": inputs}
+            if not running:
+                if not progressed:
+                    raise RuntimeError(f"Dependency cycle among: {', '.join(set(by_name) - set(status))}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                stage = by_name[name]
+                info = {**manifest["stages"][name], **fut.result()}
+                missing = [o for o in stage.outputs if _locate(o) is None]
+                if not info["error"] and missing:
+                    info["error"] = f"outputs not written: {', '.join(missing)}"
+                info["outputs"] = {o: hashes.digest(o) for o in stage.outputs}
+                if not info["error"] and set(stage.inputs) & set(stage.outputs):
+                    # inputs the stage writes itself are keyed as it left them, or the
+                    # next run would see them "changed" and rerun it
+                    info["key"], info["inputs"] = stage_key(stage, hashes)
+                record(name, "failed" if info["error"] else "ran", **info)
+                if not info["error"]:
+                    done_keys[name] = {"key": info["key"], "outputs": info["outputs"], "finished_at": time.time()}
+                    # persist after every stage so an interrupted run keeps its progress
+                    state_path.write_text(json.dumps({"stages": done_keys, "hashes": hashes.entries}, indent=2))
+
+    manifest["wall_s"] = round(time.perf_counter() - t_run, 3)
+    manifest["ok"] = all(st in ("ran", "skipped", "excluded", "would_run") for st in status.values())
+    if not dry_run:
+        state_path.write_text(json.dumps({"stages": done_keys, "hashes": hashes.entries}, indent=2))
+        runs = STATE_DIR / "runs"
+        runs.mkdir(exist_ok=True)
+        (runs / f"{run_id}.json").write_text(json.dumps(manifest, indent=2, default=str))
+        print(f"Manifest: {runs / f'{run_id}.json'} ({manifest['wall_s']}s)")
+    return manifest
+
+
+def configure(stub_llm=False, no_pdf=False, app_ids=None, ids_file=None, stages=STAGES):
+    """Stage list with CLI options applied to the relevant stage kwargs."""
+    out = []
+    for s in stages:
+        kwargs = dict(s.kwargs)
+        inputs, outputs = list(s.inputs), list(s.outputs)
+        if s.name == "insights" and stub_llm:
+            kwargs["stub_llm"] = True
+        if s.name == "report" and no_pdf:
+            kwargs["out_pdf"] = None
+            outputs = [o for o in outputs if not o.endswith(".pdf")]
+        if s.name == "ios_fetch" and app_ids:
+            kwargs["app_ids"] = list(app_ids)
+        if s.name == "ios_fetch" and ids_file:
+            kwargs["ids_file"] = str(ids_file)
+            inputs.append(str(ids_file))  # a changed ID list refetches
+        out.append(Stage(s.name, s.func, inputs, outputs, kwargs, s.max_age_s))
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--force", nargs="*", default=[], help="rerun these stages and their dependents")
+    ap.add_argument("--exclude", nargs="*", default=[], help="never run these; use their existing outputs")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    ap.add_argument("--dry-run", action="store_true", help="report what would run")
+    ap.add_argument("--stub-llm", action="store_true", help="insights against llm_client.StubClient")
+    ap.add_argument("--no-pdf", action="store_true", help="report stage writes markdown only")
+    ap.add_argument("--app-ids", nargs="*", default=None, help="App Store ids for ios_fetch")
+    ap.add_argument("--ids-file", default=None, help="file of App Store ids (one per line) for ios_fetch")
+    ap.add_argument("--profile", action="store_true", help="record instrument events for every stage")
+    ap.add_argument("--profile-stage", default=None,
+                    help="also capture cProfile + tracemalloc for this span, e.g. stage:insights or unify")
+    args = ap.parse_args()
+    if args.profile or args.profile_stage:
+        instrument.enable(profile_stage=args.profile_stage)
+    started = time.time()
+    manifest = run(configure(args.stub_llm, args.no_pdf, args.app_ids, args.ids_file), force=args.force,
+                   exclude=args.exclude, max_workers=args.workers, dry_run=args.dry_run)
+    if instrument.enabled():
+        events = [e for e in instrument.load_events() if e["ts"] >= started]
+        print(instrument.format_summary(instrument.summary(events)))
+    raise SystemExit(0 if manifest["ok"] else 1)
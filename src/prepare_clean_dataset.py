@@ -1,23 +1,17 @@
 # prepare_clean_dataset.py
 
+import argparse
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+import instrument
+from storage import TableWriter, artifact
+
 # Paths
 INPUT_CSV = Path("data/raw/googleplaystore.csv")  # your raw CSV
-OUTPUT_CSV = Path("outputs/clean_dataset.csv")    # cleaned dataset output
-
-# Ensure output directory exists
-OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-
-# Load raw CSV
-df = pd.read_csv(INPUT_CSV)
+OUTPUT = artifact("outputs/clean_dataset")       # cleaned dataset output (.parquet by default)
 
-# Basic cleaning
-# 1. Remove duplicate apps
-df = df.drop_duplicates(subset='App')
-
-# 2. Rename columns to standard names
 rename_map = {
     'App': 'app_name',
     'Category': 'category',
@@ -27,21 +21,58 @@ rename_map = {
     'Last Updated': 'last_updated',
     'App Id': 'app_id'  # if exists
 }
-df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
 
-# 3. Clean price column (remove $ and convert to float)
-if 'price_usd' in df.columns:
-    df['price_usd'] = df['price_usd'].replace('[\$,]', '', regex=True)
-    df['price_usd'] = pd.to_numeric(df['price_usd'], errors='coerce').fillna(0.0)
 
-# 4. Convert numeric columns safely
-for col in ['rating', 'review_count']:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+def clean(df):
+    # 2. Rename columns to standard names
+    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
+
+    # 3. Clean price column (remove $ and convert to float)
+    if 'price_usd' in df.columns:
+        df['price_usd'] = df['price_usd'].replace(r'[\$,]', '', regex=True)
+        df['price_usd'] = pd.to_numeric(df['price_usd'], errors='coerce').fillna(0.0)
+
+    # 4. Convert numeric columns safely (always float, so streamed chunks serialize alike)
+    for col in ['rating', 'review_count']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+
+    # 5. Optional: drop rows with missing critical info
+    return df.dropna(subset=['app_name', 'category'])
+
+
+def main(infile=INPUT_CSV, outfile=OUTPUT, chunksize=None):
+    """
+    chunksize=None loads the whole CSV. With a chunksize the file is streamed: the
+    first occurrence of each App is tracked across chunks by a set of 64-bit hashes and rows
+    are appended to the output as they are cleaned, so memory stays bounded.
+    """
+    # Ensure output directory exists
+    Path(outfile).parent.mkdir(parents=True, exist_ok=True)
+    instrument.count(bytes_read=Path(infile).stat().st_size)
+
+    with TableWriter(outfile) as out:
+        if not chunksize:
+            # Load raw CSV; 1. Remove duplicate apps
+            df = pd.read_csv(infile, dtype=str).drop_duplicates(subset='App')
+            out.write(clean(df))
+        else:
+            seen = set()
+            for chunk in pd.read_csv(infile, dtype=str, chunksize=chunksize):
+                keys = pd.util.hash_pandas_object(chunk['App'], index=False)
+                # set lookups cost the same however many apps came before
+                new = np.fromiter((k not in seen for k in keys.tolist()), bool, len(keys))
+                first = ~keys.duplicated().to_numpy() & new
+                seen.update(keys[first].tolist())
+                out.write(clean(chunk[first]))
+
+    print(f"Clean dataset saved to {outfile}")
 
-# 5. Optional: drop rows with missing critical info
-df = df.dropna(subset=['app_name', 'category'])
 
-# Save cleaned CSV
-df.to_csv(OUTPUT_CSV, index=False)
-print(f"Clean dataset saved to {OUTPUT_CSV}")
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--infile', default=str(INPUT_CSV))
+    ap.add_argument('--outfile', default=str(OUTPUT), help='.parquet/.feather/.csv')
+    ap.add_argument('--chunksize', type=int, default=None, help='stream the CSV in chunks of this many rows')
+    args = ap.parse_args()
+    main(args.infile, args.outfile, args.chunksize)
@@ -1,12 +1,28 @@
 # src/report_generator.py
+"""
+Markdown + PDF reports from the insights JSON.
+
+render_report() writes the single executive report. render_batch() renders many
+reports (per segment, per client, ...) in one go: templates are compiled once through
+a cached Jinja2 Environment, markdown is converted to real HTML, and the CPU-bound
+weasyprint step fans out over a process pool. Every job reports its own timings.
+"""
 import logging
 logging.getLogger("weasyprint").setLevel(logging.ERROR)
 
+import argparse
 import json
-from pathlib import Path
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from jinja2 import Template
-import weasyprint
+from functools import lru_cache
+from pathlib import Path
+
+import instrument
+
+PDF_WORKERS = int(os.getenv("REPORT_PDF_WORKERS", str(os.cpu_count() or 1)))
 
 TEMPLATE_MD = """
 # Executive Market Intelligence Report
@@ -18,6 +34,7 @@ Generated: {{ generated_at }}
 - Apps: {{ ins.metrics.apps }}
 - Avg rating: {{ ins.metrics.avg_rating }}
 - Median price: {{ ins.metrics.median_price }}
+
 **Recommendations**
 {% if ins.llm.recommendations %}
 {% for r in ins.llm.recommendations %}
@@ -29,29 +46,164 @@ Generated: {{ generated_at }}
 {% endfor %}
 """
 
+TEMPLATES = {"executive": TEMPLATE_MD}
+
+# embedded sans-serif font to avoid Fontconfig warnings
+PDF_CSS = """
+@page { size: A4; margin: 1cm; }
+body { font-family: sans-serif; }
+h1,h2,h3 { font-family: sans-serif; }
+"""
+
+HTML_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+
+@dataclass
+class ReportJob:
+    """One report: `context` is passed to the template; out_pdf=None skips the PDF."""
+    name: str
+    context: dict
+    out_md: str
+    out_pdf: str | None = None
+    template: str = "executive"
+
+
+@dataclass
+class ReportResult:
+    name: str
+    out_md: str
+    out_pdf: str | None = None
+    render_s: float = 0.0    # template + markdown -> HTML
+    pdf_s: float = 0.0       # weasyprint, measured in the worker
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "out_md": self.out_md, "out_pdf": self.out_pdf,
+                "render_s": round(self.render_s, 4), "pdf_s": round(self.pdf_s, 4), "error": self.error}
+
+
+@lru_cache(maxsize=None)
+def get_environment():
+    """One Environment per process, so each template is parsed and compiled only once."""
+    from jinja2 import DictLoader, Environment
+
+    return Environment(loader=DictLoader(TEMPLATES), auto_reload=False, cache_size=-1)
+
+
+def render_markdown(context: dict, template: str = "executive") -> str:
+    return get_environment().get_template(template).render(**context)
+
+
+def markdown_to_html(md: str, title: str = "Market Intelligence Report") -> str:
+    import markdown
+
+    body = markdown.markdown(md, extensions=["extra", "sane_lists"])
+    return HTML_PAGE.format(title=title, body=body)
+
+
+def write_pdf(html: str, out_pdf: str) -> float:
+    """HTML -> PDF; returns the seconds spent. Module-level so process workers can run it."""
+    import weasyprint
+
+    t0 = time.perf_counter()
+    weasyprint.HTML(string=html).write_pdf(out_pdf, stylesheets=[weasyprint.CSS(string=PDF_CSS)])
+    return time.perf_counter() - t0
+
+
+def _render(job: ReportJob) -> tuple[ReportResult, str]:
+    t0 = time.perf_counter()
+    md = render_markdown(job.context, job.template)
+    Path(job.out_md).parent.mkdir(parents=True, exist_ok=True)
+    Path(job.out_md).write_text(md, encoding="utf-8")
+    instrument.count(bytes_written=len(md.encode("utf-8")))
+    html = markdown_to_html(md, title=job.name)
+    return ReportResult(job.name, job.out_md, job.out_pdf, render_s=time.perf_counter() - t0), html
+
+
+@instrument.timed()
+def render_batch(jobs, max_workers: int = PDF_WORKERS) -> list:
+    """
+    Render every job's markdown in this process, then their PDFs on `max_workers`
+    processes (max_workers <= 1 renders PDFs inline). A failing PDF is recorded on its
+    ReportResult and does not stop the batch. Results come back in job order.
+    """
+    jobs = list(jobs)
+    results, pending = [], []
+    for job in jobs:
+        result, html = _render(job)
+        results.append(result)
+        if job.out_pdf:
+            Path(job.out_pdf).parent.mkdir(parents=True, exist_ok=True)
+            pending.append((result, html))
+
+    def collect(result, run):
+        try:
+            result.pdf_s = run()
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+
+    if max_workers <= 1 or len(pending) <= 1:
+        for result, html in pending:
+            collect(result, lambda: write_pdf(html, result.out_pdf))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = [(result, pool.submit(write_pdf, html, result.out_pdf)) for result, html in pending]
+            for result, fut in futures:
+                collect(result, fut.result)
+    return results
+
+
+def load_insights(insights_debug_json='outputs/insights_debug.json') -> dict:
+    with open(insights_debug_json, encoding='utf-8') as f:
+        data = json.load(f)
+    return {
+        'generated_at': data.get('generated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        'insights': data.get('insights', []),
+    }
+
+
+@instrument.timed(rows=False)
 def render_report(insights_debug_json='outputs/insights_debug.json',
                   out_md='outputs/report.md',
                   out_pdf='outputs/report.pdf'):
-    # Load JSON insights
-    data = json.load(open(insights_debug_json))
-    generated_at = data.get('generated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    insights = data.get('insights', [])
-
-    # Render Markdown with Jinja2
-    t = Template(TEMPLATE_MD)
-    md = t.render(generated_at=generated_at, insights=insights)
-    Path(out_md).write_text(md)
-
-    # Render PDF with embedded sans-serif font to avoid Fontconfig warnings
-    css = weasyprint.CSS(string="""
-    @page { size: A4; margin: 1cm; }
-    body { font-family: sans-serif; }
-    h1,h2,h3 { font-family: sans-serif; }
-    """)
-    html = weasyprint.HTML(string=md)
-    html.write_pdf(out_pdf, stylesheets=[css])
-
+    job = ReportJob('report', load_insights(insights_debug_json), out_md, out_pdf)
+    instrument.count(rows=len(job.context['insights']))
+    result, html = _render(job)
+    if out_pdf:
+        result.pdf_s = write_pdf(html, out_pdf)
     print("Saved:", out_md, out_pdf)
+    return result
+
+
+def category_jobs(insights_debug_json='outputs/insights_debug.json', out_dir='outputs/reports', pdf=True):
+    """One executive report per category (the per-segment nightly batch)."""
+    ctx = load_insights(insights_debug_json)
+    jobs = []
+    for ins in ctx['insights']:
+        stem = Path(out_dir) / f"report_{ins['category']}"
+        jobs.append(ReportJob(ins['category'], {**ctx, 'insights': [ins]},
+                              f"{stem}.md", f"{stem}.pdf" if pdf else None))
+    return jobs
+
 
 if __name__ == '__main__':
-    render_report()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-category", action="store_true", help="one report per category into --out-dir")
+    ap.add_argument("--out-dir", default="outputs/reports")
+    ap.add_argument("--no-pdf", action="store_true")
+    ap.add_argument("--workers", type=int, default=PDF_WORKERS)
+    args = ap.parse_args()
+
+    if not args.per_category:
+        render_report(out_pdf=None if args.no_pdf else 'outputs/report.pdf')
+    else:
+        t0 = time.perf_counter()
+        results = render_batch(category_jobs(out_dir=args.out_dir, pdf=not args.no_pdf), max_workers=args.workers)
+        for r in results:
+            print(("❌" if r.error else "✅"), json.dumps(r.as_dict()))
+        print(f"Rendered {len(results)} reports in {time.perf_counter() - t0:.2f}s")
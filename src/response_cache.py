@@ -0,0 +1,311 @@
+# src/response_cache.py
+"""
+SQLite-backed response cache: one row per key holding a zlib-compressed JSON payload
+plus fetch/expiry/last-access timestamps. Replaces the one-file-per-app layout in
+data/cache, which does not scale past a few hundred thousand apps.
+
+    python src/response_cache.py migrate data/cache     # one-shot import of <id>.json files
+    python src/response_cache.py stats data/cache/appstore.sqlite
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+EVICT_EVERY = 256  # puts between size-bound checks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    payload     BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    fetched_at  REAL NOT NULL,
+    expires_at  REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries(expires_at);
+"""
+
+
+def _encode(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class ResponseCache:
+    """
+    Key/value cache with per-entry TTL and LRU eviction bounded by entry count and/or
+    compressed bytes. Safe to share between threads (one connection behind a lock).
+    """
+
+    def __init__(self, path, ttl: float | None = None,
+                 max_entries: int | None = None, max_bytes: int | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key):
+        return self.get(key, touch=False) is not None
+
+    def get(self, key: str, touch: bool = True, include_expired: bool = False):
+        """Return the cached value, or None if missing (or expired unless include_expired)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM entries WHERE key = ?", (str(key),)).fetchone()
+            if row is None:
+                return None
+            if not include_expired and row[1] is not None and row[1] <= now:
+                return None
+            if touch:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, str(key)))
+        return _decode(row[0])
+
+    def put(self, key: str, value, ttl: float | None = None, fetched_at: float | None = None):
+        now = time.time()
+        fetched_at = fetched_at or now
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = fetched_at + ttl if ttl else None
+        blob = _encode(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (str(key), blob, len(blob), fetched_at, expires_at, now))
+            self._puts += 1
+        if (self.max_entries or self.max_bytes) and self._puts % EVICT_EVERY == 0:
+            self.evict()
+
+    def put_many(self, items, ttl: float | None = None):
+        """Bulk insert of (key, value) or (key, value, fetched_at) tuples in one transaction."""
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        rows = []
+        for item in items:
+            key, value = item[0], item[1]
+            fetched_at = item[2] if len(item) > 2 and item[2] else now
+            blob = _encode(value)
+            rows.append((str(key), blob, len(blob), fetched_at, fetched_at + ttl if ttl else None, now))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+        if self.max_entries or self.max_bytes:
+            self.evict()
+        return len(rows)
+
+    def get_many(self, keys, include_expired: bool = False) -> dict:
+        """Bulk point lookup; missing/expired keys are left out. Does not touch LRU order."""
+        keys = [str(k) for k in keys]
+        now = time.time()
+        out = {}
+        with self._lock:
+            for i in range(0, len(keys), 900):  # stay under SQLITE_MAX_VARIABLE_NUMBER
+                chunk = keys[i:i + 900]
+                marks = ",".join("?" * len(chunk))
+                for key, blob, exp in self._conn.execute(
+                        f"SELECT key, payload, expires_at FROM entries WHERE key IN ({marks})", chunk):
+                    if include_expired or exp is None or exp > now:
+                        out[key] = _decode(blob)
+        return out
+
+    def iter_range(self, start: str | None = None, end: str | None = None,
+                   include_expired: bool = False, batch_size: int = 1000, with_meta: bool = False,
+                   encoded: bool = False):
+        """
+        Yield (key, value) in key order for start <= key < end, reading in batches so
+        memory stays flat. with_meta=True yields (key, value, fetched_at) instead;
+        encoded=True yields the stored compressed bytes in place of the value.
+        """
+        last = None
+        while True:
+            clauses, params = [], []
+            if last is not None:
+                clauses.append("key > ?"); params.append(last)
+            elif start is not None:
+                clauses.append("key >= ?"); params.append(str(start))
+            if end is not None:
+                clauses.append("key < ?"); params.append(str(end))
+            if not include_expired:
+                clauses.append("(expires_at IS NULL OR expires_at > ?)"); params.append(time.time())
+            where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, payload, fetched_at FROM entries {where} ORDER BY key LIMIT ?",
+                    (*params, batch_size)).fetchall()
+            if not rows:
+                return
+            for key, blob, fetched_at in rows:
+                value = blob if encoded else _decode(blob)
+                yield (key, value, fetched_at) if with_meta else (key, value)
+            last = rows[-1][0]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (str(key),))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)).rowcount
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used ones until within the size bounds."""
+        removed = self.purge_expired()
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            over_n = max(0, count - self.max_entries) if self.max_entries else 0
+            over_b = max(0, total - self.max_bytes) if self.max_bytes else 0
+            if not over_n and not over_b:
+                return removed
+            # walk oldest-first and cut once both bounds are satisfied
+            cutoff, n, freed = None, 0, 0
+            cur = self._conn.execute("SELECT key, size, last_access FROM entries ORDER BY last_access, key")
+            for key, size, last_access in cur:
+                if n >= over_n and freed >= over_b:
+                    break
+                cutoff = (last_access, key)
+                n += 1
+                freed += size
+            cur.close()
+            if cutoff is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM entries WHERE last_access < ? OR (last_access = ? AND key <= ?)",
+                    (cutoff[0], cutoff[0], cutoff[1])).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total, oldest, newest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(fetched_at), MAX(fetched_at) FROM entries").fetchone()
+            expired = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)).fetchone()[0]
+        return {"entries": count, "compressed_bytes": total, "expired": expired,
+                "oldest_fetch": oldest, "newest_fetch": newest}
+
+
+class PayloadStore:
+    """
+    Append-only file of zlib-compressed JSON frames, addressed by (offset, length).
+    Keeps bulky values (raw API responses, descriptions) out of DataFrames: the frame
+    holds two int columns and the value is decoded only when someone asks for it.
+    """
+
+    def __init__(self, path, mode: str = "r"):
+        if mode not in ("r", "w", "a"):
+            raise ValueError(f"mode must be 'r', 'w' or 'a', not {mode!r}")
+        self.path = Path(path)
+        if mode != "r":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, {"r": "rb", "w": "w+b", "a": "a+b"}[mode])
+        self._f.seek(0, 2)
+        self._end = self._f.tell()
+
+    def append(self, value) -> tuple:
+        return self.append_encoded(_encode(value))
+
+    def append_encoded(self, blob: bytes) -> tuple:
+        """Append a frame that is already zlib-compressed JSON (e.g. a ResponseCache payload)."""
+        offset = self._end
+        self._f.seek(offset)
+        self._f.write(blob)
+        self._end += len(blob)
+        return offset, len(blob)
+
+    def read(self, offset: int, length: int):
+        self._f.flush()
+        self._f.seek(int(offset))
+        return _decode(self._f.read(int(length)))
+
+    def read_many(self, offsets, lengths) -> list:
+        """Values for parallel offset/length sequences, read in file order (None for offset < 0)."""
+        offsets, lengths = list(offsets), list(lengths)
+        out = [None] * len(offsets)
+        for i in sorted(range(len(offsets)), key=offsets.__getitem__):
+            if offsets[i] >= 0:
+                out[i] = self.read(offsets[i], lengths[i])
+        return out
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def migrate_json_dir(cache_dir, cache: ResponseCache, delete: bool = False, batch_size: int = 1000) -> int:
+    """
+    One-shot import of the legacy data/cache/<app_id>.json files. The file mtime becomes
+    the entry's fetch time so TTLs apply as if the entries had always lived here.
+    """
+    moved, batch, done = 0, [], []
+    for fn in sorted(Path(cache_dir).glob("*.json")):
+        if fn.stat().st_size == 0:
+            continue
+        batch.append((fn.stem, json.loads(fn.read_text()), fn.stat().st_mtime))
+        done.append(fn)
+        if len(batch) >= batch_size:
+            moved += cache.put_many(batch)
+            batch = []
+    if batch:
+        moved += cache.put_many(batch)
+    if delete:
+        for fn in done:
+            fn.unlink()
+    return moved
+
+
+def open_cache(cache_dir="data/cache", name="appstore.sqlite", **kwargs) -> ResponseCache:
+    """Open <cache_dir>/<name>, migrating legacy JSON files the first time the DB is created."""
+    path = Path(cache_dir) / name
+    fresh = not path.exists()
+    cache = ResponseCache(path, **kwargs)
+    if fresh:
+        migrate_json_dir(cache_dir, cache)
+    return cache
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("migrate", "stats"):
+        print("usage: response_cache.py migrate <cache_dir> [--delete] | stats <db_path>")
+        sys.exit(1)
+    if sys.argv[1] == "migrate":
+        with ResponseCache(Path(sys.argv[2]) / "appstore.sqlite") as c:
+            n = migrate_json_dir(sys.argv[2], c, delete="--delete" in sys.argv)
+        print(f"Migrated {n} cache files into {Path(sys.argv[2]) / 'appstore.sqlite'}")
+    else:
+        with ResponseCache(sys.argv[2]) as c:
+            print(json.dumps(c.stats(), indent=2))
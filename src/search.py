@@ -0,0 +1,410 @@
+# src/search.py
+"""
+Full-text search over app names and descriptions: a BM25 inverted index stored as
+plain .npy files under outputs/search/ and opened with np.load(mmap_mode='r'), so every
+Streamlit session (and process) reads the same page-cached arrays instead of holding
+its own copy.
+
+The index is a list of segments, each a CSR inverted index over its rows:
+
+    seg-000000/term.npy        uint64 term hashes, sorted
+               ptr.npy         postings of term i are doc/tf[ptr[i]:ptr[i+1]]
+               doc.npy, tf.npy row within the segment, weighted term frequency
+               length.npy      weighted tokens per row (BM25 length normalisation)
+               platform.npy, category.npy   codes into the labels in _search.json
+               key.npy         uint64 hash of the row key (see doc_keys)
+               live.npy        False once a row is removed or replaced
+               name.npy, name_offsets.npy, key_text.npy, key_offsets.npy   UTF-8 strings
+
+Segments are never rewritten: add() upserts rows as a new segment (clearing the live
+bit of any earlier version), remove() clears live bits, and compact() merges the live
+rows into one segment. _search.json is written last, so readers key their cache on it.
+Name tokens count NAME_WEIGHT times; document frequencies include removed rows until
+the next compact(), as in most segment-based engines.
+
+    python src/search.py build outputs/clean_combined_apps
+    python src/search.py query "photo editor" --platform ios -k 10
+
+MARKET_INTEL_SEARCH sets the default location.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from storage import iter_table, resolve
+
+SEARCH_DIR = Path(os.getenv("MARKET_INTEL_SEARCH", "outputs/search"))
+META = "_search.json"
+FILTERS = ("platform", "category")
+K1, B = 1.2, 0.75
+NAME_WEIGHT = 3
+TOKEN = r"[^\W_]{2,}"  # words of two or more letters/digits
+PAYLOAD_PATH = "data/cache/appstore_payloads.bin"
+COLUMNS = ["platform", "app_id", "app_name", "category", "description", "payload_offset", "payload_length"]
+
+
+def tokenize(text: str) -> list:
+    return re.findall(TOKEN, text.lower())
+
+
+def _hash(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def doc_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    The identity add() and remove() match rows on: platform:app_id, else
+    platform:app_name|category. Play Store rows have no id, and kaggle_ingest keeps one
+    row per (app_name, category), so a name alone can stand for several rows.
+    """
+    def text(col):
+        if col not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[col].astype(object).fillna("").astype(str)
+
+    ident = text("app_name") + "|" + text("category")
+    if "app_id" in df.columns:
+        app_id = text("app_id")
+        ident = app_id.where(app_id != "", ident)
+    return text("platform") + ":" + ident
+
+
+def _descriptions(df, payload_path=PAYLOAD_PATH) -> pd.Series:
+    # App Store descriptions stay in the payload side store (merge_normalize); fetch the missing ones
+    text = df["description"].fillna("").astype(str) if "description" in df.columns else pd.Series("", index=df.index)
+    if "payload_offset" in df.columns and payload_path and Path(payload_path).exists():
+        todo = (text == "") & (df["payload_offset"] >= 0)
+        if todo.any():
+            from merge_normalize import load_descriptions
+            text[todo] = load_descriptions(df[todo], payload_path).fillna("").astype(str)
+    return text
+
+
+def _postings(df, payload_path=PAYLOAD_PATH):
+    """(term hash, row, weighted tf) triples for a frame with a RangeIndex, sorted by row."""
+    parts = []
+    for text, weight in ((df["app_name"].fillna("").astype(str), NAME_WEIGHT),
+                         (_descriptions(df, payload_path), 1)):
+        tokens = text.str.lower().str.findall(TOKEN).explode().dropna()  # index = row (df has a RangeIndex)
+        parts.append(pd.DataFrame({"term": _hash(tokens.to_numpy()), "doc": tokens.index.to_numpy(np.int32),
+                                   "tf": np.float32(weight)}))
+    p = pd.concat(parts, ignore_index=True).groupby(["doc", "term"], sort=True)["tf"].sum().reset_index()
+    return p["term"].to_numpy(np.uint64), p["doc"].to_numpy(np.int32), p["tf"].to_numpy(np.float32)
+
+
+def _save(path, **arrays):
+    path.mkdir(parents=True, exist_ok=True)
+    for name, a in arrays.items():
+        np.save(path / f"{name}.npy", a)
+
+
+def _strings(values):
+    data = [str(v).encode() for v in values]
+    offsets = np.zeros(len(data) + 1, np.int64)
+    np.cumsum([len(b) for b in data], out=offsets[1:])
+    return np.frombuffer(b"".join(data), np.uint8), offsets
+
+
+def _codes(values, labels: list) -> np.ndarray:
+    # append-only label list shared by all segments, so codes never change
+    s = pd.Series(values, dtype=object).fillna("").astype(str)
+    for v in pd.unique(s):
+        if v not in labels:
+            labels.append(v)
+    return pd.Index(labels).get_indexer(s)
+
+
+def _write_segment(path, term, doc, tf, rows, platform, category, keys, names):
+    """Write one segment from postings sorted by row (re-sorted here by term, stably)."""
+    order = np.argsort(term, kind="stable")
+    term, doc, tf = term[order], doc[order], tf[order]
+    starts = np.flatnonzero(np.r_[True, term[1:] != term[:-1]]) if len(term) else np.array([], np.int64)
+    name, name_offsets = _strings(names)
+    key_text, key_offsets = _strings(keys)
+    length = np.bincount(doc, weights=tf, minlength=rows).astype(np.float32)
+    _save(path, term=term[starts], ptr=np.r_[starts, len(term)].astype(np.int64), doc=doc, tf=tf,
+          length=length, platform=platform.astype(np.int16), category=category.astype(np.int16),
+          key=_hash(keys), live=np.ones(rows, bool), name=name, name_offsets=name_offsets,
+          key_text=key_text, key_offsets=key_offsets)
+    return {"name": path.name, "rows": rows, "live": rows, "length": float(length.sum())}
+
+
+def _empty_meta() -> dict:
+    return {"segments": [], "labels": {"platform": [], "category": []}, "next_segment": 0,
+            "k1": K1, "b": B, "name_weight": NAME_WEIGHT}
+
+
+def metadata(root=SEARCH_DIR) -> dict:
+    path = Path(root) / META
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found; build the index first (python src/search.py build)")
+    return json.loads(path.read_text())
+
+
+def signature(root=SEARCH_DIR) -> tuple:
+    """Changes whenever the index is modified (the metadata file is written last)."""
+    st = os.stat(Path(root) / META)
+    return st.st_mtime_ns, st.st_size
+
+
+def _commit(root, meta):
+    meta["written_at"] = pd.Timestamp.now().isoformat(timespec="seconds")
+    tmp = Path(root) / f"{META}.tmp"
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, Path(root) / META)
+
+
+def _add_segment(root, meta, df, payload_path):
+    term, doc, tf = _postings(df.reset_index(drop=True), payload_path)
+    name = f"seg-{meta['next_segment']:06d}"
+    meta["next_segment"] += 1
+    seg = _write_segment(Path(root) / name, term, doc, tf, len(df),
+                         _codes(df["platform"], meta["labels"]["platform"]),
+                         _codes(df["category"], meta["labels"]["category"]),
+                         doc_keys(df).to_numpy(object), df["app_name"].fillna("").to_numpy(object))
+    meta["segments"].append(seg)
+
+
+def build(artifact="outputs/clean_combined_apps", root=SEARCH_DIR, batch_rows=250_000,
+          payload_path=PAYLOAD_PATH) -> dict:
+    """
+    Index a storage artifact (any format), streaming batch_rows at a time; each batch
+    becomes a segment. Replaces any index at `root`. Returns the metadata.
+    """
+    import pyarrow.parquet as pq
+
+    path = resolve(artifact)
+    present = pq.read_schema(path).names if path.suffix == ".parquet" else None
+    columns = [c for c in COLUMNS if present is None or c in present]
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+    meta = _empty_meta()
+    t0 = time.perf_counter()
+    for df in iter_table(path, columns=columns if present is not None else None, batch_rows=batch_rows):
+        _add_segment(root, meta, df, payload_path)
+    meta["build_s"] = round(time.perf_counter() - t0, 3)
+    _commit(root, meta)
+    return meta
+
+
+def _set_dead(root, meta, hashes) -> int:
+    removed = 0
+    for seg in meta["segments"]:
+        path = Path(root) / seg["name"]
+        live = np.load(path / "live.npy")
+        dead = live & np.isin(np.load(path / "key.npy", mmap_mode="r"), hashes)
+        if dead.any():
+            live[dead] = False
+            np.save(path / "live.tmp.npy", live)
+            os.replace(path / "live.tmp.npy", path / "live.npy")  # open readers keep the old file
+            seg["live"] -= int(dead.sum())
+            seg["length"] -= float(np.load(path / "length.npy", mmap_mode="r")[dead].sum())
+            removed += int(dead.sum())
+    return removed
+
+
+def add(df: pd.DataFrame, root=SEARCH_DIR, payload_path=PAYLOAD_PATH) -> dict:
+    """Index new or changed rows (earlier versions of the same keys are removed)."""
+    root = Path(root)
+    if not (root / META).exists():
+        root.mkdir(parents=True, exist_ok=True)
+        meta = _empty_meta()
+    else:
+        meta = metadata(root)
+    keys = doc_keys(df)
+    df = df[~keys.duplicated(keep="last")]
+    _set_dead(root, meta, _hash(keys.drop_duplicates().to_numpy(object)))
+    if len(df):
+        _add_segment(root, meta, df, payload_path)
+    _commit(root, meta)
+    return meta
+
+
+def remove(keys, root=SEARCH_DIR) -> int:
+    """Remove rows by key (see doc_keys); returns how many were live."""
+    meta = metadata(root)
+    removed = _set_dead(root, meta, _hash(list(keys)))
+    _commit(root, meta)
+    return removed
+
+
+def compact(root=SEARCH_DIR) -> dict:
+    """Merge every segment's live rows into one segment and delete the old ones."""
+    index = open_index(root)
+    meta = index.meta
+    terms, docs, tfs, keys, names, platforms, categories = [], [], [], [], [], [], []
+    base = 0
+    for seg in index.segments:
+        live = np.asarray(seg["live"])
+        new = np.cumsum(live) - 1 + base  # renumbered rows; removed rows are dropped
+        per_term = np.diff(seg["ptr"])
+        term = np.repeat(np.asarray(seg["term"]), per_term)
+        keep = live[seg["doc"]]
+        order = np.argsort(np.asarray(seg["doc"])[keep], kind="stable")
+        terms.append(term[keep][order])
+        docs.append(new[np.asarray(seg["doc"])[keep]][order].astype(np.int32))
+        tfs.append(np.asarray(seg["tf"])[keep][order])
+        rows = np.flatnonzero(live)
+        keys += [index.string(seg, "key", i) for i in rows]
+        names += [index.string(seg, "name", i) for i in rows]
+        platforms.append(np.asarray(seg["platform"])[live])
+        categories.append(np.asarray(seg["category"])[live])
+        base += len(rows)
+    old = [s["name"] for s in meta["segments"]]
+    del index
+    name = f"seg-{meta['next_segment']:06d}"
+    meta["next_segment"] += 1
+    cat = (lambda parts, dtype: np.concatenate(parts) if parts else np.array([], dtype))
+    seg = _write_segment(Path(root) / name, cat(terms, np.uint64), cat(docs, np.int32), cat(tfs, np.float32), base,
+                         cat(platforms, np.int16), cat(categories, np.int16), np.array(keys, object), names)
+    meta["segments"] = [seg]
+    _commit(root, meta)
+    for n in old:
+        shutil.rmtree(Path(root) / n, ignore_errors=True)
+    return meta
+
+
+class SearchIndex:
+    """A read-only view of the index; arrays are memory-mapped, nothing is copied."""
+
+    ARRAYS = ("term", "ptr", "doc", "tf", "length", "platform", "category", "live",
+              "name", "name_offsets", "key_text", "key_offsets")
+
+    def __init__(self, root=SEARCH_DIR):
+        self.root = Path(root)
+        self.meta = metadata(root)
+        self.segments = [{a: np.load(self.root / s["name"] / f"{a}.npy", mmap_mode="r") for a in self.ARRAYS}
+                         for s in self.meta["segments"]]
+        self.labels = self.meta["labels"]
+        self.docs = sum(s["live"] for s in self.meta["segments"])
+        self.avg_length = sum(s["length"] for s in self.meta["segments"]) / max(self.docs, 1)
+
+    def string(self, seg, field, i) -> str:
+        data, offsets = (seg["key_text"], seg["key_offsets"]) if field == "key" else (seg["name"], seg["name_offsets"])
+        return bytes(data[offsets[i]:offsets[i + 1]]).decode()
+
+    def _filter(self, seg, rows, filters):
+        keep = np.asarray(seg["live"][rows])
+        for col, value in (filters or {}).items():
+            if col not in FILTERS:
+                raise KeyError(f"Unknown filter {col!r}; use {FILTERS}")
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            allowed = np.zeros(len(self.labels[col]) + 1, bool)  # lookup table by code; unknown values -> [-1]
+            allowed[pd.Index(self.labels[col]).get_indexer([str(v) for v in values])] = True
+            allowed[-1] = False
+            keep &= allowed[seg[col][rows]]
+        return keep
+
+    def search(self, query: str, k: int = 10, filters=None) -> pd.DataFrame:
+        """
+        The k best BM25 matches for `query` as a frame (key, app_name, platform, category,
+        score), optionally restricted to {'platform': 'ios', 'category': [...]}.
+        """
+        tokens = pd.Series(tokenize(query)).value_counts()
+        hashes, qtf = _hash(tokens.index.to_numpy(object)), tokens.to_numpy(float)
+        spans = []  # per segment: (lo, hi) postings of each query term
+        df = np.zeros(len(hashes))
+        for seg in self.segments:
+            if not len(seg["term"]):
+                spans.append((np.zeros(len(hashes), np.int64),) * 2)
+                continue
+            pos = np.minimum(np.searchsorted(seg["term"], hashes), len(seg["term"]) - 1)
+            found = np.asarray(seg["term"][pos]) == hashes
+            lo, hi = np.where(found, seg["ptr"][pos], 0), np.where(found, seg["ptr"][pos + found], 0)
+            spans.append((lo, hi))
+            df += hi - lo
+        idf = np.log1p((np.maximum(self.docs - df, 0) + 0.5) / (df + 0.5)) * qtf
+        k1, b = self.meta["k1"], self.meta["b"]
+        # BM25 term weight idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length)), in float32
+        c0, c1 = np.float32(k1 * (1 - b)), np.float32(k1 * b / max(self.avg_length, 1e-9))
+
+        best = []
+        for s, (seg, (lo, hi)) in enumerate(zip(self.segments, spans)):
+            docs, contrib = [], []
+            for l, h, w in zip(lo, hi, idf):
+                if h > l:
+                    d, tf = seg["doc"][l:h], np.asarray(seg["tf"][l:h])
+                    docs.append(d)
+                    contrib.append(tf * np.float32(w * (k1 + 1)) / (tf + c0 + c1 * seg["length"][d]))
+            if not docs:
+                continue
+            docs, contrib = np.concatenate(docs), np.concatenate(contrib)
+            if len(docs) * 16 > len(seg["live"]):  # many postings: a dense accumulator is cheaper than sorting
+                scores = np.bincount(docs, weights=contrib, minlength=len(seg["live"]))
+                rows = np.flatnonzero(scores)
+                scores = scores[rows]
+            else:
+                rows, inv = np.unique(docs, return_inverse=True)
+                scores = np.bincount(inv, weights=contrib)
+            keep = self._filter(seg, rows, filters)
+            rows, scores = rows[keep], scores[keep]
+            top = _top(scores, k)
+            best += [(scores[i], s, rows[i]) for i in top]
+
+        best = sorted(best, key=lambda t: (-t[0], t[1], t[2]))[:k]
+        return pd.DataFrame({
+            "key": [self.string(self.segments[s], "key", r) for _, s, r in best],
+            "app_name": [self.string(self.segments[s], "name", r) for _, s, r in best],
+            "platform": [self.labels["platform"][self.segments[s]["platform"][r]] for _, s, r in best],
+            "category": [self.labels["category"][self.segments[s]["category"][r]] for _, s, r in best],
+            "score": [float(sc) for sc, _, _ in best],
+        })
+
+
+def _top(scores, k) -> np.ndarray:
+    # the k largest, best first, via a partial selection
+    if k < len(scores):
+        idx = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.array([], int)
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def open_index(root=SEARCH_DIR) -> SearchIndex:
+    return SearchIndex(root)
+
+
+def search(query: str, k: int = 10, filters=None, root=SEARCH_DIR) -> pd.DataFrame:
+    return open_index(root).search(query, k, filters)
+
+
+def _filters(args) -> dict:
+    return {k: v for k, v in (("platform", args.platform), ("category", args.category)) if v}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="index an artifact's app names and descriptions")
+    b.add_argument("artifact", nargs="?", default="outputs/clean_combined_apps")
+    b.add_argument("--batch-rows", type=int, default=250_000)
+    q = sub.add_parser("query")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=10)
+    q.add_argument("--platform", nargs="*")
+    q.add_argument("--category", nargs="*")
+    sub.add_parser("compact", help="merge segments and drop removed rows")
+    for p in sub.choices.values():
+        p.add_argument("--root", default=str(SEARCH_DIR))
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        meta = build(args.artifact, args.root, args.batch_rows)
+        print(f"✅ {sum(s['rows'] for s in meta['segments']):,} apps indexed -> {args.root} "
+              f"({len(meta['segments'])} segments)")
+    elif args.cmd == "compact":
+        meta = compact(args.root)
+        print(f"✅ {meta['segments'][0]['rows']:,} live apps in one segment")
+    else:
+        print(search(args.text, args.k, _filters(args), args.root).to_string(index=False))
+    print(f"({time.perf_counter() - t0:.2f}s)")
@@ -0,0 +1,305 @@
+# src/sketches.py
+"""
+Mergeable per-category aggregates behind analytics.category_summary. Each shard, chunk
+or worker builds a CategorySketch from its rows; sketches merge in any order and
+grouping, save to a small .npz, and summary() returns the category_summary frame:
+
+  * avg_rating     count / sum / sum of squares of the ratings: exact (as is the variance
+                   in moments(), the input stats_engine works from)
+  * total_reviews  an exact sum
+  * apps           HyperLogLog over the app key (app_entity_id, else app_name), 2**p
+                   one-byte registers per category (p=14: 16 KB). Relative standard error
+                   1.04 / sqrt(2**p), 0.8% at p=14, over the whole range; a few hundred apps
+                   come out within a few apps.
+  * median_price   a merging t-digest (k1 scale function, compression delta=200: at most
+                   ~delta/2 centroids per category). Every centroid spans at most pi/delta
+                   of the category's rank range around the median, so the estimate's rank
+                   is within ~pi/delta (1.6%) of n of the true median, and within 2 * pi/delta
+                   after repeated merges. Categories with fewer than ~delta/2 prices keep
+                   every value and give pandas' median exactly.
+
+    s = CategorySketch.from_frame(chunk_a).merge(CategorySketch.from_frame(chunk_b))
+    s.save('outputs/sketches/summary.npz'); CategorySketch.load(...).summary()
+
+    python src/sketches.py build outputs/clean_combined_apps --jobs 4
+    python src/sketches.py merge a.npz b.npz --out outputs/sketches/summary.npz
+    python src/sketches.py summary outputs/sketches/summary.npz
+"""
+import argparse
+import json
+import time
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import finish_category_summary
+from storage import iter_table, resolve
+
+HLL_P = 14
+COMPRESSION = 200
+SKETCH_PATH = Path("outputs/sketches/summary.npz")
+COLUMNS = ["category", "app_entity_id", "app_name", "rating", "price_usd", "review_count"]
+
+
+def _bit_length(w) -> np.ndarray:
+    # exact for w < 2**53 (float64 holds it exactly; frexp gives the exponent)
+    return np.where(w > 0, np.frexp(w.astype(np.float64))[1], 0)
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return np.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_old, z, y = z, z + x * y, 2 * y
+        if z == z_old:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x in (0, 1):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        z_old, z = z, z - (1 - x) ** 2 * y
+        if z == z_old:
+            return z / 3
+
+
+def hll_estimate(registers) -> np.ndarray:
+    """
+    Cardinality per row of an (n, 2**p) register array, with Ertl's improved estimator
+    ("New cardinality estimation algorithms for HyperLogLog sketches", 2017): unbiased
+    from a handful of items up, without the empirical bias tables of HyperLogLog++.
+    """
+    n, m = registers.shape
+    q = 64 - int(np.log2(m))
+    out = np.zeros(n)
+    for i, row in enumerate(registers):
+        c = np.bincount(row, minlength=q + 2)
+        z = m * _tau(1 - c[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + c[k])
+        z += m * _sigma(c[0] / m)
+        out[i] = m * m / (2 * np.log(2)) / z
+    return out
+
+
+def _compress(cat, mean, weight, n_cats, delta=COMPRESSION):
+    """
+    Points or centroids (cat, mean, weight) -> t-digest centroids sorted by (cat, mean).
+    Each point goes to bucket floor(k(q)) of the k1 scale function at its mid-rank q in
+    its category, so the centroid sizes respect the usual t-digest bound.
+    """
+    order = np.lexsort((mean, cat))
+    cat, mean, weight = cat[order], mean[order], weight[order]
+    total = np.bincount(cat, weights=weight, minlength=n_cats)
+    before = np.r_[0.0, np.cumsum(total)[:-1]]
+    q = (np.cumsum(weight) - weight / 2 - before[cat]) / total[cat]
+    k = np.floor(delta / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+    new = np.r_[True, (cat[1:] != cat[:-1]) | (k[1:] != k[:-1])] if len(cat) else np.array([], bool)
+    ids = np.cumsum(new) - 1
+    w = np.bincount(ids, weights=weight)
+    starts = np.flatnonzero(new)
+    lo, hi = mean[starts], np.maximum.reduceat(mean, starts) if len(starts) else mean[:0]
+    m = np.where(lo == hi, lo, np.bincount(ids, weights=weight * mean) / np.where(w > 0, w, 1))  # ties stay exact
+    return cat[starts], m, w
+
+
+class CategorySketch:
+    """Per-category mergeable state; see the module docstring for what each part estimates."""
+
+    def __init__(self, categories=(), p=HLL_P, compression=COMPRESSION):
+        self.p, self.compression = p, compression
+        self.categories = list(categories)
+        n = len(self.categories)
+        self.rating_n = np.zeros(n, np.int64)
+        self.rating_sum = np.zeros(n)
+        self.rating_sumsq = np.zeros(n)
+        self.reviews = np.zeros(n, np.int64)
+        self.registers = np.zeros((n, 1 << p), np.uint8)
+        self.price_min = np.full(n, np.nan)
+        self.price_max = np.full(n, np.nan)
+        self.centroid_cat = np.zeros(0, np.int64)
+        self.centroid_mean = np.zeros(0)
+        self.centroid_weight = np.zeros(0)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key=None, p=HLL_P, compression=COMPRESSION) -> "CategorySketch":
+        """Sketch of a frame's rows; rows without a category are left out, as in groupby."""
+        df = df[df["category"].notna()]
+        codes, uniques = pd.factorize(df["category"].astype(str))
+        s = cls(uniques, p, compression)
+        n = len(uniques)
+
+        rating = pd.to_numeric(df["rating"], errors="coerce").to_numpy(np.float64)
+        ok = ~np.isnan(rating)
+        s.rating_n = np.bincount(codes[ok], minlength=n).astype(np.int64)
+        s.rating_sum = np.bincount(codes[ok], weights=rating[ok], minlength=n)
+        s.rating_sumsq = np.bincount(codes[ok], weights=rating[ok] ** 2, minlength=n)
+
+        reviews = pd.to_numeric(df["review_count"], errors="coerce").to_numpy(np.float64)
+        ok = ~np.isnan(reviews)
+        s.reviews = np.bincount(codes[ok], weights=reviews[ok], minlength=n).round().astype(np.int64)
+
+        key = key or ("app_entity_id" if "app_entity_id" in df.columns else "app_name")
+        ids = df[key]
+        ok = ids.notna().to_numpy()
+        h = pd.util.hash_array(ids[ok].astype(str).to_numpy(object))
+        tail = np.uint64(64 - p)
+        rank = (64 - p) - _bit_length(h & np.uint64((1 << (64 - p)) - 1)) + 1
+        flat = s.registers.reshape(-1)
+        np.maximum.at(flat, codes[ok] * (1 << p) + (h >> tail).astype(np.int64), rank.astype(np.uint8))
+
+        price = pd.to_numeric(df["price_usd"], errors="coerce").to_numpy(np.float64)
+        ok = ~np.isnan(price)
+        s._set_digest(codes[ok], price[ok], np.ones(ok.sum()))
+        return s
+
+    def _set_digest(self, cat, mean, weight):
+        n = len(self.categories)
+        self.centroid_cat, self.centroid_mean, self.centroid_weight = _compress(cat, mean, weight, n, self.compression)
+        self.price_min = np.full(n, np.nan)
+        self.price_max = np.full(n, np.nan)
+        np.fmin.at(self.price_min, cat, mean)
+        np.fmax.at(self.price_max, cat, mean)
+
+    def merge(self, other: "CategorySketch") -> "CategorySketch":
+        """A new sketch holding both inputs' rows (neither input is modified)."""
+        if (self.p, self.compression) != (other.p, other.compression):
+            raise ValueError("sketches built with different p / compression can't be merged")
+        labels = list(dict.fromkeys(self.categories + other.categories))
+        out = CategorySketch(labels, self.p, self.compression)
+        pos = {c: i for i, c in enumerate(labels)}
+        cats, means, weights, lows, highs = [], [], [], [], []
+        for s in (self, other):
+            at = np.array([pos[c] for c in s.categories], np.int64)
+            out.rating_n[at] += s.rating_n
+            out.rating_sum[at] += s.rating_sum
+            out.rating_sumsq[at] += s.rating_sumsq
+            out.reviews[at] += s.reviews
+            out.registers[at] = np.maximum(out.registers[at], s.registers)
+            cats.append(at[s.centroid_cat])
+            means.append(s.centroid_mean)
+            weights.append(s.centroid_weight)
+            lows.append((at, s.price_min))
+            highs.append((at, s.price_max))
+        out.centroid_cat, out.centroid_mean, out.centroid_weight = _compress(
+            np.concatenate(cats), np.concatenate(means), np.concatenate(weights), len(labels), self.compression)
+        for (at, lo), (_, hi) in zip(lows, highs):
+            out.price_min[at] = np.fmin(out.price_min[at], lo)
+            out.price_max[at] = np.fmax(out.price_max[at], hi)
+        return out
+
+    def update(self, df: pd.DataFrame) -> "CategorySketch":
+        """This sketch plus df's rows (incremental refresh: only new rows are scanned)."""
+        return self.merge(CategorySketch.from_frame(df, p=self.p, compression=self.compression))
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Estimated q-quantile of price_usd per category (NaN where a category has no prices)."""
+        out = np.full(len(self.categories), np.nan)
+        bounds = np.searchsorted(self.centroid_cat, np.arange(len(self.categories) + 1))
+        for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if hi > lo:
+                w, m = self.centroid_weight[lo:hi], self.centroid_mean[lo:hi]
+                centers = np.cumsum(w) - w / 2
+                # below the first / past the last centre: towards the exact min / max
+                out[i] = np.interp(q * w.sum(), np.r_[0, centers, w.sum()], np.r_[self.price_min[i], m, self.price_max[i]])
+        return out
+
+    def moments(self) -> pd.DataFrame:
+        """n / mean / sample variance of the ratings per category, as stats_engine.rating_moments."""
+        n = self.rating_n.astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.rating_sum / n
+            var = np.maximum(self.rating_sumsq - n * mean ** 2, 0) / (n - 1)
+        m = pd.DataFrame({"n": self.rating_n, "mean": mean, "var": np.where(n > 1, var, np.nan)},
+                         index=pd.Index(self.categories, name="category"))
+        return m[m["n"] > 0].sort_index()
+
+    def summary(self) -> pd.DataFrame:
+        """analytics.category_summary from the sketch (apps and median_price estimated)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg = self.rating_sum / self.rating_n
+        g = pd.DataFrame({
+            "category": self.categories,
+            "apps": np.rint(hll_estimate(self.registers)).astype(np.int64),
+            "avg_rating": avg,
+            "median_price": self.quantile(0.5),
+            "total_reviews": self.reviews,
+        }).sort_values("category").reset_index(drop=True)
+        return finish_category_summary(g)
+
+    def save(self, path=SKETCH_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"categories": self.categories, "p": self.p, "compression": self.compression}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), rating_n=self.rating_n,
+                            rating_sum=self.rating_sum, rating_sumsq=self.rating_sumsq, reviews=self.reviews,
+                            registers=self.registers, price_min=self.price_min, price_max=self.price_max,
+                            centroid_cat=self.centroid_cat, centroid_mean=self.centroid_mean,
+                            centroid_weight=self.centroid_weight)
+        return path
+
+    @classmethod
+    def load(cls, path=SKETCH_PATH) -> "CategorySketch":
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f["meta"]))
+            s = cls(meta["categories"], meta["p"], meta["compression"])
+            for name in ("rating_n", "rating_sum", "rating_sumsq", "reviews", "registers", "price_min",
+                         "price_max", "centroid_cat", "centroid_mean", "centroid_weight"):
+                setattr(s, name, f[name])
+        return s
+
+
+def sketch_frames(frames, n_jobs=1, key=None) -> CategorySketch:
+    """One sketch over an iterable of frames (e.g. iter_table chunks), n_jobs processes at a time."""
+    if n_jobs == 1:
+        parts = (CategorySketch.from_frame(df, key) for df in frames)
+    else:
+        from joblib import Parallel, delayed
+
+        parts = Parallel(n_jobs=n_jobs)(delayed(CategorySketch.from_frame)(df, key) for df in frames)
+    return reduce(CategorySketch.merge, parts, CategorySketch())
+
+
+def build(artifact="outputs/clean_combined_apps", n_jobs=1, batch_rows=500_000) -> CategorySketch:
+    """Sketch a storage artifact chunk by chunk (the key column is fixed up front, for every chunk)."""
+    import pyarrow.parquet as pq
+
+    path = resolve(artifact)
+    names = pq.read_schema(path).names if path.suffix == ".parquet" else pd.read_csv(path, nrows=0).columns
+    key = "app_entity_id" if "app_entity_id" in names else "app_name"
+    columns = [c for c in COLUMNS if c in names] if path.suffix == ".parquet" else None
+    return sketch_frames(iter_table(path, columns=columns, batch_rows=batch_rows), n_jobs, key)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="sketch an artifact")
+    b.add_argument("artifact", nargs="?", default="outputs/clean_combined_apps")
+    b.add_argument("--jobs", type=int, default=1)
+    b.add_argument("--batch-rows", type=int, default=500_000)
+    b.add_argument("--out", default=str(SKETCH_PATH))
+    m = sub.add_parser("merge", help="merge saved sketches")
+    m.add_argument("paths", nargs="+")
+    m.add_argument("--out", default=str(SKETCH_PATH))
+    s = sub.add_parser("summary")
+    s.add_argument("path", nargs="?", default=str(SKETCH_PATH))
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "summary":
+        print(CategorySketch.load(args.path).summary().to_string(index=False))
+    else:
+        sketch = (build(args.artifact, args.jobs, args.batch_rows) if args.cmd == "build"
+                  else reduce(CategorySketch.merge, map(CategorySketch.load, args.paths)))
+        out = sketch.save(args.out)
+        print(f"✅ {len(sketch.categories)} categories sketched -> {out} ({out.stat().st_size / 1024:.0f} KB)")
+    print(f"({time.perf_counter() - t0:.2f}s)")
@@ -0,0 +1,362 @@
+# src/snapshots.py
+"""
+Append-only history of app metrics. Every pipeline run overwrites clean_combined_apps,
+so each run is also appended here as a snapshot, storing only the apps whose tracked
+columns (TRACKED) changed since the previous snapshot:
+
+    date=2024-05-01/part-000003.parquet   new and changed apps that day, plus a tombstone
+                                          (deleted=True, everything else null) for every app
+                                          that disappeared; in key hash order
+    index-000004/key.npy     uint64 hash of the app key (search.doc_keys: platform:app_id,
+                             else platform:app_name|category)
+                 day.npy     snapshot date, days since 1970-01-01
+                 row.npy     row of that version in the date's partition
+                 digest.npy  hash of the version's TRACKED values, 0 for a tombstone
+    _snapshots.json          per-date files and counts; written last, so readers never
+                             see a half-written snapshot
+
+The index holds one entry per stored version, sorted by (key, day), and is memory-mapped.
+An app's newest version is the last entry of its key, which append() compares digests
+against. as_of(date) takes each key's last entry on or before `date`, and history(keys)
+takes the keys' entry ranges. Both then read only the Parquet row groups that hold
+those rows.
+
+Each append is treated as the full catalogue on its date. Dates must not go backwards.
+Appending the same date again replaces that date's snapshot, so a rerun of the pipeline
+is idempotent.
+
+    python src/snapshots.py append outputs/clean_combined_apps --date 2024-05-01
+    python src/snapshots.py as-of 2024-05-01 --out outputs/apps_2024-05-01.parquet
+    python src/snapshots.py history "ios:284882215" "android:Facebook|social"
+    python src/snapshots.py growth 2024-04-01 2024-05-01
+
+MARKET_INTEL_SNAPSHOTS sets the default location.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from search import doc_keys
+from storage import arrow_schema, coerce, read_table, write_table
+
+SNAPSHOT_DIR = Path(os.getenv("MARKET_INTEL_SNAPSHOTS", "outputs/snapshots"))
+META = "_snapshots.json"
+TRACKED = ["app_name", "category", "rating", "review_count", "price_usd", "last_updated"]
+COLUMNS = ["platform", "app_id"] + TRACKED + ["deleted"]
+ROW_GROUP = 8192
+INDEX_FIELDS = ("key", "day", "row", "digest")
+DAY_NS = 86_400 * 10**9
+
+
+def _day(date) -> int:
+    return int(pd.Timestamp(date).normalize().value // DAY_NS)
+
+
+def _date(day) -> str:
+    return pd.Timestamp(int(day) * DAY_NS).strftime("%Y-%m-%d")
+
+
+def _empty_meta() -> dict:
+    return {"snapshots": [], "index": None, "next": 0, "row_group": ROW_GROUP, "tracked": TRACKED,
+            "apps": 0, "versions": 0}
+
+
+def metadata(root=SNAPSHOT_DIR) -> dict:
+    path = Path(root) / META
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found; append a snapshot first (python src/snapshots.py append)")
+    return json.loads(path.read_text())
+
+
+def signature(root=SNAPSHOT_DIR) -> tuple:
+    """Changes whenever a snapshot is appended (the metadata file is written last)."""
+    st = os.stat(Path(root) / META)
+    return st.st_mtime_ns, st.st_size
+
+
+def _commit(root, meta):
+    meta["written_at"] = pd.Timestamp.now().isoformat(timespec="seconds")
+    tmp = Path(root) / f"{META}.tmp"
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, Path(root) / META)
+
+
+def _load_index(root, meta) -> dict:
+    if meta["index"] is None:
+        return {"key": np.empty(0, np.uint64), "day": np.empty(0, np.int32),
+                "row": np.empty(0, np.int32), "digest": np.empty(0, np.uint64)}
+    path = Path(root) / meta["index"]
+    return {f: np.load(path / f"{f}.npy", mmap_mode="r") for f in INDEX_FIELDS}
+
+
+def _newest(ix, day=None) -> np.ndarray:
+    """Positions of each key's last entry (on or before `day`), tombstones included."""
+    ok = np.ones(len(ix["key"]), bool) if day is None else ix["day"] <= day
+    # sorted by (key, day): an entry is superseded if the next one is the same key and also in range
+    superseded = np.zeros(len(ok), bool)
+    superseded[:-1] = (ix["key"][1:] == ix["key"][:-1]) & ok[1:]
+    return np.flatnonzero(ok & ~superseded)
+
+
+def _frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per app key, canonical dtypes, sorted by key hash. Rows with neither an
+    app_id nor a name can't be told apart and are dropped (counted in attrs['skipped']).
+    Rows that repeat a key (e.g. Play Store names that differ only by surrounding
+    whitespace, stripped by the ingest after it deduplicated) keep the one with the
+    most reviews, earliest row on ties (counted in attrs['collapsed']).
+    """
+    frame = coerce(df.reindex(columns=["platform", "app_id"] + TRACKED))
+    anonymous = (frame["app_id"].fillna("") == "") & (frame["app_name"].fillna("") == "")
+    frame = frame[~anonymous.to_numpy()].copy()
+    keys = doc_keys(frame).to_numpy(object)
+    frame.insert(0, "key", keys)
+    frame.insert(0, "key_hash", pd.util.hash_array(keys, categorize=False))  # distinct: don't factorize first
+    n = len(frame)
+    if frame["key_hash"].duplicated().any():
+        frame = (frame.sort_values("review_count", ascending=False, na_position="last", kind="stable")
+                 .drop_duplicates("key_hash"))
+    frame = frame.sort_values("key_hash", kind="stable").reset_index(drop=True)
+    frame.attrs["skipped"] = int(anonymous.sum())
+    frame.attrs["collapsed"] = n - len(frame)
+    return frame
+
+
+def digest(frame: pd.DataFrame) -> np.ndarray:
+    """Hash of each row's TRACKED values (never 0, which marks a tombstone)."""
+    values = frame[TRACKED].astype({"category": object, "review_count": float})
+    return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy() | np.uint64(1)
+
+
+def _write_partition(path: Path, delta: pd.DataFrame) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    delta = coerce(delta)
+    table = pa.Table.from_pandas(delta, schema=arrow_schema(delta), preserve_index=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path, compression="zstd", row_group_size=ROW_GROUP)
+    return path.stat().st_size
+
+
+def append(df: pd.DataFrame, date=None, root=SNAPSHOT_DIR) -> dict:
+    """
+    Record `df` (the whole catalogue) as the snapshot for `date` (default: today) and
+    return that date's entry in the metadata: rows written, new, changed and removed
+    apps, live apps and bytes on disk.
+    """
+    t0 = time.perf_counter()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    meta = json.loads((root / META).read_text()) if (root / META).exists() else _empty_meta()
+    day = _day(date if date is not None else pd.Timestamp.now())
+    last = _day(meta["snapshots"][-1]["date"]) if meta["snapshots"] else None
+    if last is not None and day < last:
+        raise ValueError(f"snapshots are append-only: {_date(day)} is before the last snapshot {_date(last)}")
+
+    ix = {f: np.asarray(a) for f, a in _load_index(root, meta).items()}
+    replaced = None
+    if day == last:  # rerun on the same date: drop that snapshot and diff against the one before
+        keep = ix["day"] != day
+        ix = {f: a[keep] for f, a in ix.items()}
+        replaced = meta["snapshots"].pop()
+
+    frame = _frame(df)
+    if len(frame) + frame.attrs["skipped"] + frame.attrs["collapsed"] != len(df):
+        raise AssertionError(f"{len(df):,} rows appended but {len(frame):,} stored")
+    new_digest = digest(frame)
+    newest = _newest(ix)
+    known, known_digest = ix["key"][newest], ix["digest"][newest]
+    hashes = frame["key_hash"].to_numpy()
+    pos = np.searchsorted(known, hashes)
+    found = pos < len(known)
+    found[found] = known[pos[found]] == hashes[found]
+    prev = np.zeros(len(frame), np.uint64)  # 0: never seen, or removed since
+    prev[found] = known_digest[pos[found]]
+    write = prev != new_digest
+    gone = known[(known_digest != 0) & ~np.isin(known, hashes, assume_unique=True)]
+
+    delta = pd.concat([frame[write].assign(deleted=False), pd.DataFrame({"key_hash": gone, "deleted": True})],
+                      ignore_index=True)
+    order = np.argsort(delta["key_hash"].to_numpy(np.uint64), kind="stable")
+    delta = delta.iloc[order].reset_index(drop=True)
+    delta_keys = delta.pop("key_hash").to_numpy(np.uint64)
+    delta = delta.reindex(columns=COLUMNS)  # the key itself is rebuilt from platform/app_id/app_name
+    digests = np.concatenate([new_digest[write], np.zeros(len(gone), np.uint64)])[order]
+
+    seq = meta["next"]
+    meta["next"] += 1
+    entry = {"date": _date(day), "file": None, "rows": len(delta), "new": int((write & (prev == 0)).sum()),
+             "changed": int((write & (prev != 0)).sum()), "removed": len(gone), "apps": len(frame),
+             "skipped": frame.attrs["skipped"], "collapsed": frame.attrs["collapsed"], "bytes": 0}
+    if len(delta):
+        entry["file"] = f"date={entry['date']}/part-{seq:06d}.parquet"
+        entry["bytes"] = _write_partition(root / entry["file"], delta)
+
+    merged = {"key": np.concatenate([ix["key"], delta_keys]),
+              "day": np.concatenate([ix["day"], np.full(len(delta), day, np.int32)]),
+              "row": np.concatenate([ix["row"], np.arange(len(delta), dtype=np.int32)]),
+              "digest": np.concatenate([ix["digest"], digests])}
+    order = np.lexsort((merged["day"], merged["key"]))
+    index_dir = root / f"index-{seq:06d}"
+    index_dir.mkdir(exist_ok=True)  # left behind by an append that never committed
+    for f, a in merged.items():
+        np.save(index_dir / f"{f}.npy", a[order])
+
+    old_index = meta["index"]
+    meta["index"] = index_dir.name
+    meta["snapshots"].append(entry)
+    meta["apps"], meta["versions"] = len(frame), len(order)
+    entry["append_s"] = round(time.perf_counter() - t0, 3)
+    _commit(root, meta)
+    # readers that opened the old index keep their mapping; new ones go through the metadata
+    if old_index:
+        shutil.rmtree(root / old_index, ignore_errors=True)
+    if replaced and replaced["file"]:
+        (root / replaced["file"]).unlink(missing_ok=True)
+    return entry
+
+
+def _read(root, meta, ix, positions, columns=None) -> pd.DataFrame:
+    """
+    Stored rows of the index entries at `positions` (plus their key_hash and
+    snapshot_date), reading only the row groups that hold them.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    files = {_day(s["date"]): s["file"] for s in meta["snapshots"]}
+    size = meta["row_group"]
+    positions = positions[np.lexsort((ix["row"][positions], ix["day"][positions]))]
+    days, rows = ix["day"][positions], ix["row"][positions]
+    tables = []
+    for day in np.unique(days):
+        r = rows[days == day]
+        groups = np.unique(r // size)
+        with pq.ParquetFile(Path(root) / files[int(day)]) as f:
+            table = f.read_row_groups(groups.tolist(), columns=columns)
+        # the groups come back concatenated; every group but a file's last holds `size` rows
+        tables.append(table.take(np.searchsorted(groups, r // size) * size + r % size).replace_schema_metadata())
+    if not tables:
+        return pd.DataFrame(columns=(columns or COLUMNS) + ["key_hash", "snapshot_date"])
+    df = pa.concat_tables(tables).to_pandas()
+    # dictionaries differ between partitions; sort the merged categories as read_table() does
+    for c in df.select_dtypes("category"):
+        df[c] = df[c].cat.reorder_categories(sorted(df[c].cat.categories))
+    df["key_hash"] = ix["key"][positions]
+    df["snapshot_date"] = pd.to_datetime(days.astype(np.int64) * DAY_NS)
+    return df
+
+
+def _live(root, meta, ix, date, columns=None) -> pd.DataFrame:
+    # every app's newest version on or before `date`, tombstones dropped
+    pos = _newest(ix, _day(date) if date is not None else None)
+    return _read(root, meta, ix, pos[ix["digest"][pos] != 0], columns)
+
+
+def as_of(date=None, root=SNAPSHOT_DIR, columns=None) -> pd.DataFrame:
+    """
+    The catalogue as it stood on `date` (default: the latest snapshot): every app's
+    newest version recorded on or before that date, with the date of that version in
+    snapshot_date. `columns` restricts what is returned besides the key.
+    """
+    meta = metadata(root)
+    ident = ["platform", "app_id", "app_name", "category"]
+    read = None if columns is None else list(dict.fromkeys(ident + [c for c in columns if c != "key"]))
+    df = _live(root, meta, _load_index(root, meta), date, read)
+    df.insert(0, "key", doc_keys(df).to_numpy(object) if len(df) else [])
+    keep = ["key"] + (columns if columns is not None else COLUMNS[:-1]) + ["snapshot_date"]
+    return df[list(dict.fromkeys(keep))]
+
+
+def history(keys, root=SNAPSHOT_DIR) -> pd.DataFrame:
+    """
+    Every stored version of the given apps (keys as in search.doc_keys, e.g.
+    'ios:284882215' or 'android:Facebook|social'), oldest first. A version with
+    deleted=True records the app disappearing from the catalogue; it has no metrics.
+    """
+    keys = pd.unique(np.asarray([keys] if isinstance(keys, str) else list(keys), dtype=object))
+    hashes = pd.util.hash_array(keys, categorize=False)
+    meta = metadata(root)
+    ix = _load_index(root, meta)
+    lo, hi = np.searchsorted(ix["key"], hashes, "left"), np.searchsorted(ix["key"], hashes, "right")
+    pos = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)] + [np.empty(0, np.int64)])
+    df = _read(root, meta, ix, pos)
+    df.insert(0, "key", df.pop("key_hash").map(dict(zip(hashes, keys))))  # tombstones store no identity
+    return df.sort_values(["key", "snapshot_date"]).reset_index(drop=True)
+
+
+def review_growth(start, end=None, root=SNAPSHOT_DIR, by="category") -> pd.DataFrame:
+    """
+    Reviews gained per `by` group between the catalogues as of `start` and `end` by the
+    apps present on both dates, next to the apps added and removed in between. Unlike
+    analytics.detect_growth this measures real changes in the metrics, not last_updated.
+    """
+    meta = metadata(root)
+    ix = _load_index(root, meta)
+    a = _live(root, meta, ix, start, [by, "review_count"]).set_index("key_hash")
+    b = _live(root, meta, ix, end, [by, "review_count"]).set_index("key_hash")
+    both = b.join(a["review_count"].rename("reviews_start"), how="inner")
+    g = both.groupby(by, observed=True).agg(apps=("review_count", "size"),
+                                            reviews_start=("reviews_start", "sum"),
+                                            reviews_end=("review_count", "sum"))
+    g["new_apps"] = b[~b.index.isin(a.index)].groupby(by, observed=True).size()
+    g["removed_apps"] = a[~a.index.isin(b.index)].groupby(by, observed=True).size()
+    g = g.fillna({"new_apps": 0, "removed_apps": 0}).astype({"new_apps": int, "removed_apps": int})
+    g["review_growth"] = ((g["reviews_end"] - g["reviews_start"]) / (g["reviews_start"] + 1)).round(3)
+    return g.sort_values("review_growth", ascending=False).reset_index()
+
+
+def main(artifact="outputs/clean_combined_apps", date=None, root=SNAPSHOT_DIR) -> dict:
+    # pipeline stage: snapshot what merge_normalize.unify just wrote
+    entry = append(read_table(artifact), date, root)
+    print(f"✅ Snapshot {entry['date']}: {entry['rows']:,} rows written ({entry['new']:,} new, "
+          f"{entry['changed']:,} changed, {entry['removed']:,} removed) of {entry['apps']:,} apps "
+          f"-> {root} ({entry['bytes'] / 2**20:.1f} MB)")
+    if entry["skipped"]:
+        print(f"⚠️ {entry['skipped']:,} rows with neither an app_id nor a name were not snapshotted")
+    if entry["collapsed"]:
+        print(f"⚠️ {entry['collapsed']:,} rows repeated an app key; the one with the most reviews was kept")
+    return entry
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    a = sub.add_parser("append", help="snapshot an artifact, storing the apps that changed")
+    a.add_argument("artifact", nargs="?", default="outputs/clean_combined_apps")
+    a.add_argument("--date", help="snapshot date (default: today)")
+    s = sub.add_parser("as-of", help="reconstruct the catalogue on a date")
+    s.add_argument("date", nargs="?")
+    s.add_argument("--out", help="write it to a .parquet/.feather/.csv instead of printing a sample")
+    h = sub.add_parser("history", help="every version of some apps")
+    h.add_argument("keys", nargs="+", help="platform:app_id, or platform:app_name|category where there is no id")
+    g = sub.add_parser("growth", help="reviews gained per category between two dates")
+    g.add_argument("start")
+    g.add_argument("end", nargs="?")
+    for p in sub.choices.values():
+        p.add_argument("--root", default=str(SNAPSHOT_DIR))
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "append":
+        main(args.artifact, args.date, args.root)
+    elif args.cmd == "as-of":
+        df = as_of(args.date, args.root)
+        if args.out:
+            write_table(df, args.out)
+            print(f"✅ {len(df):,} apps -> {args.out}")
+        else:
+            print(df.head(20).to_string(index=False))
+            print(f"{len(df):,} apps")
+    elif args.cmd == "history":
+        print(history(args.keys, args.root).to_string(index=False))
+    else:
+        print(review_growth(args.start, args.end, args.root).to_string(index=False))
+    print(f"({time.perf_counter() - t0:.2f}s)")
@@ -0,0 +1,201 @@
+# src/stats_engine.py
+"""
+Per-category rating statistics computed in one grouped pass instead of re-filtering
+the frame for every category: sample moments, freshest last_updated, Cohen's d against
+the global rating distribution and a Welch t-test against a reference category.
+Everything after the groupby works on the (small) per-category moment arrays.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from confidence import cohen_d_vec
+
+
+def rating_moments(df, by='category', value='rating'):
+    """n (non-null values), mean and sample variance (ddof=1) per group, one groupby."""
+    g = pd.to_numeric(df[value], errors='coerce').groupby(df[by], observed=True, sort=True)
+    m = pd.DataFrame({'n': g.count(), 'mean': g.mean(), 'var': g.var(ddof=1)})
+    m['n'] = m['n'].astype(int)
+    return m
+
+
+def cohen_d_from_moments(mean_a, var_a, n_a, mean_b, var_b, n_b):
+    """confidence.cohen_d_vec from variances (0.0 where undefined)."""
+    return cohen_d_vec(mean_a, np.sqrt(np.asarray(var_a, float)), n_a, mean_b, np.sqrt(np.asarray(var_b, float)), n_b)
+
+
+def welch_test(mean_a, var_a, n_a, mean_b, var_b, n_b):
+    """Welch's unequal-variance t-test for arrays of group moments; returns (t, p)."""
+    from scipy import stats  # ~1s to import, so only once a test is actually run
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t, p = stats.ttest_ind_from_stats(
+            np.asarray(mean_a, float), np.sqrt(np.asarray(var_a, float)), np.asarray(n_a, float),
+            np.asarray(mean_b, float), np.sqrt(np.asarray(var_b, float)), np.asarray(n_b, float),
+            equal_var=False,
+        )
+    return np.asarray(t, float), np.asarray(p, float)
+
+
+def bh_adjust(p):
+    """Benjamini-Hochberg adjusted p-values (FDR); NaNs stay NaN and don't count as tests."""
+    p = np.asarray(p, float)
+    out = np.full(p.shape, np.nan)
+    ok = ~np.isnan(p)
+    m = ok.sum()
+    if m == 0:
+        return out
+    order = np.argsort(p[ok], kind='stable')
+    ranked = p[ok][order] * m / np.arange(1, m + 1)
+    adj = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    vals = np.empty(m)
+    vals[order] = adj
+    out[ok] = vals
+    return out
+
+
+def rest_moments(m):
+    """n/mean/var of all *other* groups' values combined, from the per-group moments."""
+    n = m['n'].to_numpy(float)
+    mean = m['mean'].to_numpy(float)
+    ss_within = np.where(n > 1, (n - 1) * np.nan_to_num(m['var'].to_numpy(float)), 0.0)
+    s, ss = n * np.nan_to_num(mean), ss_within + n * np.nan_to_num(mean) ** 2
+    n_r = n.sum() - n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_r = (s.sum() - s) / n_r
+        var_r = (ss.sum() - ss - n_r * mean_r ** 2) / (n_r - 1)
+    return pd.DataFrame({'n': n_r.astype(int), 'mean': mean_r, 'var': np.maximum(var_r, 0)}, index=m.index)
+
+
+def pairwise_welch(m, mode='all', pairs=None):
+    """
+    Welch tests between groups straight from their moments (as rating_moments):
+      mode='all'   every unordered pair (a < b), len(m) * (len(m) - 1) / 2 tests
+      mode='rest'  every group vs all other groups combined (b == '<rest>')
+      pairs=[(a, b), ...] only those pairs
+    Returns one row per test with mean_diff, cohen_d, t, p and p_adj (Benjamini-Hochberg
+    over all tests in the frame).
+    """
+    names = m.index.to_numpy()
+    if pairs is not None:
+        pos = pd.Series(np.arange(len(m)), index=m.index)
+        ia, ib = pos.loc[[a for a, _ in pairs]].to_numpy(), pos.loc[[b for _, b in pairs]].to_numpy()
+        a, b = m.iloc[ia], m.iloc[ib]
+        label_a, label_b = names[ia], names[ib]
+    elif mode == 'all':
+        ia, ib = np.triu_indices(len(m), k=1)
+        a, b = m.iloc[ia], m.iloc[ib]
+        label_a, label_b = names[ia], names[ib]
+    elif mode == 'rest':
+        a, b = m, rest_moments(m)
+        label_a, label_b = names, np.full(len(m), '<rest>', dtype=object)
+    else:
+        raise ValueError(f"mode must be 'all' or 'rest', not {mode!r}")
+
+    cols = [x[c].to_numpy(float) for x in (a, b) for c in ('mean', 'var', 'n')]
+    t, p = welch_test(*cols)
+    out = pd.DataFrame({
+        'a': label_a, 'b': label_b,
+        'n_a': a['n'].to_numpy(int), 'n_b': b['n'].to_numpy(int),
+        'mean_diff': cols[0] - cols[3],
+        'cohen_d': cohen_d_from_moments(*cols),
+        't': t, 'p': p,
+    })
+    out['p_adj'] = bh_adjust(out['p'])
+    return out
+
+
+def resample_pvalues(samples_a, samples_b, method='permutation', n_resamples=9999, seed=None, batch=1000):
+    """
+    Two-sided resampling p-values for a list of (a, b) sample pairs, for ratings that
+    aren't close to normal:
+      permutation  difference of means under random relabelling of the pooled values
+      bootstrap    Welch t with both groups shifted to the pooled mean (null imposed)
+                   and resampled with replacement
+    Resamples for a pair are drawn as one (batch x size) matrix at a time. p is
+    (hits + 1) / (n_resamples + 1), NaN for pairs with fewer than 2 values per side.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.full(len(samples_a), np.nan)
+    for i, (x, y) in enumerate(zip(samples_a, samples_b)):
+        x, y = np.asarray(x, float), np.asarray(y, float)
+        na, nb = len(x), len(y)
+        if na < 2 or nb < 2:
+            continue
+        hits = 0
+        if method == 'permutation':
+            pooled, total = np.concatenate([x, y]), x.sum() + y.sum()
+            observed = abs(x.mean() - y.mean())
+            for start in range(0, n_resamples, batch):
+                size = min(batch, n_resamples - start)
+                # na random positions per row without replacement: the smallest na random keys
+                idx = np.argpartition(rng.random((size, na + nb)), na - 1, axis=1)[:, :na]
+                sum_a = pooled[idx].sum(axis=1)
+                diff = np.abs(sum_a / na - (total - sum_a) / nb)
+                hits += int((diff >= observed - 1e-12).sum())
+        elif method == 'bootstrap':
+            grand = np.concatenate([x, y]).mean()
+            x0, y0 = x - x.mean() + grand, y - y.mean() + grand
+            observed = abs(welch_test(x.mean(), x.var(ddof=1), na, y.mean(), y.var(ddof=1), nb)[0])
+            for start in range(0, n_resamples, batch):
+                size = min(batch, n_resamples - start)
+                bx = x0[rng.integers(0, na, (size, na))]
+                by = y0[rng.integers(0, nb, (size, nb))]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    t = (bx.mean(1) - by.mean(1)) / np.sqrt(bx.var(1, ddof=1) / na + by.var(1, ddof=1) / nb)
+                hits += int((np.abs(t) >= observed - 1e-12).sum())
+        else:
+            raise ValueError(f"method must be 'permutation' or 'bootstrap', not {method!r}")
+        out[i] = (hits + 1) / (n_resamples + 1)
+    return out
+
+
+def category_stats(df, reference=None, by='category', value='rating', date_col='last_updated'):
+    """
+    One row per category with:
+      rows          rows in the category (incl. missing ratings)
+      n/mean/var    moments of the non-null ratings
+      last_updated  most recent update (NaT if none)
+      cohen_d       effect size vs all ratings, as confidence.cohen_d(cat, global)
+      t/p           Welch test vs `reference` (default: the most common category, as
+                    df[by].mode()[0]), as analytics.significance_of_rating_diff
+    """
+    m = rating_moments(df, by=by, value=value)
+    rows = df.groupby(by, observed=True, sort=True).size()
+    m.insert(0, 'rows', rows.reindex(m.index).fillna(0).astype(int))
+    if date_col in df.columns:
+        dates = pd.to_datetime(df[date_col], errors='coerce')
+        m[date_col] = dates.groupby(df[by], observed=True, sort=True).max().reindex(m.index)
+    else:
+        m[date_col] = pd.NaT
+
+    ratings = pd.to_numeric(df[value], errors='coerce').dropna()
+    g_n, g_mean, g_var = len(ratings), ratings.mean(), ratings.var(ddof=1)
+    m['cohen_d'] = cohen_d_from_moments(m['mean'], m['var'], m['n'], g_mean, g_var, g_n)
+
+    if reference is None:
+        reference = rows.idxmax()  # first of the sorted keys on ties, like mode()[0]
+    ref = m.loc[reference] if reference in m.index else pd.Series({'n': 0, 'mean': np.nan, 'var': np.nan})
+    m['t'], m['p'] = welch_test(m['mean'], m['var'], m['n'], ref['mean'], ref['var'], ref['n'])
+    m.attrs['reference'] = reference
+    return m
+
+
+def category_fingerprints(df, by='category') -> dict:
+    """
+    {category: hex digest} over the category's rows (all columns). Row hashes are sorted
+    before digesting, so row order doesn't matter; any edited, added or removed row does.
+    """
+    if df.empty:
+        return {}
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    codes, cats = pd.factorize(df[by], sort=True)
+    order = np.lexsort((row_hash, codes))
+    codes, row_hash = codes[order], row_hash[order]
+    bounds = np.searchsorted(codes, np.arange(len(cats) + 1))
+    return {
+        cat: hashlib.blake2b(row_hash[bounds[i]:bounds[i + 1]].tobytes(), digest_size=16).hexdigest()
+        for i, cat in enumerate(cats)
+    }
@@ -0,0 +1,239 @@
+# src/storage.py
+"""
+Table storage shared by every pipeline stage. Artifacts are written as Parquet by
+default (Feather and CSV are options) with a pinned schema for the canonical columns,
+so dtypes such as categorical `category`/`platform` and `last_updated` timestamps
+survive the hand-off between stages.
+
+Format is picked by file suffix; `artifact('outputs/clean_google_play')` appends the
+configured default. MARKET_INTEL_FORMAT=parquet|feather|csv sets that default and
+MARKET_INTEL_EXPORT_CSV=1 additionally writes a .csv copy next to every artifact.
+"""
+import importlib.util
+import os
+from pathlib import Path
+
+import pandas as pd
+
+import instrument
+
+SUFFIXES = {'.parquet': 'parquet', '.feather': 'feather', '.csv': 'csv'}
+
+DEFAULT_FORMAT = os.getenv(
+    'MARKET_INTEL_FORMAT',
+    'parquet' if importlib.util.find_spec('pyarrow') else 'csv',
+)
+EXPORT_CSV = os.getenv('MARKET_INTEL_EXPORT_CSV', '0') == '1'
+
+# pinned logical types for the canonical columns; other columns keep their own dtype
+SCHEMA = {
+    'platform': 'category',
+    'category': 'category',
+    'app_id': 'string',
+    'app_entity_id': 'string',
+    'app_name': 'string',
+    'publisher': 'string',
+    'description': 'string',
+    'rating': 'float',
+    'price_usd': 'float',
+    'size_bytes': 'float',
+    'installs': 'float',
+    'review_count': 'int',
+    'last_updated': 'timestamp',
+}
+
+
+def artifact(stem, fmt=None) -> Path:
+    """outputs/foo -> outputs/foo.parquet (or the configured/requested format)."""
+    return Path(f'{stem}.{fmt or DEFAULT_FORMAT}')
+
+
+def _format(path) -> str:
+    fmt = SUFFIXES.get(Path(path).suffix)
+    if fmt is None:
+        raise ValueError(f'Unknown table format for {path}; expected one of {list(SUFFIXES)}')
+    return fmt
+
+
+def resolve(path) -> Path:
+    """
+    Return an existing file for `path`. A path without a known suffix (or one that does
+    not exist) is looked up as <stem>.<default format>, then the other formats.
+    """
+    path = Path(path)
+    if path.suffix in SUFFIXES and path.exists():
+        return path
+    stem = path.with_suffix('') if path.suffix in SUFFIXES else path
+    order = [DEFAULT_FORMAT] + [f for f in SUFFIXES.values() if f != DEFAULT_FORMAT]
+    for fmt in order:
+        candidate = artifact(stem, fmt)
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f'{path} not found (tried {", ".join(order)})')
+
+
+def coerce(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the canonical columns to their pinned dtypes (returns a new frame)."""
+    df = df.copy()
+    for col, kind in SCHEMA.items():
+        if col not in df.columns:
+            continue
+        s = df[col].astype(object) if kind in ('category', 'string') else df[col]
+        if kind == 'category':
+            df[col] = s.where(s.isna(), s.astype(str)).astype('category')
+        elif kind == 'string':
+            df[col] = s.where(s.isna(), s.astype(str)).astype(object)
+        elif kind == 'float':
+            df[col] = pd.to_numeric(s, errors='coerce').astype(float)
+        elif kind == 'int':
+            df[col] = pd.to_numeric(s, errors='coerce').round().astype('Int64')
+        elif kind == 'timestamp':
+            ts = pd.to_datetime(s, errors='coerce')
+            if getattr(ts.dt, 'tz', None) is not None:
+                ts = ts.dt.tz_convert(None)
+            df[col] = ts.astype('datetime64[ns]')
+    return df
+
+
+def arrow_schema(df: pd.DataFrame, dictionary=True):
+    import pyarrow as pa
+
+    pinned = {
+        # Feather (IPC file) can't change a dictionary between batches, so it stores plain
+        # strings there and read_table() restores the categoricals
+        'category': pa.dictionary(pa.int32(), pa.string()) if dictionary else pa.string(),
+        'string': pa.string(),
+        'float': pa.float64(),
+        'int': pa.int64(),
+        'timestamp': pa.timestamp('ns'),
+    }
+    fields = []
+    for field in pa.Schema.from_pandas(df, preserve_index=False):
+        if field.name in SCHEMA:
+            field = pa.field(field.name, pinned[SCHEMA[field.name]])
+        elif pa.types.is_null(field.type):  # all-NaN column in this chunk
+            field = pa.field(field.name, pa.string())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+class TableWriter:
+    """
+    Incremental writer: every write() appends a chunk with the schema fixed by the
+    first chunk, so streamed stages produce the same file as a single write_table().
+    """
+
+    def __init__(self, path, export_csv=None):
+        self.path = Path(path)
+        self.fmt = _format(self.path)
+        self.export_csv = EXPORT_CSV if export_csv is None else export_csv
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = None
+        self._writer = None
+        self._csv_chunks = 0
+        self._closed = False
+        self.rows = 0
+
+    def _write_csv(self, df, path):
+        df.to_csv(path, mode='a' if self._csv_chunks else 'w', header=not self._csv_chunks, index=False)
+
+    def write(self, df: pd.DataFrame):
+        df = coerce(df)
+        if self.fmt == 'csv':
+            self._write_csv(df, self.path)
+        else:
+            import pyarrow as pa
+
+            if self._schema is None:
+                self._schema = arrow_schema(df, dictionary=self.fmt == 'parquet')
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._schema, compression='zstd')
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema,
+                                                   options=pa.ipc.IpcWriteOptions(compression='zstd'))
+            self._writer.write_table(table)
+            if self.export_csv:
+                self._write_csv(df, self.path.with_suffix('.csv'))
+        self._csv_chunks += 1
+        self.rows += len(df)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if instrument.enabled() and self._csv_chunks:
+            written = [self.path] + ([self.path.with_suffix('.csv')] if self.export_csv and self.fmt != 'csv' else [])
+            instrument.count(bytes_written=sum(p.stat().st_size for p in written if p.exists()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(df: pd.DataFrame, path, export_csv=None) -> Path:
+    with TableWriter(path, export_csv=export_csv) as w:
+        w.write(df)
+    return Path(path)
+
+
+def read_table(path, columns=None) -> pd.DataFrame:
+    """
+    Load an artifact with only the requested columns. CSVs are coerced to the pinned
+    schema on the way in, so callers get the same dtypes whatever the format.
+    """
+    path = resolve(path)
+    fmt = _format(path)
+    if instrument.enabled():
+        instrument.count(bytes_read=path.stat().st_size)
+    if fmt == 'csv':
+        df = coerce(pd.read_csv(path, usecols=columns, low_memory=False))
+        # match what pyarrow hands back: int64, or float64 when there are gaps
+        for c in [c for c, kind in SCHEMA.items() if kind == 'int' and c in df.columns]:
+            df[c] = df[c].astype(float) if df[c].isna().any() else df[c].astype('int64')
+        return df
+    if fmt == 'parquet':
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_feather(path, columns=columns)
+    # dictionaries of streamed files are in order of appearance; sort them like coerce() does
+    cats = [c for c, kind in SCHEMA.items() if kind == 'category' and c in df.columns]
+    for c in cats:
+        df[c] = df[c].astype(str).where(df[c].notna()).astype('category') if fmt == 'feather' \
+            else df[c].cat.reorder_categories(sorted(df[c].cat.categories))
+    return df
+
+
+def iter_table(path, columns=None, batch_rows=500_000):
+    """
+    read_table() in chunks of about batch_rows rows, for artifacts too big to load whole.
+    Chunks carry the pinned dtypes (categoricals per chunk, in order of appearance).
+    """
+    path = resolve(path)
+    fmt = _format(path)
+    if instrument.enabled():
+        instrument.count(bytes_read=path.stat().st_size)
+    if fmt == 'csv':
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=batch_rows, low_memory=False):
+            yield coerce(chunk)
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        with pq.ParquetFile(path) as f:
+            for batch in f.iter_batches(batch_size=batch_rows, columns=columns):
+                yield batch.to_pandas()
+    else:
+        import pyarrow as pa
+
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield coerce((batch.select(columns) if columns else batch).to_pandas())
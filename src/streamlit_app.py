@@ -1,43 +1,108 @@
 # src/streamlit_app.py
 import streamlit as st
-import pandas as pd
-import json
 import os
+import time
+
+import dashboard_data as dd
+import search
+from storage import resolve
+
+INSIGHTS_PATH = 'outputs/insights_debug.json'
+# MARKET_INTEL_BACKEND=duckdb serves the tables from the partitioned lake (src/lake.py)
+BACKEND = os.getenv('MARKET_INTEL_BACKEND', 'pandas')
 
 st.set_page_config(layout='wide', page_title='AI Market Intel')
 st.title("AI-Powered Market Intelligence")
 
 # Check files
-if not os.path.exists('outputs/insights_debug.json'):
+if not os.path.exists(INSIGHTS_PATH):
     st.error("Insights file not found. Run insights_generator_debug.py first.")
     st.stop()
 
-if not os.path.exists('outputs/clean_dataset.csv'):
-    st.error("Clean dataset not found. Run prepare_clean_dataset.py first.")
-    st.stop()
+if BACKEND == 'duckdb':
+    import lake
+    dataset_path = lake.LAKE_DIR
+    if not (dataset_path / lake.META).exists():
+        st.error("Lake not found. Run `python src/lake.py build outputs/clean_dataset` first.")
+        st.stop()
+else:
+    try:
+        dataset_path = resolve('outputs/clean_dataset')
+    except FileNotFoundError:
+        st.error("Clean dataset not found. Run prepare_clean_dataset.py first.")
+        st.stop()
+
+
+# Shared by all sessions; the file signature is part of the cache key, so a rewritten
+# file is reloaded on the next interaction and the stale entry ages out (max_entries).
+# `_probe` is not hashed: the body only runs on a miss, which is what it records.
+@st.cache_resource(max_entries=2, show_spinner="Loading dataset...")
+def cached_dataset(path: str, signature: tuple, _probe: dict):
+    _probe['miss'] = True
+    return dd.load_dataset(path)
+
 
-# Load files
-with open('outputs/insights_debug.json', 'r', encoding='utf-8') as f:
-    insights = json.load(f)['insights']
+@st.cache_resource(max_entries=2, show_spinner="Loading insights...")
+def cached_insights(path: str, signature: tuple, _probe: dict):
+    _probe['miss'] = True
+    return dd.load_insights(path)
 
-df = pd.read_csv('outputs/clean_dataset.csv')
+
+# memory-mapped, so every session shares the page cache; reopened when the index changes
+@st.cache_resource(max_entries=2, show_spinner="Opening search index...")
+def cached_search_index(path: str, signature: tuple):
+    return search.open_index(path)
+
+
+def load(fn, path):
+    probe = {'miss': False}
+    t0 = time.perf_counter()
+    data = fn(str(path), dd.file_signature(path), probe)
+    return data, probe['miss'], time.perf_counter() - t0
+
+
+data, data_miss, data_s = load(cached_dataset, dataset_path)
+insights, insights_miss, insights_s = load(cached_insights, INSIGHTS_PATH)
 
 # Sidebar
-category = st.sidebar.selectbox("Choose category", options=sorted({i['category'] for i in insights}))
+category = st.sidebar.selectbox("Choose category", options=sorted(insights['by_category']))
+
+with st.sidebar.expander("Data layer"):
+    for name, d, miss, s in (('dataset', data, data_miss, data_s),
+                             ('insights', insights, insights_miss, insights_s)):
+        st.caption(f"{name}: {'miss (loaded)' if miss else 'hit'} in {s * 1000:.1f} ms; "
+                   f"load took {d['load_s'] * 1000:.0f} ms at {d['loaded_at']:%H:%M:%S}")
+    st.caption(f"{data['rows']:,} rows indexed")
+
+# Search (needs `python src/search.py build`)
+if (search.SEARCH_DIR / search.META).exists():
+    query = st.sidebar.text_input("Search apps", placeholder="e.g. photo editor")
+    if query:
+        index = cached_search_index(str(search.SEARCH_DIR), search.signature(search.SEARCH_DIR))
+        platforms = st.sidebar.multiselect("Platform", index.labels['platform'])
+        in_category = st.sidebar.checkbox("Only in selected category")
+        filters = {'platform': platforms} if platforms else {}
+        if in_category:
+            filters['category'] = category.lower()
+        t0 = time.perf_counter()
+        hits = index.search(query, k=20, filters=filters)
+        st.header(f"Search: {query}")
+        st.caption(f"{len(hits)} results from {index.docs:,} apps in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        st.dataframe(hits.drop(columns='key'), hide_index=True)
 
-# Filter insights
-selected = [i for i in insights if i['category'] == category]
-if selected:
-    ins = selected[0]
+# Selected category
+ins = insights['by_category'].get(category)
+if ins:
     st.header(f"Category: {ins['category']} — Confidence {ins['confidence']}")
     st.subheader("Metrics")
     st.json(ins['metrics'])
     st.subheader("LLM Recommendations")
     st.json(ins['llm'])
     st.subheader("Top apps (sample)")
-    df_display = df[df['category'] == category].sort_values('review_count', ascending=False).head(10)
-    df_display['review_count'] = df_display['review_count'].astype(int)
-    df_display['rating'] = df_display['rating'].round(2)
-    st.table(df_display[['app_name','rating','review_count','price_usd']])
+    top = data['top'].get(category)
+    if top is not None:
+        st.table(top)
+    else:
+        st.write("No apps for selected category.")
 else:
     st.write("No insights for selected category.")
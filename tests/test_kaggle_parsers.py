@@ -0,0 +1,56 @@
+# tests/test_kaggle_parsers.py
+"""The vectorized Play Store parsers give exactly what Series.apply(parse_*) gives."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kaggle_ingest import (parse_installs, parse_installs_vec, parse_price, parse_price_vec,
+                           parse_size, parse_size_vec)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PARSERS = {
+    "Installs": (parse_installs, parse_installs_vec),
+    "Price": (parse_price, parse_price_vec),
+    "Size": (parse_size, parse_size_vec),
+}
+
+EDGE_CASES = [
+    np.nan, None, "", " ", "Free", "free", "0", "Varies with device", "varies", "Everyone",
+    "1,000+", "10+", "0+", "5,000,000,000+", "$4.99", "$0.99", "₹10", "$1,299.00", "1.2.3",
+    "12M", " 12M ", "1.5M", "512k", "8.5k", "1G", "3.2G", "1.2.3M", "M", "k", "12", "12.5",
+    "abc", "$", "+", "..", "nan", "NaN", "None", "Free+", "-5", "1e3", "12 M",
+]
+
+
+def assert_same(raw, name):
+    scalar, vec = PARSERS[name]
+    got = vec(raw)
+    want = raw.apply(scalar)
+    assert got.index.equals(raw.index)
+    np.testing.assert_array_equal(got.to_numpy(float), want.to_numpy(float))
+
+
+@pytest.fixture(scope="module")
+def play_store():
+    return pd.read_csv(ROOT / "data/raw/googleplaystore.csv", dtype=str)
+
+
+@pytest.mark.parametrize("name", PARSERS)
+def test_bundled_csv(play_store, name):
+    assert_same(play_store[name], name)
+
+
+@pytest.mark.parametrize("name", PARSERS)
+def test_edge_cases(name):
+    raw = pd.Series(EDGE_CASES * 3, dtype=object, name=name)
+    assert_same(raw, name)
+    assert_same(raw.iloc[::-1].set_axis(raw.index[::-1] * 10), name)  # other order, other index
+
+
+@pytest.mark.parametrize("name", PARSERS)
+@pytest.mark.parametrize("values", [[np.nan, None], ["Free", "Free"], ["Varies with device"], []])
+def test_degenerate_columns(name, values):
+    assert_same(pd.Series(values, dtype=object, name=name), name)
@@ -0,0 +1,75 @@
+# tests/test_lake.py
+"""lake.category_summary / detect_growth over a partitioned lake equal analytics.py on the same rows."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+import analytics  # noqa: E402
+import lake  # noqa: E402
+
+AS_OF = pd.Timestamp("2018-08-08")
+CATEGORIES = ["games", "finance", "photo & video", "tools", "o'reilly"]
+FILTERS = [None, {"platform": "ios"}, {"category": ["games", "o'reilly"]},
+           {"platform": "android", "category": "finance"}, {"category": ["no such category"]}]
+
+
+def synthetic(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    rating = rng.uniform(1, 5, n).round(1)
+    rating[rng.random(n) < 0.1] = np.nan
+    updated = AS_OF - pd.to_timedelta(rng.integers(-10, 400, n), unit="D")
+    return pd.DataFrame({
+        "platform": rng.choice(["android", "ios"], n, p=[0.7, 0.3]),
+        "app_name": [f"app {i}" for i in rng.integers(0, n // 2, n)],  # repeated names
+        "category": rng.choice(CATEGORIES, n),
+        "rating": rating,
+        "review_count": rng.integers(0, 100_000, n),
+        "price_usd": np.where(rng.random(n) < 0.8, 0.0, rng.choice([0.99, 1.99, 4.99], n)),
+        "last_updated": updated.where(rng.random(n) > 0.05),
+        "app_entity_id": [f"e{i}" for i in rng.integers(0, n // 3, n)],
+    })
+
+
+def subset(df, filters):
+    for col, v in (filters or {}).items():
+        df = df[df[col].isin(v if isinstance(v, list) else [v])]
+    return df
+
+
+def same(a, b):
+    # categories come back as strings from DuckDB and as categoricals from Parquet
+    pd.testing.assert_frame_equal(a.astype({"category": str}).reset_index(drop=True),
+                                  b.astype({"category": str}).reset_index(drop=True))
+
+
+@pytest.fixture(scope="module", params=[True, False], ids=["entity_id", "app_name"])
+def built(request, tmp_path_factory):
+    df = synthetic()
+    if not request.param:
+        df = df.drop(columns="app_entity_id")
+    root = tmp_path_factory.mktemp("lake")
+    # several chunks, so partitions are written from more than one frame
+    lake.write_partitioned((df.iloc[i:i + 1000] for i in range(0, len(df), 1000)), root)
+    return df, root
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_category_summary(built, filters):
+    df, root = built
+    same(analytics.category_summary(subset(df, filters)), lake.category_summary(root, filters))
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_detect_growth(built, filters):
+    df, root = built
+    same(analytics.detect_growth(subset(df, filters), as_of=AS_OF),
+         lake.detect_growth(root, as_of=AS_OF, filters=filters))
+
+
+def test_rows_and_pruning(built):
+    df, root = built
+    assert lake.count_rows(root) == len(df)
+    assert lake.count_rows(root, {"platform": "ios"}) == (df["platform"] == "ios").sum()
+    assert sorted(p.name for p in root.glob("platform=*")) == ["platform=android", "platform=ios"]
@@ -0,0 +1,47 @@
+# tests/test_snapshots.py
+"""Play Store rows that only become the same app after ingest normalization are snapshotted once."""
+import pandas as pd
+import pytest
+
+import snapshots
+from kaggle_ingest import standardize, standardize_stream
+from storage import read_table
+
+RAW = pd.DataFrame({
+    "App": ["Chess", " Chess ", "Chess", "Go"],
+    "Category": ["GAME", "GAME", "BOARD", "GAME"],
+    "Rating": ["4.1", "4.5", "3.9", "4.0"],
+    "Reviews": ["10", "30", "7", "5"],
+    "Price": ["0", "0", "$1.99", "0"],
+    "Last Updated": ["January 7, 2018"] * 4,
+})
+
+
+def play_store(df):
+    return df.assign(platform="android")
+
+
+@pytest.fixture(params=["in_memory", "streamed"])
+def ingested(request, tmp_path):
+    if request.param == "in_memory":
+        return play_store(standardize(RAW))
+    RAW.to_csv(tmp_path / "raw.csv", index=False)
+    standardize_stream(tmp_path / "raw.csv", tmp_path / "clean.parquet", chunksize=2)
+    return play_store(read_table(tmp_path / "clean.parquet"))
+
+
+def test_whitespace_twins_collapse_to_most_reviewed(ingested, tmp_path):
+    # the ingest dedupes on the raw name, then strips it: two rows share a key
+    assert snapshots.doc_keys(ingested).duplicated().sum() == 1
+    entry = snapshots.append(ingested, "2024-05-01", tmp_path / "snapshots")
+    assert (entry["apps"], entry["collapsed"], entry["skipped"]) == (3, 1, 0)
+    got = snapshots.as_of(None, tmp_path / "snapshots").set_index("key")["review_count"].sort_index()
+    assert got.to_dict() == {"android:Chess|board": 7, "android:Chess|game": 30, "android:Go|game": 5}
+
+
+def test_collapse_is_independent_of_row_order(ingested, tmp_path):
+    a = snapshots.append(ingested, "2024-05-01", tmp_path / "a")
+    b = snapshots.append(ingested.iloc[::-1], "2024-05-01", tmp_path / "b")
+    assert a["apps"] == b["apps"]
+    pd.testing.assert_frame_equal(snapshots.as_of(None, tmp_path / "a").sort_values("key", ignore_index=True),
+                                  snapshots.as_of(None, tmp_path / "b").sort_values("key", ignore_index=True))